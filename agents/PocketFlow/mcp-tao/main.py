@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from flow import create_universal_tao_flow
 from utils_fastmcp import FastMultiMCPClient, call_llm
+from mcp_daemon import attach_daemon
 from mcp_config import MCPConfigManager
 
 # Configure logging
@@ -50,8 +51,8 @@ async def main():
     print(f"📝 Query: {query}")
     print("=" * 50)
     
-    # Initialize MCP client
-    mcp_client = FastMultiMCPClient("mcp_servers.json")
+    # Attach to warm servers from the MCP daemon if one is running, else spawn them
+    mcp_client = await attach_daemon("mcp_servers.json") or FastMultiMCPClient("mcp_servers.json")
     
     # LLM functionality is provided by call_llm function
     
@@ -115,6 +116,9 @@ async def main():
     except Exception as e:
         logger.error(f"Error during execution: {e}")
         print(f"❌ Error: {e}")
+    finally:
+        # Shut down the persistent server sessions
+        await mcp_client.disconnect_all()
     
     print("✅ Universal MCP-TAO Agent completed")
 
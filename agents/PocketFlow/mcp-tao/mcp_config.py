@@ -6,6 +6,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Seconds a server may take to start and list its tools
+DEFAULT_STARTUP_TIMEOUT = 30.0
+
 @dataclass
 class MCPServerConfig:
     """Configuration for a single MCP server."""
@@ -14,6 +17,8 @@ class MCPServerConfig:
     command: str
     args: List[str]
     env: Optional[Dict[str, str]] = None
+    startup_timeout: float = DEFAULT_STARTUP_TIMEOUT
+    required: bool = False
     
     def __post_init__(self):
         if self.type != "stdio":
@@ -51,7 +56,9 @@ class MCPConfigManager:
                         type=server_config.get("type", "stdio"),
                         command=server_config.get("command", ""),
                         args=server_config.get("args", []),
-                        env=server_config.get("env")
+                        env=server_config.get("env"),
+                        startup_timeout=float(server_config.get("startupTimeout", DEFAULT_STARTUP_TIMEOUT)),
+                        required=bool(server_config.get("required", False))
                     )
                     logger.info(f"Loaded MCP server config: {server_name}")
                 except Exception as e:
@@ -201,7 +201,10 @@ class AsyncActionNode(AsyncNode):
             return action_input
         
         # Find the tool in available tools
-        tool_info = self._find_tool(action, available_tools)
+        try:
+            tool_info = self._find_tool(action, available_tools)
+        except ValueError as e:
+            return str(e)
         if not tool_info:
             return f"Tool '{action}' not found in available tools"
         
@@ -212,7 +215,9 @@ class AsyncActionNode(AsyncNode):
             if not mcp_client:
                 return "MCP client not available"
             
-            result = await mcp_client.call_tool(action, self._prepare_tool_params(action_input, tool_schema))
+            result = await mcp_client.call_tool(
+                tool_schema["name"], self._prepare_tool_params(action_input, tool_schema), server_name
+            )
             return str(result)
         except Exception as e:
             logger.error(f"Tool execution failed: {e}")
@@ -228,12 +233,21 @@ class AsyncActionNode(AsyncNode):
         return "observe"
     
     def _find_tool(self, tool_name: str, available_tools: Dict[str, Any]) -> Optional[tuple]:
-        """Find tool schema in available tools"""
-        for server_name, tools in available_tools.items():
-            for tool in tools:
-                if tool.get("name") == tool_name:
-                    return server_name, tool
-        return None
+        """Find tool schema in available tools; accepts "server.tool", or a bare name provided by one server"""
+        server, _, name = tool_name.partition(".")
+        for tool in available_tools.get(server, []) if name else []:
+            if tool.get("name") == name:
+                return server, tool
+        matches = [
+            (server_name, tool)
+            for server_name, tools in available_tools.items()
+            for tool in tools
+            if tool.get("name") == tool_name
+        ]
+        if len(matches) > 1:
+            choices = ", ".join(f"{server_name}.{tool_name}" for server_name, _ in matches)
+            raise ValueError(f"Tool '{tool_name}' is provided by several servers; use one of: {choices}")
+        return matches[0] if matches else None
     
     def _prepare_tool_params(self, action_input: Any, tool_schema: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare tool parameters based on input and schema"""
@@ -2,14 +2,32 @@ from openai import OpenAI
 import os
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import time
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 import json
 from fastmcp.client import Client
 from fastmcp.mcp_config import MCPConfig
+from mcp_daemon import attach_daemon
 
 logger = logging.getLogger(__name__)
 
+# Seconds a server may take to start and list its tools
+DEFAULT_STARTUP_TIMEOUT = 30.0
+
+# Tool calls a server handles at once (per-server "maxConcurrency" overrides it)
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("MCP_MAX_CONCURRENCY", "4"))
+
+# Per-server options of ours in mcp_servers.json that are not passed to FastMCP
+CLIENT_OPTIONS = ("startupTimeout", "required", "maxConcurrency")
+
+# Seconds between pings of an open session (0 disables health checks)
+HEALTH_CHECK_INTERVAL = float(os.environ.get("MCP_HEALTH_INTERVAL", "30"))
+HEALTH_CHECK_TIMEOUT = float(os.environ.get("MCP_HEALTH_TIMEOUT", "10"))
+
+# Seconds a server gets to exit on disconnect
+SHUTDOWN_TIMEOUT = 10.0
+
 @dataclass 
 class FastMCPTool:
     """Represents a tool from a FastMCP server."""
@@ -24,84 +42,214 @@ class FastMCPTool:
         return f"{self.server_name}.{self.name}"
 
 class FastMCPServerClient:
-    """Client for a single MCP server using FastMCP."""
+    """
+    Client for a single MCP server using FastMCP.
+    
+    The server is started and its session opened once, in connect(); tool
+    calls reuse that session. A background health check pings the server
+    and reconnects if the session has dropped, and disconnect() shuts the
+    server down.
+    """
     
     def __init__(self, server_name: str, server_config: dict):
         self.server_name = server_name
-        self.server_config = server_config
+        self.server_config = {k: v for k, v in server_config.items() if k not in CLIENT_OPTIONS}
+        self.startup_timeout = float(server_config.get("startupTimeout", DEFAULT_STARTUP_TIMEOUT))
+        self.required = bool(server_config.get("required", False))
+        self.max_concurrency = int(server_config.get("maxConcurrency", DEFAULT_MAX_CONCURRENCY))
+        self._call_slots = asyncio.Semaphore(self.max_concurrency)
         self.client: Optional[Client] = None
         self.is_connected = False
         self.tools: List[FastMCPTool] = []
+        self._session_task: Optional[asyncio.Task] = None
+        self._session_stop: Optional[asyncio.Event] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._reconnect_lock = asyncio.Lock()
+        # Called after a reconnect reloaded the tool list
+        self.on_tools_changed: Optional[Callable[[], None]] = None
+    
+    @property
+    def session_alive(self) -> bool:
+        """Whether the long-lived session to the server is still open."""
+        return self._session_task is not None and not self._session_task.done()
     
     async def connect(self) -> bool:
-        """Connect to the MCP server using FastMCP."""
+        """Start the MCP server, open a persistent session and load its tools."""
         try:
             logger.info(f"Connecting to {self.server_name} via {self.server_config.get('command')}")
-            
-            # Create MCPConfig for this specific server
-            # FastMCP expects the config in a specific format
-            mcp_config_dict = {
-                "mcpServers": {
-                    self.server_name: self.server_config
-                }
-            }
-            
-            config = MCPConfig(**mcp_config_dict)
-            self.client = Client(config)
-            
-            # Test connection by listing tools
-            async with self.client:
-                await self.load_tools()
-                self.is_connected = True
+            await self._open_session()
+            await self.load_tools()
+            self.is_connected = True
+            self._start_health_checks()
             
             logger.info(f"✅ Connected to {self.server_name} ({len(self.tools)} tools)")
             return True
             
+        except asyncio.CancelledError:
+            # Startup timeout: don't leave a half-started server behind
+            await self._close_session()
+            raise
         except Exception as e:
             logger.error(f"❌ Failed to connect to {self.server_name}: {e}")
+            await self._close_session()
             self.is_connected = False
             return False
     
+    async def _open_session(self):
+        """Start the server and wait until its session is open."""
+        # FastMCP expects the config in a specific format
+        mcp_config_dict = {
+            "mcpServers": {
+                self.server_name: self.server_config
+            }
+        }
+        config = MCPConfig(**mcp_config_dict)
+        self.client = Client(config)
+        
+        self._session_stop = asyncio.Event()
+        ready = asyncio.get_running_loop().create_future()
+        self._session_task = asyncio.create_task(
+            self._run_session(self.client, self._session_stop, ready)
+        )
+        await ready
+    
+    async def _run_session(self, client: Client, stop: asyncio.Event, ready: asyncio.Future):
+        """Hold the session open until asked to stop.
+        
+        Entering and leaving the client happen in this one task, as the
+        transport's task groups require.
+        """
+        try:
+            async with client:
+                ready.set_result(True)
+                await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"Session to {self.server_name} ended: {e}")
+        finally:
+            if not ready.done():
+                ready.cancel()
+    
+    async def _close_session(self):
+        """Ask the session task to leave the client, shutting the server down."""
+        task, self._session_task = self._session_task, None
+        if self._session_stop:
+            self._session_stop.set()
+        if task and not task.done():
+            await asyncio.wait({task}, timeout=SHUTDOWN_TIMEOUT)
+            if not task.done():
+                logger.warning(f"{self.server_name} did not shut down within {SHUTDOWN_TIMEOUT:g}s, cancelling its session")
+                task.cancel()
+            results = await asyncio.gather(task, return_exceptions=True)
+            if isinstance(results[0], Exception):
+                logger.error(f"Error shutting down {self.server_name}: {results[0]}")
+    
+    def _start_health_checks(self):
+        if HEALTH_CHECK_INTERVAL > 0 and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.create_task(self._health_loop())
+    
+    async def _health_loop(self):
+        """Ping the server periodically and reconnect when it stops answering."""
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            if await self.check_health():
+                continue
+            logger.warning(f"{self.server_name} failed its health check, reconnecting")
+            await self.reconnect()
+    
+    async def check_health(self) -> bool:
+        """Whether the session is open and the server answers a ping."""
+        if not self.session_alive:
+            return False
+        try:
+            return bool(await asyncio.wait_for(self.client.ping(), timeout=HEALTH_CHECK_TIMEOUT))
+        except Exception:
+            return False
+    
+    async def reconnect(self) -> bool:
+        """Replace a dead session with a new one. Concurrent callers share one reconnect."""
+        async with self._reconnect_lock:
+            if await self.check_health():
+                # Someone else reconnected while we waited for the lock
+                return True
+            self.is_connected = False
+            await self._close_session()
+            try:
+                await asyncio.wait_for(self._open_session(), timeout=self.startup_timeout)
+                await self.load_tools()
+            except Exception as e:
+                logger.error(f"❌ Failed to reconnect to {self.server_name}: {e}")
+                await self._close_session()
+                return False
+            self.is_connected = True
+            if self.on_tools_changed:
+                self.on_tools_changed()
+            logger.info(f"🔄 Reconnected to {self.server_name}")
+            return True
+    
+    async def disconnect(self):
+        """Stop health checks and shut the server down."""
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        await self._close_session()
+        if self.is_connected:
+            logger.info(f"Disconnected from {self.server_name}")
+        self.is_connected = False
+    
     async def load_tools(self):
         """Load available tools from the server."""
         if not self.client:
             return
         
         try:
-            async with self.client:
-                mcp_tools = await self.client.list_tools()
-                self.tools = [
-                    FastMCPTool(
-                        name=tool.name,
-                        description=tool.description,
-                        server_name=self.server_name,
-                        inputSchema=tool.inputSchema
-                    )
-                    for tool in mcp_tools
-                ]
-                logger.debug(f"Loaded {len(self.tools)} tools from {self.server_name}")
+            mcp_tools = await self.client.list_tools()
+            self.tools = [
+                FastMCPTool(
+                    name=tool.name,
+                    description=tool.description,
+                    server_name=self.server_name,
+                    inputSchema=tool.inputSchema
+                )
+                for tool in mcp_tools
+            ]
+            logger.debug(f"Loaded {len(self.tools)} tools from {self.server_name}")
         except Exception as e:
             logger.error(f"Failed to load tools from {self.server_name}: {e}")
             self.tools = []
     
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Call a tool on this server."""
+        """Call a tool on this server over the open session, at most max_concurrency at a time."""
+        async with self._call_slots:
+            return await self._call_tool(tool_name, arguments)
+    
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
         if not self.client:
             raise RuntimeError(f"Not connected to {self.server_name}")
+        if not self.session_alive and not await self.reconnect():
+            raise RuntimeError(f"Lost connection to {self.server_name}")
         
         try:
-            async with self.client:
-                result = await self.client.call_tool(tool_name, arguments)
-                # FastMCP's call_tool returns structured content
-                if hasattr(result, 'content') and result.content:
-                    # If it's a list of content blocks, join them
-                    if isinstance(result.content, list):
-                        return '\n'.join(str(block) for block in result.content)
-                    return str(result.content)
-                return str(result)
+            result = await self.client.call_tool(tool_name, arguments)
         except Exception as e:
-            logger.error(f"Failed to call tool {tool_name} on {self.server_name}: {e}")
-            raise
+            # Errors from a healthy server are the tool's own; a dead session
+            # gets one reconnect and retry
+            if await self.check_health() or not await self.reconnect():
+                logger.error(f"Failed to call tool {tool_name} on {self.server_name}: {e}")
+                raise
+            logger.info(f"Retrying {tool_name} on {self.server_name} after reconnecting")
+            result = await self.client.call_tool(tool_name, arguments)
+        
+        # FastMCP's call_tool returns structured content
+        if hasattr(result, 'content') and result.content:
+            # If it's a list of content blocks, join them
+            if isinstance(result.content, list):
+                return '\n'.join(str(block) for block in result.content)
+            return str(result.content)
+        return str(result)
 
 class FastMultiMCPClient:
     """Client that manages multiple MCP servers using FastMCP."""
@@ -110,6 +258,11 @@ class FastMultiMCPClient:
         self.config_path = config_path
         self.clients: Dict[str, FastMCPServerClient] = {}
         self.all_tools: List[FastMCPTool] = []
+        # Routing index: "server.tool" and unambiguous bare names -> tool
+        self.tool_index: Dict[str, FastMCPTool] = {}
+        # Bare tool names offered by several servers -> those servers
+        self.tool_collisions: Dict[str, List[str]] = {}
+        self.connect_tasks: Dict[str, asyncio.Task] = {}
         self.config_data = {}
         self.load_config()
     
@@ -122,63 +275,154 @@ class FastMultiMCPClient:
             logger.error(f"Failed to load config from {self.config_path}: {e}")
             self.config_data = {"mcpServers": {}}
     
-    async def connect_all(self) -> Dict[str, bool]:
-        """Connect to all configured servers."""
-        connection_results = {}
-        servers = self.config_data.get("mcpServers", {})
+    async def connect_all(self, required: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Start all configured servers concurrently and wait for them.
+        
+        Each server gets its own startup timeout ("startupTimeout" in the
+        config, default 30s). If a required subset is given (or servers are
+        marked "required": true in the config), this returns as soon as those
+        servers have finished connecting; the others keep starting in the
+        background and their tools are added when they come up.
         
+        Returns connection status for each server that finished connecting.
+        """
+        servers = self.config_data.get("mcpServers", {})
         for server_name, server_config in servers.items():
             client = FastMCPServerClient(server_name, server_config)
+            client.on_tools_changed = self._rebuild_tools
             self.clients[server_name] = client
-            
-            # Try to connect with timeout
-            try:
-                connection_results[server_name] = await asyncio.wait_for(
-                    client.connect(), timeout=30.0
-                )
-            except asyncio.TimeoutError:
-                logger.error(f"Timeout connecting to {server_name}")
-                connection_results[server_name] = False
-            except Exception as e:
-                logger.error(f"Unexpected error connecting to {server_name}: {e}")
-                connection_results[server_name] = False
+            self.connect_tasks[server_name] = asyncio.create_task(self._connect_server(client))
         
-        # Aggregate all tools from successfully connected servers
-        self.all_tools = []
-        for client in self.clients.values():
-            if client.is_connected:
-                self.all_tools.extend(client.tools)
+        if required is None:
+            required = [name for name, client in self.clients.items() if client.required]
+        unknown = [name for name in required if name not in servers]
+        if unknown:
+            logger.warning(f"Required servers not configured: {', '.join(unknown)}")
+        wait_for = [name for name in required if name in servers] or list(servers)
         
+        # Collect results as servers come up instead of in config order
+        for task in asyncio.as_completed([self.connect_tasks[name] for name in wait_for]):
+            await task
+        
+        connection_results = {
+            name: task.result() for name, task in self.connect_tasks.items() if task.done()
+        }
         connected_count = sum(connection_results.values())
-        total_count = len(connection_results)
-        logger.info(f"Connected to {connected_count}/{total_count} servers")
+        pending = len(servers) - len(connection_results)
+        logger.info(
+            f"Connected to {connected_count}/{len(servers)} servers"
+            + (f", {pending} still starting in the background" if pending else "")
+        )
         
         return connection_results
     
+    async def _connect_server(self, client: FastMCPServerClient) -> bool:
+        """Connect one server within its startup timeout."""
+        started = time.monotonic()
+        try:
+            connected = await asyncio.wait_for(client.connect(), timeout=client.startup_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout connecting to {client.server_name} after {client.startup_timeout:g}s")
+            connected = False
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to {client.server_name}: {e}")
+            connected = False
+        
+        if connected:
+            logger.info(f"{client.server_name} ready in {time.monotonic() - started:.1f}s")
+            self._rebuild_tools()
+        return connected
+    
+    def _rebuild_tools(self):
+        """Aggregate all tools from successfully connected servers and rebuild the routing index."""
+        all_tools = []
+        for client in self.clients.values():
+            if client.is_connected:
+                all_tools.extend(client.tools)
+        
+        index: Dict[str, FastMCPTool] = {tool.qualified_name: tool for tool in all_tools}
+        by_name: Dict[str, List[FastMCPTool]] = {}
+        for tool in all_tools:
+            by_name.setdefault(tool.name, []).append(tool)
+        collisions = {}
+        for name, tools in by_name.items():
+            if len(tools) == 1:
+                index.setdefault(name, tools[0])
+            else:
+                collisions[name] = [tool.server_name for tool in tools]
+                if self.tool_collisions.get(name) != collisions[name]:
+                    logger.warning(
+                        f"Tool '{name}' is provided by {', '.join(collisions[name])}; "
+                        f"address it as server.tool"
+                    )
+        
+        # Swap everything in at once so lookups never see a half-built index
+        self.all_tools, self.tool_index, self.tool_collisions = all_tools, index, collisions
+    
+    async def wait_for_servers(self) -> Dict[str, bool]:
+        """Wait until servers still starting in the background have finished."""
+        if self.connect_tasks:
+            await asyncio.gather(*self.connect_tasks.values(), return_exceptions=True)
+        return self.get_connection_status()
+    
     def get_all_tools(self) -> List[FastMCPTool]:
         """Get all tools from all connected servers."""
         return self.all_tools.copy()
     
-    def find_tool(self, tool_name: str) -> Optional[Tuple[FastMCPTool, str]]:
-        """Find a tool by name. Returns (tool, server_name) or None."""
-        for tool in self.all_tools:
-            if tool.name == tool_name:
-                return tool, tool.server_name
+    def find_tool(self, tool_name: str, server_name: Optional[str] = None) -> Optional[Tuple[FastMCPTool, str]]:
+        """
+        Find a tool by name. Returns (tool, server_name) or None.
+        
+        Accepts a bare tool name or "server.tool"; a server_name hint picks
+        that server's tool when it has one. Raises ValueError for a bare name
+        that several servers provide.
+        """
+        tool = None
+        if server_name:
+            tool = self.tool_index.get(f"{server_name}.{tool_name}")
+        tool = tool or self.tool_index.get(tool_name)
+        if tool:
+            return tool, tool.server_name
+        if tool_name in self.tool_collisions:
+            servers = self.tool_collisions[tool_name]
+            raise ValueError(
+                f"Tool '{tool_name}' is ambiguous, provided by {', '.join(servers)}; "
+                f"use one of {', '.join(f'{s}.{tool_name}' for s in servers)}"
+            )
         return None
     
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Call a tool by name. Automatically routes to the correct server."""
-        tool_info = self.find_tool(tool_name)
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], server_name: Optional[str] = None) -> Any:
+        """Call a tool by name or "server.tool". Automatically routes to the correct server."""
+        tool_info = self.find_tool(tool_name, server_name)
         if not tool_info:
             raise ValueError(f"Tool '{tool_name}' not found")
         
         tool, server_name = tool_info
         client = self.clients.get(server_name)
         
-        if not client or not client.is_connected:
+        if not client:
             raise RuntimeError(f"Server '{server_name}' not connected")
         
-        return await client.call_tool(tool_name, arguments)
+        # A server that dropped its session is reconnected by its client
+        return await client.call_tool(tool.name, arguments)
+    
+    async def disconnect_all(self):
+        """Shut down all servers."""
+        # Stop servers that are still starting
+        for task in self.connect_tasks.values():
+            task.cancel()
+        if self.connect_tasks:
+            await asyncio.gather(*self.connect_tasks.values(), return_exceptions=True)
+        self.connect_tasks.clear()
+        
+        await asyncio.gather(
+            *(client.disconnect() for client in self.clients.values()),
+            return_exceptions=True
+        )
+        self.all_tools = []
+        self.tool_index = {}
+        self.tool_collisions = {}
     
     def get_connected_servers(self) -> List[str]:
         """Get list of successfully connected server names."""
@@ -190,6 +434,8 @@ class FastMultiMCPClient:
 
 # Global FastMCP client instance
 _fast_multi_client: Optional[FastMultiMCPClient] = None
+# Event loop the global client was created on
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
 
 def call_llm(prompt: str) -> str:
     """Call LLM with the given prompt."""
@@ -203,11 +449,25 @@ def call_llm(prompt: str) -> str:
     )
     return r.choices[0].message.content
 
-async def initialize_fastmcp_clients(config_path: str = "mcp_servers.json") -> FastMultiMCPClient:
-    """Initialize and connect to all MCP servers using FastMCP."""
-    global _fast_multi_client
+async def initialize_fastmcp_clients(
+    config_path: str = "mcp_servers.json",
+    required: Optional[List[str]] = None
+) -> FastMultiMCPClient:
+    """
+    Initialize and connect to all MCP servers using FastMCP (see FastMultiMCPClient.connect_all).
+    
+    When an MCP daemon serves this config (see mcp_daemon.py), attaches to its
+    warm servers instead and returns a DaemonMCPClient.
+    """
+    global _fast_multi_client, _client_loop
+    _client_loop = asyncio.get_running_loop()
+    daemon_client = await attach_daemon(config_path)
+    if daemon_client:
+        _fast_multi_client = daemon_client
+        return daemon_client
+    
     _fast_multi_client = FastMultiMCPClient(config_path)
-    await _fast_multi_client.connect_all()
+    await _fast_multi_client.connect_all(required)
     return _fast_multi_client
 
 async def get_all_fastmcp_tools() -> List[FastMCPTool]:
@@ -216,11 +476,19 @@ async def get_all_fastmcp_tools() -> List[FastMCPTool]:
         raise RuntimeError("FastMCP clients not initialized. Call initialize_fastmcp_clients() first.")
     return _fast_multi_client.get_all_tools()
 
-async def call_fastmcp_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
-    """Call a FastMCP tool by name."""
+async def call_fastmcp_tool(tool_name: str, arguments: Dict[str, Any], server_name: Optional[str] = None) -> Any:
+    """Call a FastMCP tool by name or "server.tool"."""
     if not _fast_multi_client:
         raise RuntimeError("FastMCP clients not initialized. Call initialize_fastmcp_clients() first.")
-    return await _fast_multi_client.call_tool(tool_name, arguments)
+    return await _fast_multi_client.call_tool(tool_name, arguments, server_name)
+
+async def cleanup_fastmcp_clients():
+    """Shut down all FastMCP servers."""
+    global _fast_multi_client, _client_loop
+    if _fast_multi_client:
+        await _fast_multi_client.disconnect_all()
+        _fast_multi_client = None
+    _client_loop = None
 
 def get_fastmcp_client() -> Optional[FastMultiMCPClient]:
     """Get the global FastMCP client instance."""
@@ -270,17 +538,22 @@ def call_tool(server_path=None, tool_name=None, arguments=None):
         return f"Error: FastMCP clients not initialized"
     
     try:
-        # For FastMCP, we need to run the async call
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # If we're already in an event loop, create a task
-            # This is a common pattern for async compatibility
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, call_fastmcp_tool(tool_name, arguments))
-                return future.result()
-        else:
-            return loop.run_until_complete(call_fastmcp_tool(tool_name, arguments))
+        # Sessions, semaphores and locks belong to the loop that initialized the
+        # clients, so the call has to run there rather than on a new loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if _client_loop is None or _client_loop.is_closed():
+            return "Error: FastMCP client event loop is closed"
+        if running is _client_loop:
+            return f"Error calling tool {tool_name}: use await call_fastmcp_tool() inside the client's event loop"
+        if _client_loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(call_fastmcp_tool(tool_name, arguments), _client_loop)
+            return future.result()
+        if running is None:
+            return _client_loop.run_until_complete(call_fastmcp_tool(tool_name, arguments))
+        return f"Error calling tool {tool_name}: FastMCP client event loop is not running"
     except Exception as e:
         return f"Error calling tool {tool_name}: {e}"
 
@@ -320,5 +593,7 @@ if __name__ == "__main__":
             
         except Exception as e:
             print(f"Error: {e}")
+        finally:
+            await cleanup_fastmcp_clients()
     
     asyncio.run(test_fastmcp_client())
\ No newline at end of file
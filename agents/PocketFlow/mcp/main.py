@@ -214,7 +214,7 @@ class ExecuteToolNode(AsyncNode):
         print(f"🔧 Executing '{tool_name}' on {server_name} with parameters: {parameters}")
         
         try:
-            result = await call_mcp_tool(tool_name, parameters)
+            result = await call_mcp_tool(tool_name, parameters, server_name)
             return result
         except Exception as e:
             logger.error(f"Tool execution failed: {e}")
@@ -1,5 +1,5 @@
 from pocketflow import Node, Flow, AsyncNode, AsyncFlow
-from utils_fastmcp import call_llm, initialize_fastmcp_clients, get_all_fastmcp_tools, call_fastmcp_tool, get_fastmcp_client
+from utils_fastmcp import call_llm, initialize_fastmcp_clients, get_all_fastmcp_tools, call_fastmcp_tool, get_fastmcp_client, cleanup_fastmcp_clients
 import yaml
 import sys
 import asyncio
@@ -214,7 +214,7 @@ class ExecuteFastMCPToolNode(AsyncNode):
         print(f"🔧 Executing '{tool_name}' on {server_name} with parameters: {parameters}")
         
         try:
-            result = await call_fastmcp_tool(tool_name, parameters)
+            result = await call_fastmcp_tool(tool_name, parameters, server_name)
             return result
         except Exception as e:
             logger.error(f"FastMCP tool execution failed: {e}")
@@ -290,6 +290,12 @@ async def run_fastmcp_agent(question: str):
     except Exception as e:
         logger.error(f"Flow execution failed: {e}")
         print(f"❌ Error during execution: {e}")
+    finally:
+        # Shut down the persistent server sessions
+        try:
+            await cleanup_fastmcp_clients()
+        except Exception as cleanup_error:
+            logger.error(f"Error during cleanup: {cleanup_error}")
 
 def main():
     """Main entry point."""
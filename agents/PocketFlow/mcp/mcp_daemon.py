@@ -0,0 +1,353 @@
+"""
+Warm MCP server pool shared across agent runs.
+
+The daemon starts the servers of one mcp_servers.json once, keeps their
+sessions open and serves tool listing and tool calls over a Unix socket.
+Agents attach to it instead of spawning the servers themselves, so a question
+no longer pays for npx install checks, container starts or browser launches.
+The daemon exits after MCP_DAEMON_IDLE_TIMEOUT seconds without use.
+
+    python mcp_daemon.py --config mcp_servers.json    # run in the foreground
+    python mcp_daemon.py --status | --stop
+
+MCP_DAEMON controls how agents use it: "auto" (default) attaches when a daemon
+for the config is running and otherwise spawns the servers in-process,
+"start" launches the daemon in the background first, "off" never attaches.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import signal
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DAEMON_MODE = os.environ.get("MCP_DAEMON", "auto").lower()
+
+# Seconds without requests after which the daemon shuts its servers down (0 = never)
+IDLE_TIMEOUT = float(os.environ.get("MCP_DAEMON_IDLE_TIMEOUT", "900"))
+
+# Seconds an agent waits for a daemon it started to have its servers up
+START_TIMEOUT = float(os.environ.get("MCP_DAEMON_START_TIMEOUT", "120"))
+
+# One JSON message per line; tool results can be large
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+def _runtime_dir() -> str:
+    """Private per-user directory for daemon sockets (XDG_RUNTIME_DIR when set)."""
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        path = os.path.join(runtime_dir, "pocketflow-mcp")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"pocketflow-mcp-{uid}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != uid:
+        raise PermissionError(f"{path} is not a directory owned by uid {uid}")
+    if stat.S_IMODE(info.st_mode) != 0o700:
+        os.chmod(path, 0o700)
+    return path
+
+def daemon_socket(config_path: str) -> str:
+    """Socket path of the daemon for a config file (one daemon per config)."""
+    if os.environ.get("MCP_DAEMON_SOCKET"):
+        return os.environ["MCP_DAEMON_SOCKET"]
+    config_hash = hashlib.sha1(os.path.abspath(config_path).encode()).hexdigest()[:10]
+    return os.path.join(_runtime_dir(), f"{config_hash}.sock")
+
+def _check_socket_owner(socket_path: str):
+    """Refuse to talk to a socket that is not one of ours."""
+    info = os.lstat(socket_path)
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != uid:
+        raise PermissionError(f"{socket_path} is not a socket owned by uid {uid}")
+
+async def _request(socket_path: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one request to the daemon and return its response."""
+    _check_socket_owner(socket_path)
+    reader, writer = await asyncio.open_unix_connection(socket_path, limit=MAX_MESSAGE_BYTES)
+    try:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        line = await reader.readline()
+    finally:
+        writer.close()
+    if not line:
+        raise ConnectionError("MCP daemon closed the connection")
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise RuntimeError(response.get("error", "MCP daemon request failed"))
+    return response
+
+@dataclass
+class DaemonTool:
+    """A tool served by the daemon (same fields as MCPTool and FastMCPTool)."""
+    name: str
+    description: str
+    server_name: str
+    inputSchema: Dict[str, Any]
+
+    @property
+    def qualified_name(self) -> str:
+        """Get fully qualified tool name including server."""
+        return f"{self.server_name}.{self.name}"
+
+class DaemonMCPClient:
+    """Client for servers kept warm by the daemon, with the interface the agents use."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.all_tools: List[DaemonTool] = []
+        self.connection_status: Dict[str, bool] = {}
+
+    async def connect_all(self, required: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Fetch servers and tools from the daemon; its servers are already running."""
+        response = await _request(self.socket_path, {"op": "tools"})
+        self.connection_status = response["servers"]
+        self.all_tools = [DaemonTool(**tool) for tool in response["tools"]]
+        return dict(self.connection_status)
+
+    def get_all_tools(self) -> List[DaemonTool]:
+        """Get all tools from all connected servers."""
+        return self.all_tools.copy()
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], server_name: Optional[str] = None) -> Any:
+        """Call a tool by name or "server.tool"; the daemon routes it."""
+        response = await _request(self.socket_path, {
+            "op": "call",
+            "tool": tool_name,
+            "server": server_name,
+            "arguments": arguments
+        })
+        return response["result"]
+
+    async def disconnect_all(self):
+        """Detach; the daemon keeps the servers running for the next agent."""
+        self.all_tools = []
+
+    def get_connected_servers(self) -> List[str]:
+        """Get list of successfully connected server names."""
+        return [name for name, connected in self.connection_status.items() if connected]
+
+    def get_connection_status(self) -> Dict[str, bool]:
+        """Get connection status for all servers."""
+        return dict(self.connection_status)
+
+async def _daemon_status(socket_path: str) -> Optional[Dict[str, Any]]:
+    """Status of the daemon on a socket, or None if none is answering."""
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        _check_socket_owner(socket_path)
+    except PermissionError as e:
+        logger.warning(f"Not attaching to MCP daemon: {e}")
+        return None
+    try:
+        return await asyncio.wait_for(_request(socket_path, {"op": "status"}), timeout=5)
+    except Exception:
+        return None
+
+def start_daemon(config_path: str):
+    """Launch the daemon for a config as a detached background process."""
+    log_path = f"{daemon_socket(config_path)}.log"
+    logger.info(f"Starting MCP daemon for {config_path} (log: {log_path})")
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--config", os.path.abspath(config_path)],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+
+async def attach_daemon(config_path: str = "mcp_servers.json") -> Optional[DaemonMCPClient]:
+    """
+    Attach to the daemon serving a config, according to MCP_DAEMON.
+
+    Returns a connected DaemonMCPClient, or None when the servers should be
+    spawned in-process instead.
+    """
+    if DAEMON_MODE == "off" or not hasattr(socket, "AF_UNIX"):
+        return None
+
+    socket_path = daemon_socket(config_path)
+    status = await _daemon_status(socket_path)
+    if not status and DAEMON_MODE == "start":
+        start_daemon(config_path)
+        deadline = time.monotonic() + START_TIMEOUT
+        while not status and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+            status = await _daemon_status(socket_path)
+    if not status:
+        return None
+    if status.get("config") != os.path.abspath(config_path):
+        logger.warning(f"MCP daemon at {socket_path} serves {status.get('config')}, not {config_path}")
+        return None
+
+    client = DaemonMCPClient(socket_path)
+    try:
+        await asyncio.wait_for(client.connect_all(), timeout=START_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Could not attach to MCP daemon at {socket_path}: {e}")
+        return None
+
+    logger.info(f"Attached to MCP daemon at {socket_path} ({len(client.all_tools)} tools)")
+    return client
+
+class MCPDaemon:
+    """Keeps the servers of one config running and serves them over a Unix socket."""
+
+    def __init__(self, config_path: str, socket_path: Optional[str] = None, idle_timeout: float = IDLE_TIMEOUT):
+        self.config_path = os.path.abspath(config_path)
+        self.socket_path = socket_path or daemon_socket(config_path)
+        self.idle_timeout = idle_timeout
+        self.mcp = None
+        self.ready = asyncio.Event()
+        self.stop = asyncio.Event()
+        self.active_calls = 0
+        self.last_used = time.monotonic()
+
+    async def serve(self):
+        """Run until stopped or idle, then shut the servers down."""
+        from utils_fastmcp import FastMultiMCPClient
+
+        if await _daemon_status(self.socket_path):
+            logger.error(f"An MCP daemon is already running at {self.socket_path}")
+            return
+        if os.path.exists(self.socket_path):
+            # Left behind by a daemon that did not exit cleanly
+            os.unlink(self.socket_path)
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop.set)
+
+        self.mcp = FastMultiMCPClient(self.config_path)
+        # Listen before the servers are up so agents can attach and wait for them;
+        # the umask keeps the socket private from the moment it is bound
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=MAX_MESSAGE_BYTES)
+        finally:
+            os.umask(old_umask)
+        logger.info(f"🔥 MCP daemon for {self.config_path} listening on {self.socket_path}")
+
+        try:
+            await self.mcp.connect_all()
+            await self.mcp.wait_for_servers()
+            self.ready.set()
+            logger.info(f"✅ Serving {len(self.mcp.get_all_tools())} tools from {', '.join(self.mcp.get_connected_servers()) or 'no servers'}")
+            await self._wait_until_idle()
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            await self.mcp.disconnect_all()
+            logger.info("MCP daemon stopped")
+
+    async def _wait_until_idle(self):
+        """Return when asked to stop or after idle_timeout seconds without requests."""
+        check_interval = min(self.idle_timeout, 30.0) if self.idle_timeout > 0 else None
+        while not self.stop.is_set():
+            try:
+                await asyncio.wait_for(self.stop.wait(), timeout=check_interval)
+            except asyncio.TimeoutError:
+                idle = time.monotonic() - self.last_used
+                if not self.active_calls and idle >= self.idle_timeout:
+                    logger.info(f"Idle for {idle:.0f}s, shutting down")
+                    return
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer newline-delimited JSON requests on one connection."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self._dispatch(json.loads(line))
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(response, default=str).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.debug(f"Client connection ended: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        self.last_used = time.monotonic()
+
+        if op == "status":
+            return {
+                "ok": True,
+                "config": self.config_path,
+                "ready": self.ready.is_set(),
+                "servers": self.mcp.get_connection_status()
+            }
+        if op == "tools":
+            await self.ready.wait()
+            return {
+                "ok": True,
+                "servers": self.mcp.get_connection_status(),
+                "tools": [asdict(tool) for tool in self.mcp.get_all_tools()]
+            }
+        if op == "call":
+            await self.ready.wait()
+            self.active_calls += 1
+            try:
+                # Per-server concurrency limits are applied by the server clients
+                result = await self.mcp.call_tool(request["tool"], request.get("arguments") or {}, request.get("server"))
+            finally:
+                self.active_calls -= 1
+                self.last_used = time.monotonic()
+            return {"ok": True, "result": result}
+        if op == "shutdown":
+            self.stop.set()
+            return {"ok": True}
+        raise ValueError(f"Unknown request: {op}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep MCP servers warm for agent runs")
+    parser.add_argument("--config", default="mcp_servers.json", help="MCP servers configuration file")
+    parser.add_argument("--socket", help="Unix socket path (default derived from the config path)")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="Seconds without requests before shutting down (0 = never)")
+    parser.add_argument("--status", action="store_true", help="Show the running daemon's servers")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    socket_path = args.socket or daemon_socket(args.config)
+
+    if args.status or args.stop:
+        status = asyncio.run(_daemon_status(socket_path))
+        if not status:
+            print(f"No MCP daemon running at {socket_path}")
+            sys.exit(1)
+        if args.stop:
+            asyncio.run(_request(socket_path, {"op": "shutdown"}))
+            print(f"Stopping MCP daemon at {socket_path}")
+        else:
+            print(f"MCP daemon at {socket_path} serving {status['config']} ({'ready' if status['ready'] else 'starting'})")
+            for server, connected in status["servers"].items():
+                print(f"{server}: {'✅ Connected' if connected else '❌ Disconnected'}")
+        return
+
+    asyncio.run(MCPDaemon(args.config, socket_path, args.idle_timeout).serve())
+
+if __name__ == "__main__":
+    main()
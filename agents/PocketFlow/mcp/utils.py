@@ -2,11 +2,13 @@ from openai import OpenAI
 import os
 import asyncio
 import logging
+import time
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 from mcp_config import MCPConfigManager, MCPServerConfig
+from mcp_daemon import attach_daemon
 
 logger = logging.getLogger(__name__)
 
@@ -133,42 +135,113 @@ class MultiMCPClient:
         self.config_manager = MCPConfigManager(config_path)
         self.clients: Dict[str, MCPServerClient] = {}
         self.all_tools: List[MCPTool] = []
+        # Routing index: "server.tool" and unambiguous bare names -> tool
+        self.tool_index: Dict[str, MCPTool] = {}
+        # Bare tool names offered by several servers -> those servers
+        self.tool_collisions: Dict[str, List[str]] = {}
+        self.connect_tasks: Dict[str, asyncio.Task] = {}
     
-    async def connect_all(self) -> Dict[str, bool]:
-        """Connect to all configured servers. Returns connection status for each."""
-        connection_results = {}
+    async def connect_all(self, required: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Start all configured servers concurrently and wait for them.
         
-        for server_name, config in self.config_manager.get_all_servers().items():
+        Each server gets its own startup timeout ("startupTimeout" in the
+        config, default 30s). If a required subset is given (or servers are
+        marked "required": true in the config), this returns as soon as those
+        servers have finished connecting; the others keep starting in the
+        background and their tools are added when they come up.
+        
+        Returns connection status for each server that finished connecting.
+        """
+        servers = self.config_manager.get_all_servers()
+        for server_name, config in servers.items():
             client = MCPServerClient(config)
             self.clients[server_name] = client
-            
-            # Try to connect with timeout and error handling
-            try:
-                # Add a timeout to prevent hanging on problematic servers
-                connection_results[server_name] = await asyncio.wait_for(
-                    client.connect(), timeout=30.0
-                )
-            except asyncio.TimeoutError:
-                logger.error(f"Timeout connecting to {server_name}")
-                connection_results[server_name] = False
-            except Exception as e:
-                logger.error(f"Unexpected error connecting to {server_name}: {e}")
-                connection_results[server_name] = False
+            self.connect_tasks[server_name] = asyncio.create_task(self._connect_server(client))
         
-        # Aggregate all tools from successfully connected servers
-        self.all_tools = []
-        for client in self.clients.values():
-            if client.is_connected:
-                self.all_tools.extend(client.tools)
+        if required is None:
+            required = [name for name, config in servers.items() if config.required]
+        unknown = [name for name in required if name not in servers]
+        if unknown:
+            logger.warning(f"Required servers not configured: {', '.join(unknown)}")
+        wait_for = [name for name in required if name in servers] or list(servers)
+        
+        # Collect results as servers come up instead of in config order
+        for task in asyncio.as_completed([self.connect_tasks[name] for name in wait_for]):
+            await task
         
+        connection_results = {
+            name: task.result() for name, task in self.connect_tasks.items() if task.done()
+        }
         connected_count = sum(connection_results.values())
-        total_count = len(connection_results)
-        logger.info(f"Connected to {connected_count}/{total_count} servers")
+        pending = len(servers) - len(connection_results)
+        logger.info(
+            f"Connected to {connected_count}/{len(servers)} servers"
+            + (f", {pending} still starting in the background" if pending else "")
+        )
         
         return connection_results
     
+    async def _connect_server(self, client: MCPServerClient) -> bool:
+        """Connect one server within its startup timeout."""
+        server_name = client.config.name
+        started = time.monotonic()
+        try:
+            connected = await asyncio.wait_for(client.connect(), timeout=client.config.startup_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout connecting to {server_name} after {client.config.startup_timeout:g}s")
+            await client._cleanup_failed_connection()
+            connected = False
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to {server_name}: {e}")
+            connected = False
+        
+        if connected:
+            logger.info(f"{server_name} ready in {time.monotonic() - started:.1f}s")
+            self._rebuild_tools()
+        return connected
+    
+    def _rebuild_tools(self):
+        """Aggregate all tools from successfully connected servers and rebuild the routing index."""
+        all_tools = []
+        for client in self.clients.values():
+            if client.is_connected:
+                all_tools.extend(client.tools)
+        
+        index: Dict[str, MCPTool] = {tool.qualified_name: tool for tool in all_tools}
+        by_name: Dict[str, List[MCPTool]] = {}
+        for tool in all_tools:
+            by_name.setdefault(tool.name, []).append(tool)
+        collisions = {}
+        for name, tools in by_name.items():
+            if len(tools) == 1:
+                index.setdefault(name, tools[0])
+            else:
+                collisions[name] = [tool.server_name for tool in tools]
+                if self.tool_collisions.get(name) != collisions[name]:
+                    logger.warning(
+                        f"Tool '{name}' is provided by {', '.join(collisions[name])}; "
+                        f"address it as server.tool"
+                    )
+        
+        # Swap everything in at once so lookups never see a half-built index
+        self.all_tools, self.tool_index, self.tool_collisions = all_tools, index, collisions
+    
+    async def wait_for_servers(self) -> Dict[str, bool]:
+        """Wait until servers still starting in the background have finished."""
+        if self.connect_tasks:
+            await asyncio.gather(*self.connect_tasks.values(), return_exceptions=True)
+        return self.get_connection_status()
+    
     async def disconnect_all(self):
         """Disconnect from all servers."""
+        # Stop servers that are still starting
+        for task in self.connect_tasks.values():
+            task.cancel()
+        if self.connect_tasks:
+            await asyncio.gather(*self.connect_tasks.values(), return_exceptions=True)
+        self.connect_tasks.clear()
+        
         disconnect_tasks = []
         for client in self.clients.values():
             if client.is_connected:
@@ -180,6 +253,8 @@ class MultiMCPClient:
         
         self.clients.clear()
         self.all_tools.clear()
+        self.tool_index = {}
+        self.tool_collisions = {}
     
     def get_all_tools(self) -> List[MCPTool]:
         """Get all tools from all connected servers."""
@@ -190,16 +265,31 @@ class MultiMCPClient:
         client = self.clients.get(server_name)
         return client.tools.copy() if client and client.is_connected else []
     
-    def find_tool(self, tool_name: str) -> Optional[Tuple[MCPTool, str]]:
-        """Find a tool by name. Returns (tool, server_name) or None."""
-        for tool in self.all_tools:
-            if tool.name == tool_name:
-                return tool, tool.server_name
+    def find_tool(self, tool_name: str, server_name: Optional[str] = None) -> Optional[Tuple[MCPTool, str]]:
+        """
+        Find a tool by name. Returns (tool, server_name) or None.
+        
+        Accepts a bare tool name or "server.tool"; a server_name hint picks
+        that server's tool when it has one. Raises ValueError for a bare name
+        that several servers provide.
+        """
+        tool = None
+        if server_name:
+            tool = self.tool_index.get(f"{server_name}.{tool_name}")
+        tool = tool or self.tool_index.get(tool_name)
+        if tool:
+            return tool, tool.server_name
+        if tool_name in self.tool_collisions:
+            servers = self.tool_collisions[tool_name]
+            raise ValueError(
+                f"Tool '{tool_name}' is ambiguous, provided by {', '.join(servers)}; "
+                f"use one of {', '.join(f'{s}.{tool_name}' for s in servers)}"
+            )
         return None
     
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Call a tool by name. Automatically routes to the correct server."""
-        tool_info = self.find_tool(tool_name)
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], server_name: Optional[str] = None) -> Any:
+        """Call a tool by name or "server.tool". Automatically routes to the correct server."""
+        tool_info = self.find_tool(tool_name, server_name)
         if not tool_info:
             raise ValueError(f"Tool '{tool_name}' not found")
         
@@ -209,7 +299,7 @@ class MultiMCPClient:
         if not client or not client.is_connected:
             raise RuntimeError(f"Server '{server_name}' not connected")
         
-        return await client.call_tool(tool_name, arguments)
+        return await client.call_tool(tool.name, arguments)
     
     def get_connected_servers(self) -> List[str]:
         """Get list of successfully connected server names."""
@@ -231,11 +321,24 @@ def call_llm(prompt: str) -> str:
     )
     return r.choices[0].message.content
 
-async def initialize_mcp_clients(config_path: str = "mcp_servers.json") -> MultiMCPClient:
-    """Initialize and connect to all MCP servers."""
+async def initialize_mcp_clients(
+    config_path: str = "mcp_servers.json",
+    required: Optional[List[str]] = None
+) -> MultiMCPClient:
+    """
+    Initialize and connect to all MCP servers (see MultiMCPClient.connect_all).
+    
+    When an MCP daemon serves this config (see mcp_daemon.py), attaches to its
+    warm servers instead and returns a DaemonMCPClient.
+    """
     global _multi_client
+    daemon_client = await attach_daemon(config_path)
+    if daemon_client:
+        _multi_client = daemon_client
+        return daemon_client
+    
     _multi_client = MultiMCPClient(config_path)
-    await _multi_client.connect_all()
+    await _multi_client.connect_all(required)
     return _multi_client
 
 async def get_all_tools() -> List[MCPTool]:
@@ -244,11 +347,11 @@ async def get_all_tools() -> List[MCPTool]:
         raise RuntimeError("MCP clients not initialized. Call initialize_mcp_clients() first.")
     return _multi_client.get_all_tools()
 
-async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
-    """Call an MCP tool by name."""
+async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any], server_name: Optional[str] = None) -> Any:
+    """Call an MCP tool by name or "server.tool"."""
     if not _multi_client:
         raise RuntimeError("MCP clients not initialized. Call initialize_mcp_clients() first.")
-    return await _multi_client.call_tool(tool_name, arguments)
+    return await _multi_client.call_tool(tool_name, arguments, server_name)
 
 async def cleanup_mcp_clients():
     """Cleanup and disconnect all MCP clients."""
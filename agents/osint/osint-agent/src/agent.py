@@ -1,13 +1,31 @@
 import os
 import logging
+from importlib.metadata import version
+from typing import List, Optional
 from agno.agent import Agent
+from agno.tools.function import Function
+from agno.memory.v2.memory import Memory
 from agno.models.openai import OpenAIChat
+from agno.run.response import RunEvent
 
 # Import our custom OSINT tools
 from tools.network_tool import dns_lookup, reverse_dns_lookup, whois_lookup, port_scan_basic, http_headers, geoip_lookup
-from tools.maigret_tool import maigret_search, maigret_parse_url, read_maigret_report
-from tools.file_tool import read_file, write_file, append_to_file, list_files, create_investigation_report
-from tools.shell_tool import shell_execute, install_tool
+from tools.maigret_tool import (
+    maigret_progress, maigret_search, maigret_batch_search, maigret_parse_url, read_maigret_report,
+    maigret_scan_diff, maigret_username_overlap,
+)
+from tools.file_tool import (
+    read_file, search_file, write_file, append_to_file, list_files,
+    create_investigation_report, export_investigation_report,
+)
+from tools.shell_tool import shell_execute, shell_poll, install_tool
+from tools.job_tool import start_job, job_status, job_output, cancel_job
+from tools.evidence_tool import fetch_evidence
+from tools.journal import current_journal, get_journal, close_journal, new_investigation_id
+from tool_hooks import TOOL_HOOKS
+from progress import ProgressReporter
+from memory_policy import MemoryPolicy, Turn
+from playbooks import PLAYBOOKS, PlaybookRunner, format_evidence
 
 OSINT_INVESTIGATOR_PROMPT = """You are an expert OSINT (Open Source Intelligence) investigator with deep knowledge of digital forensics, social media investigations, network reconnaissance, and information gathering techniques.
 
@@ -24,10 +42,32 @@ Your capabilities:
 - File system access and report generation
 - Unlimited shell command execution for advanced tools
 
+Run slow scans (nmap, amass, full Maigret searches) with start_job so several run in parallel, keep investigating, and collect their results with job_status and job_output.
+
+Tool results marked [CACHED RESULT] come from a shared cache and state their age. Re-run the tool with force_refresh=True when fresh data matters.
+
+Large tool outputs are replaced by a [COMPACTED OUTPUT ...] summary with an evidence_id. Use fetch_evidence with a pattern or offset to read the details you need instead of re-running the tool.
+
 Always use available tools to gather evidence. Provide structured, actionable intelligence reports."""
 
+SUMMARY_PROMPT = """You maintain the running memory of an OSINT investigation chat.
+Merge the previous summary with the new conversation turns into one concise summary.
+Keep targets (usernames, domains, IPs, emails), key findings, open leads and user preferences.
+Drop pleasantries and raw tool output. Answer with the summary only, at most 300 words."""
+
+PLAYBOOK_ANALYSIS_PROMPT = """You are an OSINT analyst. You receive the raw results of a fixed set of
+reconnaissance tool calls against one target. Write a structured, actionable intelligence report:
+key findings first, then details per area, then open leads worth a follow-up investigation.
+Base every statement on the evidence provided and say when a lookup failed or returned nothing.
+Results marked [COMPACTED OUTPUT ...] were shortened; mention their evidence_id if details matter."""
+
 logger = logging.getLogger(__name__)
 
+# _run_messages relies on how Agno 1.7 orders `messages`; requirements.txt pins it
+AGNO_VERSION = version("agno")
+if not AGNO_VERSION.startswith("1.7."):
+    logger.warning(f"⚠️ Agno {AGNO_VERSION} is untested; session history may reach the model out of order")
+
 class OSINTAgent:
     def __init__(self, model_provider: str = "openai", model_name: str = "gpt-4"):
         """
@@ -62,53 +102,228 @@ class OSINTAgent:
                 
                 # Maigret tools for social media investigation
                 maigret_search,
+                maigret_batch_search,
                 maigret_parse_url, 
                 read_maigret_report,
+                maigret_scan_diff,
+                maigret_username_overlap,
                 
                 # File operations for reports and data management
                 read_file,
+                search_file,
                 write_file,
                 append_to_file,
                 list_files,
                 create_investigation_report,
+                export_investigation_report,
                 
                 # Shell access for unlimited tool usage
                 shell_execute,
+                shell_poll,
                 install_tool,
+
+                # Background jobs for slow scans
+                start_job,
+                job_status,
+                job_output,
+                cancel_job,
+
+                # Full outputs of compacted tool results
+                fetch_evidence,
             ],
-            memory=True,
+            tool_hooks=TOOL_HOOKS,
             reasoning=True,
             markdown=True,
         )
         
+        # Conversation history is owned by the memory policy: a token-budgeted
+        # window of recent turns plus a rolling summary, passed in on every run
+        self.summarizer = Agent(
+            name="OSINT-Memory-Summarizer",
+            model=model_config,
+            instructions=SUMMARY_PROMPT,
+        )
+        self.memory = MemoryPolicy(summarize=self._summarize_turns)
+        
+        # Playbooks run their tool calls directly and use one LLM call to analyze
+        self.analyst = Agent(
+            name="OSINT-Playbook-Analyst",
+            model=model_config,
+            instructions=PLAYBOOK_ANALYSIS_PROMPT,
+            markdown=True,
+        )
+        self.tools = {tool.name: tool.entrypoint for tool in self.agent.tools if isinstance(tool, Function)}
+        
         logger.info(f"OSINT Agent initialized with {len(self.agent.tools)} tools")
 
-    async def investigate(self, message: str, user_id: str = "irc_user") -> str:
+    async def investigate(
+        self,
+        message: str,
+        user_id: str = "irc_user",
+        progress: Optional[ProgressReporter] = None
+    ) -> str:
         """
         Process an investigation request and return results.
         
         Args:
             message: User's investigation request
             user_id: Unique identifier for the user (for memory/context)
+            progress: Receives tool-call and reasoning events while the run streams
             
         Returns:
             Investigation results and analysis
         """
+        # Every tool result of this run is logged to its own evidence journal
+        journal = get_journal(new_investigation_id(user_id))
+        token = current_journal.set(journal)
+        progress_token = maigret_progress.set(progress.update if progress else None)
+        journal.append("request", session=user_id, message=message)
+        
         try:
             logger.info(f"Processing investigation request from {user_id}: {message}")
             
-            # Use Agno agent to process the request
-            response = await self.agent.arun(
-                message=message,
-                session_id=user_id
-            )
+            # Use Agno agent to process the request with the bounded session history
+            messages = _run_messages(self.memory.build_messages(user_id), message)
+            if progress:
+                content = await self._run_streaming(user_id, messages, progress)
+            else:
+                response = await self.agent.arun(
+                    session_id=user_id,
+                    messages=messages
+                )
+                content = response.content
             
-            return response.content
+            journal.append("response", content=content)
+            await self.memory.record_turn(user_id, message, content or "")
+            self._forget_agno_runs(user_id)
+            return content
             
         except Exception as e:
             error_msg = f"Error during investigation: {str(e)}"
             logger.error(error_msg)
+            journal.append("error", error=str(e))
             return f"I encountered an error while investigating: {str(e)}. Let me try a different approach."
+            
+        finally:
+            maigret_progress.reset(progress_token)
+            current_journal.reset(token)
+            close_journal(journal.investigation_id)
+
+    async def run_playbook(
+        self,
+        name: str,
+        target: str,
+        user_id: str = "irc_user",
+        progress: Optional[ProgressReporter] = None
+    ) -> str:
+        """
+        Run a predefined playbook against a target and analyze the results.
+        
+        Args:
+            name: Playbook name (see playbooks.PLAYBOOKS)
+            target: Domain, IP or username the playbook runs against
+            user_id: Session the analysis is remembered in
+            progress: Receives a start/finish event per tool call
+            
+        Returns:
+            Analysis of the collected evidence
+        """
+        playbook = PLAYBOOKS.get(name)
+        if playbook is None:
+            return f"Unknown playbook '{name}'. Available: {', '.join(PLAYBOOKS)}"
+        if not playbook.validate_target(target):
+            return f"'{target}' is not a valid target for the {name} playbook"
+        
+        request = f"!playbook {name} {target}"
+        journal = get_journal(new_investigation_id(user_id))
+        token = current_journal.set(journal)
+        progress_token = maigret_progress.set(progress.update if progress else None)
+        journal.append("request", session=user_id, message=request, playbook=name)
+        
+        try:
+            logger.info(f"Running playbook {name} for {user_id}: {target}")
+            results = await PlaybookRunner(self.tools, progress).run(playbook, target)
+            if progress:
+                progress.update(f"🧠 analyzing {len(results)} results")
+            response = await self.analyst.arun(
+                message=(
+                    f"Target: {target} ({name} playbook)\nFocus on: {playbook.focus}\n\n"
+                    f"{format_evidence(results)}"
+                ),
+                session_id=user_id
+            )
+            content = response.content
+            
+            journal.append("response", content=content)
+            await self.memory.record_turn(user_id, request, content or "")
+            _forget_agno_runs(self.analyst, user_id)
+            return content
+            
+        except Exception as e:
+            logger.error(f"Error running playbook {name}: {str(e)}")
+            journal.append("error", error=str(e))
+            return f"Playbook {name} failed: {str(e)}"
+            
+        finally:
+            maigret_progress.reset(progress_token)
+            current_journal.reset(token)
+            close_journal(journal.investigation_id)
+
+    async def _run_streaming(
+        self,
+        user_id: str,
+        messages: List[dict],
+        progress: ProgressReporter
+    ) -> str:
+        """Run the agent as a stream, forwarding intermediate steps to progress."""
+        stream = await self.agent.arun(
+            session_id=user_id,
+            messages=messages,
+            stream=True,
+            stream_intermediate_steps=True
+        )
+        parts = []
+        final = None
+        async for event in stream:
+            kind = getattr(event, "event", None)
+            if kind == RunEvent.tool_call_started.value:
+                progress.tool_started(_describe_tool(event.tool))
+            elif kind == RunEvent.tool_call_completed.value:
+                progress.tool_finished(_describe_tool(event.tool))
+            elif kind == RunEvent.reasoning_step.value:
+                title = getattr(event.content, "title", None)
+                if title:
+                    progress.update(f"🧠 {title}")
+            elif kind == RunEvent.run_response_content.value and isinstance(event.content, str):
+                parts.append(event.content)
+            elif kind == RunEvent.run_completed.value and isinstance(event.content, str):
+                final = event.content
+        return final or "".join(parts)
+
+    async def _summarize_turns(self, summary: str, turns: List[Turn]) -> str:
+        """Fold evicted turns into the rolling session summary with the LLM."""
+        transcript = "\n\n".join(f"User: {turn.user}\nAssistant: {turn.assistant}" for turn in turns)
+        response = await self.summarizer.arun(
+            message=f"Previous summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}",
+            session_id="memory-summarizer"
+        )
+        _forget_agno_runs(self.summarizer, "memory-summarizer")
+        return response.content
+
+    def _forget_agno_runs(self, session_id: str):
+        """Drop Agno's own copy of the session's runs; the memory policy keeps what matters."""
+        _forget_agno_runs(self.agent, session_id)
+
+    def close(self):
+        """Persist buffered session memory; call on shutdown."""
+        try:
+            self.memory.flush()
+        except OSError as e:
+            logger.error(f"Could not persist session memory on shutdown: {e}")
+
+    def memory_stats(self, user_id: str) -> dict:
+        """Context size and memory statistics of a session."""
+        return self.memory.stats(user_id)
 
     async def get_capabilities(self) -> str:
         """
@@ -122,6 +337,8 @@ class OSINTAgent:
 
 **Social Media & Username Intelligence:**
 - Comprehensive username searches across 500+ platforms
+- Batch searches of username variants with a consolidated site matrix
+- Scan history: profile changes since the last scan and cross-username overlaps
 - Social media profile discovery and analysis
 - URL parsing for username extraction
 - Profile correlation and timeline analysis
@@ -164,3 +381,28 @@ Just describe what you want to investigate in natural language - I'll automatica
         """
         return [tool.name if hasattr(tool, 'name') else str(tool) for tool in self.agent.tools]
 
+
+def _describe_tool(tool) -> str:
+    """Short 'name(arg=value, ...)' label for a tool call in progress updates."""
+    if tool is None:
+        return "tool"
+    args = ", ".join(f"{k}={str(v)[:30]}" for k, v in (tool.tool_args or {}).items())
+    return f"{tool.tool_name}({args[:80]})"
+
+
+def _run_messages(history: List[dict], message: str) -> List[dict]:
+    """
+    Messages for a run: the session history, then the current question.
+
+    Agno adds `messages` after `message`, so the question goes in as the last
+    of `messages` instead; otherwise the model sees it before the history and
+    answers the previous turn.
+    """
+    return history + [{"role": "user", "content": message}]
+
+
+def _forget_agno_runs(agent: Agent, session_id: str):
+    """Remove a session's runs from an Agno agent's in-process memory so it doesn't grow."""
+    memory = agent.memory
+    if isinstance(memory, Memory) and memory.runs:
+        memory.runs.pop(session_id, None)
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+SQLite job broker for running the bot as an IRC frontend plus worker processes.
+
+With OSINT_ROLE=frontend the IRC process only enqueues investigations here;
+any number of OSINT_ROLE=worker processes lease jobs, run them with their own
+OSINTAgent and publish progress lines and results to an outbox that the
+frontend relays to IRC. A leased job carries a deadline that its worker keeps
+extending while it runs; if a worker crashes the lease expires and the job is
+handed to another worker, up to BROKER_MAX_ATTEMPTS times. Leasing is fair
+between nicks: the next job goes to the nick with the fewest running jobs.
+
+Conversation memory lives in each worker's RAM, so every session
+(``nick!target``) is pinned to the worker that first ran it. Its jobs are
+only leased to that worker while it is alive (seen within
+BROKER_LEASE_SECONDS); a session moves to another worker only when its owner
+is gone.
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from scheduler import SCHED_MAX_QUEUED_PER_USER, SCHED_MAX_RUNNING_PER_USER, InvestigationRequest, SchedulerError
+
+logger = logging.getLogger(__name__)
+
+OSINT_ROLE = os.getenv('OSINT_ROLE', 'standalone').lower()
+BROKER_PATH = os.getenv('BROKER_PATH', '/workspace/broker.sqlite')
+BROKER_LEASE_SECONDS = float(os.getenv('BROKER_LEASE_SECONDS', '60'))
+BROKER_MAX_ATTEMPTS = int(os.getenv('BROKER_MAX_ATTEMPTS', '2'))
+BROKER_POLL_INTERVAL = float(os.getenv('BROKER_POLL_INTERVAL', '0.5'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nick TEXT NOT NULL COLLATE NOCASE,
+    target TEXT NOT NULL,
+    query TEXT NOT NULL,
+    playbook TEXT,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER,
+    target TEXT NOT NULL,
+    nick TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    worker TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_nick ON jobs(nick, state);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class BrokerJob:
+    id: int
+    nick: str
+    target: str
+    query: str
+    playbook: Optional[str]
+    attempts: int
+
+    @property
+    def session_id(self) -> str:
+        return f"{self.nick}!{self.target}"
+
+
+@dataclass
+class OutboxMessage:
+    id: int
+    job_id: Optional[int]
+    target: str
+    nick: str
+    # "progress" or "result"
+    kind: str
+    text: str
+
+
+class JobBroker:
+    """Job queue, leases and outbox in one SQLite database shared by all roles."""
+
+    def __init__(
+        self,
+        path: str = BROKER_PATH,
+        lease_seconds: float = BROKER_LEASE_SECONDS,
+        max_attempts: int = BROKER_MAX_ATTEMPTS
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # WAL mode is stored in the database file, so schema and mode are set up once here
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, nick: str, target: str, query: str, playbook: Optional[str] = None) -> int:
+        """
+        Add an investigation to the queue.
+
+        Returns:
+            Job ID
+
+        Raises:
+            SchedulerError: If the nick already has too many queued jobs
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            queued = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE nick = ? AND state = 'queued'", (nick,)
+            ).fetchone()[0]
+            if queued >= SCHED_MAX_QUEUED_PER_USER:
+                conn.execute("ROLLBACK")
+                raise SchedulerError(f"you already have {queued} queued investigations")
+            cursor = conn.execute(
+                "INSERT INTO jobs (nick, target, query, playbook, state, submitted_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (nick, target, query, playbook, time.time()),
+            )
+            conn.execute("COMMIT")
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def _requeue_expired(self, conn: sqlite3.Connection):
+        # Caller holds the write transaction
+        now = time.time()
+        expired = conn.execute(
+            "SELECT id, nick, target, attempts, worker FROM jobs WHERE state = 'leased' AND lease_until < ?",
+            (now,),
+        ).fetchall()
+        for job_id, nick, target, attempts, worker in expired:
+            if attempts >= self.max_attempts:
+                logger.warning(f"💀 Job #{job_id} lost its worker {worker} {attempts} times, giving up")
+                conn.execute(
+                    "UPDATE jobs SET state = 'failed', finished_at = ?, error = 'worker lost' WHERE id = ?",
+                    (now, job_id),
+                )
+                self._publish(conn, job_id, target, nick, 'result',
+                              f"❌ Investigation #{job_id} failed, its worker stopped responding")
+            else:
+                logger.warning(f"🔁 Lease of job #{job_id} on {worker} expired, requeueing")
+                conn.execute(
+                    "UPDATE jobs SET state = 'queued', worker = NULL, lease_until = NULL WHERE id = ?",
+                    (job_id,),
+                )
+
+    def _seen(self, conn: sqlite3.Connection, worker_id: str, now: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO workers (worker, seen_at) VALUES (?, ?)", (worker_id, now)
+        )
+
+    def lease(self, worker_id: str) -> Optional[BrokerJob]:
+        """
+        Take the next job for a worker, fair between nicks. Jobs of sessions
+        pinned to another live worker are left for that worker.
+
+        Returns:
+            The leased job, or None if nothing is runnable
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            self._seen(conn, worker_id, now)
+            self._requeue_expired(conn)
+            row = conn.execute(
+                """
+                SELECT j.id, j.nick, j.target, j.query, j.playbook, j.attempts, s.worker,
+                       (SELECT COUNT(*) FROM jobs r WHERE r.nick = j.nick AND r.state = 'leased') AS running
+                FROM jobs j
+                LEFT JOIN sessions s ON s.session_id = j.nick || '!' || j.target
+                LEFT JOIN workers w ON w.worker = s.worker
+                WHERE j.state = 'queued'
+                  AND (SELECT COUNT(*) FROM jobs r WHERE r.nick = j.nick AND r.state = 'leased') < ?
+                  AND (s.worker IS NULL OR s.worker = ? OR w.seen_at IS NULL OR w.seen_at < ?)
+                ORDER BY running, j.submitted_at
+                LIMIT 1
+                """,
+                (SCHED_MAX_RUNNING_PER_USER, worker_id, now - self.lease_seconds),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job = BrokerJob(row[0], row[1], row[2], row[3], row[4], row[5] + 1)
+            owner = row[6]
+            if owner != worker_id:
+                if owner:
+                    logger.warning(f"🔀 Session {job.session_id} moves from lost worker {owner} to {worker_id}")
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, worker) VALUES (?, ?)",
+                    (job.session_id, worker_id),
+                )
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, job.id),
+            )
+            conn.execute("COMMIT")
+            return job
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """
+        Extend a lease.
+
+        Returns:
+            False if the job was cancelled or its lease was lost
+        """
+        conn = self._connect()
+        try:
+            now = time.time()
+            self._seen(conn, worker_id, now)
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                (now + self.lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def complete(self, job: BrokerJob, worker_id: str, result: str, state: str = 'done'):
+        """Finish a leased job and publish its result (ignored if the lease was lost)."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, lease_until = NULL, error = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (state, time.time(), result if state == 'failed' else None, job.id, worker_id),
+            )
+            if cursor.rowcount == 1:
+                self._publish(conn, job.id, job.target, job.nick, 'result', result)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def cancel(self, nick: str, job_id: Optional[int] = None) -> List[InvestigationRequest]:
+        """Cancel a nick's queued or running jobs; workers notice on their next heartbeat."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = self._active_jobs(conn, nick, job_id)
+            conn.executemany(
+                "UPDATE jobs SET state = 'cancelled', finished_at = ? WHERE id = ?",
+                [(time.time(), row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+            return [self._request(row) for row in rows]
+        finally:
+            conn.close()
+
+    def status(self, nick: str) -> tuple:
+        """
+        Returns:
+            (jobs of this nick, total running, total queued)
+        """
+        conn = self._connect()
+        try:
+            mine = [self._request(row) for row in self._active_jobs(conn, nick)]
+            counts = dict(conn.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE state IN ('queued', 'leased') GROUP BY state"
+            ).fetchall())
+            return mine, counts.get('leased', 0), counts.get('queued', 0)
+        finally:
+            conn.close()
+
+    def position(self, job_id: int) -> int:
+        """Number of queued jobs ahead of this one (0: next to be leased)."""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND id < ?", (job_id,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def _active_jobs(self, conn: sqlite3.Connection, nick: str, job_id: Optional[int] = None) -> list:
+        query = (
+            "SELECT id, nick, target, query, playbook, submitted_at, started_at, state FROM jobs "
+            "WHERE nick = ? AND state IN ('queued', 'leased')"
+        )
+        params = [nick]
+        if job_id is not None:
+            query += " AND id = ?"
+            params.append(job_id)
+        return conn.execute(query + " ORDER BY id", params).fetchall()
+
+    @staticmethod
+    def _request(row: tuple) -> InvestigationRequest:
+        job_id, nick, target, query, playbook, submitted_at, started_at, state = row
+        return InvestigationRequest(
+            job_id, nick, target, query, playbook,
+            submitted_at=submitted_at,
+            started_at=started_at if state == 'leased' else None,
+        )
+
+    def _publish(self, conn: sqlite3.Connection, job_id: Optional[int], target: str, nick: str, kind: str, text: str):
+        conn.execute(
+            "INSERT INTO outbox (job_id, target, nick, kind, text) VALUES (?, ?, ?, ?, ?)",
+            (job_id, target, nick, kind, text),
+        )
+
+    def publish(self, job: BrokerJob, text: str, kind: str = 'progress'):
+        """Queue a message for the frontend to relay to IRC."""
+        conn = self._connect()
+        try:
+            self._publish(conn, job.id, job.target, job.nick, kind, text)
+        finally:
+            conn.close()
+
+    def take_outbox(self, limit: int = 100) -> List[OutboxMessage]:
+        """Remove and return the oldest outbox messages (frontend only)."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, job_id, target, nick, kind, text FROM outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+            if rows:
+                conn.execute("DELETE FROM outbox WHERE id <= ?", (rows[-1][0],))
+            conn.execute("COMMIT")
+            return [OutboxMessage(*row) for row in rows]
+        finally:
+            conn.close()
+
+
+class BrokerScheduler:
+    """Scheduler interface of the IRC plugin backed by the broker (frontend role)."""
+
+    def __init__(self, broker: JobBroker):
+        self.broker = broker
+
+    def submit(self, nick: str, target: str, query: str, playbook: Optional[str] = None) -> tuple:
+        job_id = self.broker.enqueue(nick, target, query, playbook)
+        request = InvestigationRequest(job_id, nick, target, query, playbook)
+        logger.info(f"📋 Enqueued job #{job_id} for {nick} in the broker")
+        return request, self.broker.position(job_id)
+
+    def cancel(self, nick: str, request_id: Optional[int] = None) -> List[InvestigationRequest]:
+        return self.broker.cancel(nick, request_id)
+
+    def status(self, nick: str) -> tuple:
+        return self.broker.status(nick)
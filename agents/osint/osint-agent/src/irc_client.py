@@ -7,8 +7,9 @@ Fixed version with proper plugin architecture and command handling
 import logging
 import os
 import irc3
-from agent import OSINTAgent
+from broker import OSINT_ROLE
 from osint_plugin import OSINTPlugin
+from startup import AgentLoader, startup
 
 logger = logging.getLogger(__name__)
 
@@ -32,16 +33,11 @@ class OSINTIRCBot:
         logger.info(f"  Channels: {self.channels}")
         logger.info(f"  SSL: {self.ssl}")
         
-        # Initialize OSINT agent
-        try:
-            self.osint_agent = OSINTAgent(
-                model_provider=os.getenv('LLM_PROVIDER', 'openai'),
-                model_name=os.getenv('LLM_MODEL', 'gpt-4')
-            )
-            logger.info("✅ OSINT agent initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize OSINT agent: {e}")
-            raise
+        # The OSINT agent (Agno, LLM client, tool stacks) loads in the background
+        # while the bot connects; the plugin queues investigations until it's ready.
+        # A frontend has no agent of its own: worker processes run investigations
+        self.agent_loader = AgentLoader(self._create_agent) if OSINT_ROLE != 'frontend' else None
+        logger.info(f"  Role: {OSINT_ROLE}")
         
         # IRC bot configuration
         self.config = {
@@ -64,19 +60,35 @@ class OSINTIRCBot:
             # Connection timeout and retry settings
             'timeout': 60,
             'max_lag': 300,
-            # CRITICAL: Pass the OSINT agent to plugins
-            'osint_agent': self.osint_agent,
+            # CRITICAL: Pass the OSINT agent loader to plugins
+            'agent_loader': self.agent_loader,
         }
         
+    def _create_agent(self):
+        """Import and build the OSINT agent (runs on the loader thread)."""
+        with startup.phase("agent import"):
+            from agent import OSINTAgent
+        agent = OSINTAgent(
+            model_provider=os.getenv('LLM_PROVIDER', 'openai'),
+            model_name=os.getenv('LLM_MODEL', 'gpt-4')
+        )
+        logger.info("✅ OSINT agent initialized successfully")
+        return agent
+        
     def run(self):
         """Start the IRC bot."""
         logger.info("🚀 Starting OSINT IRC bot...")
         
         try:
             # Create the IRC bot instance
-            bot = irc3.IrcBot(**self.config)
+            with startup.phase("irc3 setup"):
+                bot = irc3.IrcBot(**self.config)
             logger.info("✅ IRC bot instance created")
             
+            # Load the agent while we connect
+            if self.agent_loader:
+                self.agent_loader.start()
+            
             # Plugin should be loaded via 'includes' config now
             logger.info("🔌 OSINT plugin should be loaded via includes config")
             
@@ -90,6 +102,9 @@ class OSINTIRCBot:
             logger.error(f"💥 Bot error: {e}", exc_info=True)
             raise
         finally:
+            agent = self.agent_loader.agent if self.agent_loader else None
+            if agent:
+                agent.close()
             logger.info("🛑 OSINT IRC bot stopped")
 
 
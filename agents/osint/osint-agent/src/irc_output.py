@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Non-blocking, rate-aware outbound message queue for the IRC bot.
+
+Messages are split into lines that fit the real IRC line limit (512 bytes
+including the ``:nick!user@host PRIVMSG target :`` prefix the server adds and
+the trailing CRLF, measured in UTF-8), queued per target, and sent from a
+single task on irc3's loop behind a token-bucket flood limiter. Short acks
+jump ahead of bulk output, and every bulk result is queued as one block so
+results from different investigations never interleave in a channel. Results
+longer than IRC_PASTE_THRESHOLD lines are written to a file (and URL, if
+IRC_PASTE_URL is set) with only a preview sent to IRC.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+IRC_FLOOD_RATE = float(os.getenv('IRC_FLOOD_RATE', '1.0'))
+IRC_FLOOD_BURST = int(os.getenv('IRC_FLOOD_BURST', '5'))
+IRC_PASTE_THRESHOLD = int(os.getenv('IRC_PASTE_THRESHOLD', '15'))
+IRC_PASTE_PREVIEW = int(os.getenv('IRC_PASTE_PREVIEW', '3'))
+IRC_PASTE_DIR = os.getenv('IRC_PASTE_DIR', '/workspace/paste')
+IRC_PASTE_URL = os.getenv('IRC_PASTE_URL', '')
+
+IRC_LINE_LIMIT = 512
+# Longest user@host the server may prepend when we don't know our own mask yet
+DEFAULT_USERHOST_RESERVE = 10 + 1 + 63
+
+PRIORITY_ACK = 0
+PRIORITY_BULK = 1
+
+
+def split_utf8(text: str, max_bytes: int) -> List[str]:
+    """
+    Split text into pieces of at most max_bytes UTF-8 bytes, preferring to
+    break at whitespace and never splitting a multi-byte character.
+    """
+    pieces = []
+    for line in text.split('\n'):
+        line = line.rstrip('\r')
+        while len(line.encode('utf-8')) > max_bytes:
+            # Longest character prefix that fits
+            cut = len(line.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore'))
+            space = line.rfind(' ', 0, cut)
+            if space > cut // 2:
+                cut = space
+            pieces.append(line[:cut].rstrip())
+            line = line[cut:].lstrip()
+        if line.strip():
+            pieces.append(line)
+    return pieces
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(0.01, rate)
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class IRCOutputQueue:
+    """Prioritized per-target outbound queue drained by one sender task."""
+
+    def __init__(self, bot, rate: float = IRC_FLOOD_RATE, burst: int = IRC_FLOOD_BURST):
+        self.bot = bot
+        self.bucket = TokenBucket(rate, burst)
+        self.own_mask: Optional[str] = None
+        self._queues: Dict[int, "OrderedDict[str, Deque[str]]"] = {
+            PRIORITY_ACK: OrderedDict(),
+            PRIORITY_BULK: OrderedDict(),
+        }
+        self._wakeup: Optional[asyncio.Event] = None
+        self._sender: Optional[asyncio.Task] = None
+
+    def set_own_mask(self, mask: str):
+        """Remember our nick!user@host (seen on our own JOIN) for exact line budgets."""
+        self.own_mask = str(mask)
+
+    def max_text_bytes(self, target: str) -> int:
+        """Bytes available for message text to a target after prefix and CRLF."""
+        prefix = self.own_mask or f"{self.bot.nick}!{'x' * DEFAULT_USERHOST_RESERVE}"
+        overhead = len(f":{prefix} PRIVMSG {target} :".encode('utf-8')) + 2
+        return IRC_LINE_LIMIT - overhead
+
+    def send(self, target: str, text: str, priority: int = PRIORITY_ACK):
+        """Queue a message for a target. Safe to call from any thread."""
+        lines = split_utf8(text, self.max_text_bytes(target))
+        if lines:
+            self._submit(target, lines, priority)
+
+    def send_result(self, target: str, nick: str, result: str):
+        """Queue a (possibly long) investigation result as one bulk block."""
+        lines = split_utf8(f"{nick}: {result}", self.max_text_bytes(target))
+        if len(lines) > IRC_PASTE_THRESHOLD:
+            try:
+                location = self._paste(nick, result)
+                preview = lines[:IRC_PASTE_PREVIEW]
+                preview.append(
+                    f"{nick}: ... {len(lines) - len(preview)} more lines, full result: {location}"
+                )
+                lines = preview
+            except OSError as e:
+                logger.error(f"Could not write paste file, sending full result: {e}")
+        self._submit(target, lines, PRIORITY_BULK)
+
+    def _submit(self, target: str, lines: List[str], priority: int):
+        try:
+            in_bot_loop = asyncio.get_running_loop() is self.bot.loop
+        except RuntimeError:
+            in_bot_loop = False
+        if in_bot_loop:
+            self._enqueue(target, lines, priority)
+        else:
+            self.bot.loop.call_soon_threadsafe(self._enqueue, target, lines, priority)
+
+    def _paste(self, nick: str, result: str) -> str:
+        os.makedirs(IRC_PASTE_DIR, exist_ok=True)
+        safe_nick = re.sub(r'[^A-Za-z0-9_-]', '_', nick)
+        filename = f"{safe_nick}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.txt"
+        path = os.path.join(IRC_PASTE_DIR, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(result)
+        logger.info(f"📄 Long result for {nick} written to {path}")
+        return f"{IRC_PASTE_URL.rstrip('/')}/{filename}" if IRC_PASTE_URL else path
+
+    def _enqueue(self, target: str, lines: List[str], priority: int):
+        # Runs on the bot loop; a block is appended at once so it stays contiguous
+        self._queues[priority].setdefault(target, deque()).extend(lines)
+        if self._sender is None or self._sender.done():
+            self._wakeup = asyncio.Event()
+            self._sender = asyncio.ensure_future(self._drain())
+        self._wakeup.set()
+
+    def _next_line(self) -> Optional[tuple]:
+        for priority in (PRIORITY_ACK, PRIORITY_BULK):
+            queues = self._queues[priority]
+            while queues:
+                # Round-robin between targets: take from the first, rotate it to the back
+                target, lines = next(iter(queues.items()))
+                if not lines:
+                    del queues[target]
+                    continue
+                line = lines.popleft()
+                queues.move_to_end(target)
+                if not lines:
+                    del queues[target]
+                return target, line
+        return None
+
+    async def _drain(self):
+        while True:
+            item = self._next_line()
+            if item is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self.bucket.acquire()
+            target, line = item
+            try:
+                self.bot.privmsg(target, line)
+            except Exception as e:
+                logger.error(f"Failed to send to {target}: {e}")
+
@@ -6,12 +6,16 @@ An autonomous OSINT investigation agent that connects to IRC and conducts
 intelligent investigations through natural conversation using the Agno framework.
 """
 
-import asyncio
 import logging
 import os
+import signal
 import sys
-from dotenv import load_dotenv
-from irc_client import OSINTIRCBot
+from startup import startup
+
+with startup.phase("imports"):
+    from dotenv import load_dotenv
+    from broker import OSINT_ROLE
+    from irc_client import OSINTIRCBot
 
 # Configure logging
 logging.basicConfig(
@@ -69,14 +73,26 @@ def setup_environment():
 def main():
     """Main application entry point."""
     
+    # Treat SIGTERM (docker stop) like Ctrl+C so shutdown paths persist session memory
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    
     try:
         logger.info("Starting OSINT IRC Agent...")
         
         # Setup environment and configuration
-        config = setup_environment()
+        with startup.phase("environment"):
+            config = setup_environment()
+        
+        # Worker processes don't connect to IRC; they run investigations from the broker
+        if OSINT_ROLE == 'worker':
+            from worker import run_worker
+            logger.info("Starting as investigation worker")
+            run_worker()
+            return
         
         # Create and start the IRC bot
-        bot = OSINTIRCBot()
+        with startup.phase("bot config"):
+            bot = OSINTIRCBot()
         
         logger.info(f"Connecting to IRC server: {config['IRC_SERVER']}")
         logger.info(f"Joining channels: {config['IRC_CHANNELS']}")
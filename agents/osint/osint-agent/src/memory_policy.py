@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Bounded conversation memory for OSINT sessions.
+
+Each session (``nick!target``) keeps a sliding window of recent turns that
+fits a token budget. Turns that fall out of the window are folded into a
+rolling summary, so long-lived channels keep their context without sending
+an ever-growing history with every request. Sessions idle for longer than
+MEMORY_IDLE_SECONDS are written to disk and dropped from RAM; they are
+reloaded transparently on the next request.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MEMORY_TOKEN_BUDGET = int(os.getenv('MEMORY_TOKEN_BUDGET', '3000'))
+MEMORY_SUMMARY_MAX_TOKENS = int(os.getenv('MEMORY_SUMMARY_MAX_TOKENS', '600'))
+MEMORY_TURN_MAX_TOKENS = int(os.getenv('MEMORY_TURN_MAX_TOKENS', '800'))
+MEMORY_IDLE_SECONDS = int(os.getenv('MEMORY_IDLE_SECONDS', '3600'))
+MEMORY_DIR = os.getenv('MEMORY_DIR', '/workspace/memory')
+
+# (previous summary, turns being evicted) -> new summary
+Summarizer = Callable[[str, List["Turn"]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, marking the cut."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + " [...]"
+
+
+@dataclass
+class Turn:
+    user: str
+    assistant: str
+    at: float = field(default_factory=time.time)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.user) + estimate_tokens(self.assistant)
+
+
+@dataclass
+class SessionMemory:
+    session_id: str
+    summary: str = ""
+    turns: List[Turn] = field(default_factory=list)
+    last_active: float = field(default_factory=time.time)
+    total_turns: int = 0
+    summarized_turns: int = 0
+    summaries: int = 0
+
+    @property
+    def context_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(turn.tokens for turn in self.turns)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SessionMemory":
+        data = dict(data)
+        data["turns"] = [Turn(**turn) for turn in data.get("turns", [])]
+        return cls(**data)
+
+
+def extractive_summary(summary: str, turns: List[Turn]) -> str:
+    """Fallback summary without an LLM: keep the first line of each evicted turn."""
+    lines = [summary] if summary else []
+    for turn in turns:
+        answer = turn.assistant.strip().split('\n', 1)[0]
+        lines.append(f"- Asked: {turn.user[:150]} -> {answer[:200]}")
+    return truncate_tokens('\n'.join(lines), MEMORY_SUMMARY_MAX_TOKENS)
+
+
+class MemoryPolicy:
+    """Token-budgeted sliding window + rolling summary + idle eviction."""
+
+    def __init__(
+        self,
+        summarize: Optional[Summarizer] = None,
+        token_budget: int = MEMORY_TOKEN_BUDGET,
+        idle_seconds: int = MEMORY_IDLE_SECONDS,
+        directory: str = MEMORY_DIR
+    ):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.idle_seconds = idle_seconds
+        self.directory = directory
+        self._sessions: Dict[str, SessionMemory] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_-]', '_', session_id) + ".json")
+
+    def _load(self, session_id: str) -> SessionMemory:
+        path = self._path(session_id)
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    session = SessionMemory.from_dict(json.load(f))
+                logger.info(f"Restored memory of session {session_id} from disk")
+                return session
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable memory file {path}: {e}")
+        return SessionMemory(session_id)
+
+    def _save(self, session: SessionMemory):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(session.session_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def session(self, session_id: str) -> SessionMemory:
+        """Get a session's memory, reloading it from disk if it was evicted."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._load(session_id)
+                self._sessions[session_id] = session
+            session.last_active = time.time()
+        self.evict_idle()
+        return session
+
+    def build_messages(self, session_id: str) -> List[dict]:
+        """History messages for the next run: rolling summary, then recent turns."""
+        session = self.session(session_id)
+        messages = []
+        if session.summary:
+            messages.append({
+                "role": "user",
+                "content": f"Summary of our earlier conversation:\n{session.summary}",
+            })
+            messages.append({"role": "assistant", "content": "Understood, I'll keep that context in mind."})
+        for turn in session.turns:
+            messages.append({"role": "user", "content": turn.user})
+            messages.append({"role": "assistant", "content": turn.assistant})
+        return messages
+
+    async def record_turn(self, session_id: str, user: str, assistant: str):
+        """Add a finished turn and fold turns beyond the token budget into the summary."""
+        session = self.session(session_id)
+        session.turns.append(Turn(
+            truncate_tokens(user, MEMORY_TURN_MAX_TOKENS),
+            truncate_tokens(assistant, MEMORY_TURN_MAX_TOKENS),
+        ))
+        session.total_turns += 1
+
+        evicted = []
+        while len(session.turns) > 1 and session.context_tokens > self.token_budget:
+            evicted.append(session.turns.pop(0))
+        if not evicted:
+            return
+
+        summary = None
+        if self.summarize:
+            try:
+                summary = await self.summarize(session.summary, evicted)
+            except Exception as e:
+                logger.warning(f"Summarizing session {session_id} failed, using extractive summary: {e}")
+        session.summary = truncate_tokens(
+            summary or extractive_summary(session.summary, evicted), MEMORY_SUMMARY_MAX_TOKENS
+        )
+        session.summarized_turns += len(evicted)
+        session.summaries += 1
+        logger.info(f"Folded {len(evicted)} turns of session {session_id} into its summary")
+
+    def evict_idle(self) -> int:
+        """Write sessions idle for longer than idle_seconds to disk and drop them from RAM."""
+        now = time.time()
+        with self._lock:
+            idle = [
+                session for session in self._sessions.values()
+                if now - session.last_active > self.idle_seconds
+            ]
+            for session in idle:
+                del self._sessions[session.session_id]
+        for session in idle:
+            try:
+                self._save(session)
+            except OSError as e:
+                logger.error(f"Could not persist memory of session {session.session_id}: {e}")
+        return len(idle)
+
+    def flush(self):
+        """Persist every in-memory session (e.g. on shutdown)."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            self._save(session)
+
+    def stats(self, session_id: str) -> dict:
+        """Per-session statistics: context tokens, window size and summary state."""
+        session = self.session(session_id)
+        return {
+            "context_tokens": session.context_tokens,
+            "token_budget": self.token_budget,
+            "window_turns": len(session.turns),
+            "total_turns": session.total_turns,
+            "summarized_turns": session.summarized_turns,
+            "summary_tokens": estimate_tokens(session.summary),
+            "memory_bytes": len(json.dumps(session.to_dict())),
+            "sessions_in_ram": len(self._sessions),
+        }
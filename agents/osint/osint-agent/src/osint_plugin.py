@@ -5,11 +5,19 @@ OSINT IRC Plugin - Separate module to avoid import issues
 
 import asyncio
 import logging
-import threading
-import time
 import irc3
-from typing import Optional
-from agent import OSINTAgent
+from typing import TYPE_CHECKING, Optional
+from broker import BROKER_POLL_INTERVAL, OSINT_ROLE, BrokerScheduler, JobBroker
+from irc_output import PRIORITY_BULK, IRCOutputQueue
+from playbooks import PLAYBOOKS
+from progress import ProgressReporter
+from scheduler import InvestigationRequest, InvestigationScheduler, SchedulerError
+from startup import AgentLoader, startup
+from worker_loop import get_worker_loop
+
+if TYPE_CHECKING:
+    # Only for annotations: the agent stack is imported by the loader thread
+    from agent import OSINTAgent
 
 logger = logging.getLogger(__name__)
 
@@ -21,30 +29,60 @@ class OSINTPlugin:
         try:
             logger.info("🔧 OSINTPlugin __init__ called!")
             self.bot = bot
-            self.osint_agent: Optional[OSINTAgent] = bot.config.get('osint_agent')
-            logger.info(f"🔧 OSINTPlugin initialized - Agent available: {bool(self.osint_agent)}")
+            self.agent_loader: Optional[AgentLoader] = bot.config.get('agent_loader')
+            self.output = IRCOutputQueue(bot)
+            self.broker: Optional[JobBroker] = None
+            self._relay: Optional[asyncio.Task] = None
+            if OSINT_ROLE == 'frontend':
+                # Investigations run in worker processes; we only enqueue and relay
+                self.broker = JobBroker()
+                self.scheduler = BrokerScheduler(self.broker)
+                logger.info(f"🔧 OSINTPlugin initialized as frontend of broker {self.broker.path}")
+            else:
+                self.worker = get_worker_loop()
+                self.scheduler = InvestigationScheduler(self.worker, self._run_scheduled)
+                logger.info(f"🔧 OSINTPlugin initialized - Agent loader available: {bool(self.agent_loader)}")
             
-            if not self.osint_agent:
-                logger.error("❌ OSINT agent not found in bot config!")
+            if self.broker:
+                logger.info("✅ OSINTPlugin successfully initialized, workers run the agent")
+            elif not self.agent_loader:
+                logger.error("❌ OSINT agent loader not found in bot config!")
             else:
-                logger.info("✅ OSINTPlugin successfully initialized with agent")
+                logger.info("✅ OSINTPlugin successfully initialized, agent loads in the background")
                 
         except Exception as e:
             logger.error(f"💥 OSINTPlugin initialization failed: {e}", exc_info=True)
             raise
         
+    @property
+    def osint_agent(self) -> Optional["OSINTAgent"]:
+        """The OSINT agent once it finished loading, else None."""
+        return self.agent_loader.agent if self.agent_loader else None
+        
+    @property
+    def agent_unavailable(self) -> bool:
+        """True if the agent is missing or failed to load (not merely still loading)."""
+        if self.broker:
+            return False
+        return not self.agent_loader or self.agent_loader.failed
+        
     @irc3.event(irc3.rfc.CONNECTED)
     def on_connected(self, **kwargs):
         """Called when bot connects to IRC server."""
         logger.info("🔗 Successfully connected to IRC server")
+        startup.milestone("connected")
+        if self.broker and (self._relay is None or self._relay.done()):
+            self._relay = asyncio.ensure_future(self._relay_outbox())
         
     @irc3.event(irc3.rfc.JOIN)
     def on_join(self, mask, channel, **kwargs):
         """Called when bot joins a channel."""
         if mask.nick == self.bot.nick:
             logger.info(f"✅ Joined channel: {channel}")
+            self.output.set_own_mask(mask)
+            startup.milestone("joined")
             # Send a greeting to confirm the bot is working
-            self.bot.privmsg(channel, f"🤖 {self.bot.nick} is online and ready for OSINT investigations!")
+            self.output.send(channel, f"🤖 {self.bot.nick} is online and ready for OSINT investigations!")
             
     @irc3.event(irc3.rfc.PRIVMSG)
     def on_privmsg(self, mask, target, data, **kwargs):
@@ -66,6 +104,20 @@ class OSINTPlugin:
                 self._handle_help_command(nick, target)
                 return
                 
+            # Handle !status and !cancel commands
+            if message == '!status':
+                self._handle_status_command(nick, target)
+                return
+                
+            if message == '!cancel' or message.startswith('!cancel '):
+                self._handle_cancel_command(nick, target, message[7:].strip())
+                return
+                
+            # Handle !playbook command
+            if message == '!playbook' or message.startswith('!playbook '):
+                self._handle_playbook_command(nick, target, message[9:].strip())
+                return
+                
             # Handle !investigate command  
             if message.startswith('!investigate '):
                 investigation_query = message[13:].strip()  # Remove "!investigate "
@@ -85,49 +137,104 @@ class OSINTPlugin:
         except Exception as e:
             error_msg = f"❌ Error processing message: {str(e)}"
             logger.error(error_msg, exc_info=True)
-            self.bot.privmsg(target, f"{nick}: {error_msg}")
+            self.output.send(target, f"{nick}: {error_msg}")
     
     def _handle_help_command(self, nick: str, target: str):
         """Handle !help command."""
         logger.info(f"🔧 Processing !help command from {nick}")
         
-        if not self.osint_agent:
-            self.bot.privmsg(target, f"❌ {nick}: OSINT agent not initialized")
+        if self.agent_unavailable:
+            self.output.send(target, f"❌ {nick}: OSINT agent not initialized")
             return
             
         help_text = f"""✅ {nick}: OSINT Agent is active! Available commands:
 • !help - Show this help message
 • !investigate <query> - Start an OSINT investigation
+• !playbook <name> <target> - Run a predefined investigation ({', '.join(PLAYBOOKS)}); !playbook lists them
+• !status - Show your running and queued investigations
+• !cancel [id] - Cancel one of your investigations (or all of them)
 • @{self.bot.nick} <query> - Mention me with your investigation request
 • Private message me directly for confidential investigations
 
 Example: !investigate username darkweb_trader"""
+        if not self.osint_agent and not self.broker:
+            help_text += "\n⏳ The AI agent is still loading; requests are queued until it is ready"
 
-        self.bot.privmsg(target, help_text)
+        self.output.send(target, help_text, priority=PRIORITY_BULK)
         logger.info("✅ Help response sent successfully")
         
+    def _handle_status_command(self, nick: str, target: str):
+        """Handle !status command."""
+        mine, running, queued = self.scheduler.status(nick)
+        summary = f"📊 {nick}: {running} running, {queued} queued overall"
+        if self.osint_agent:
+            stats = self.osint_agent.memory_stats(f"{nick}!{target}")
+            summary += (
+                f", session memory {stats['context_tokens']}/{stats['token_budget']} tokens"
+                f" ({stats['window_turns']} recent turns, {stats['summarized_turns']} summarized)"
+            )
+        if not mine:
+            self.output.send(target, f"{summary}. You have no investigations.")
+            return
+        self.output.send(target, f"{summary}. Yours: " + " | ".join(r.describe() for r in mine))
+        
+    def _handle_cancel_command(self, nick: str, target: str, argument: str):
+        """Handle !cancel [id] command."""
+        request_id = None
+        if argument:
+            try:
+                request_id = int(argument.lstrip('#'))
+            except ValueError:
+                self.output.send(target, f"❌ {nick}: Usage: !cancel [id]")
+                return
+        cancelled = self.scheduler.cancel(nick, request_id)
+        if not cancelled:
+            self.output.send(target, f"❌ {nick}: No matching investigation to cancel")
+            return
+        self.output.send(target, f"🛑 {nick}: Cancelled " + ", ".join(f"#{r.id}" for r in cancelled))
+        
     def _handle_investigate_command(self, nick: str, target: str, query: str):
         """Handle !investigate command."""
         logger.info(f"🔍 Processing !investigate command from {nick}: '{query}'")
         
-        if not self.osint_agent:
-            self.bot.privmsg(target, f"❌ {nick}: OSINT agent not initialized")
+        if self.agent_unavailable:
+            self.output.send(target, f"❌ {nick}: OSINT agent not initialized")
             return
             
         if not query:
-            self.bot.privmsg(target, f"❌ {nick}: Please provide something to investigate. Example: !investigate username darkweb_trader")
+            self.output.send(target, f"❌ {nick}: Please provide something to investigate. Example: !investigate username darkweb_trader")
             return
             
         # Acknowledge the request immediately
-        self.bot.privmsg(target, f"🔍 {nick}: Starting OSINT investigation: '{query}'")
+        self.output.send(target, f"🔍 {nick}: Starting OSINT investigation: '{query}'")
+        self._start_investigation(nick, target, query)
         
-        # Start investigation in background thread
-        investigation_thread = threading.Thread(
-            target=self._run_investigation_thread,
-            args=(nick, target, query),
-            daemon=True
-        )
-        investigation_thread.start()
+    def _handle_playbook_command(self, nick: str, target: str, argument: str):
+        """Handle !playbook [<name> <target>] command."""
+        logger.info(f"📒 Processing !playbook command from {nick}: '{argument}'")
+        
+        if self.agent_unavailable:
+            self.output.send(target, f"❌ {nick}: OSINT agent not initialized")
+            return
+            
+        parts = argument.split()
+        if len(parts) != 2:
+            lines = [f"📒 {nick}: Usage: !playbook <name> <target>. Available playbooks:"]
+            lines += [f"• {p.name} - {p.description}" for p in PLAYBOOKS.values()]
+            self.output.send(target, "\n".join(lines), priority=PRIORITY_BULK)
+            return
+            
+        name, playbook_target = parts[0].lower(), parts[1]
+        playbook = PLAYBOOKS.get(name)
+        if playbook is None:
+            self.output.send(target, f"❌ {nick}: Unknown playbook '{name}'. Available: {', '.join(PLAYBOOKS)}")
+            return
+        if not playbook.validate_target(playbook_target):
+            self.output.send(target, f"❌ {nick}: '{playbook_target}' is not a valid target for the {name} playbook")
+            return
+            
+        self.output.send(target, f"📒 {nick}: Running {name} playbook on '{playbook_target}'")
+        self._start_investigation(nick, target, playbook_target, playbook=name)
         
     def _handle_mention(self, nick: str, target: str, message: str):
         """Handle mentions of the bot in channels."""
@@ -142,41 +249,68 @@ Example: !investigate username darkweb_trader"""
             logger.info(f"🔍 Bot mentioned by {nick}: '{query}'")
             
             if query:
-                self.bot.privmsg(target, f"🔍 {nick}: Investigating '{query}'")
-                investigation_thread = threading.Thread(
-                    target=self._run_investigation_thread,
-                    args=(nick, target, query),
-                    daemon=True
-                )
-                investigation_thread.start()
+                self.output.send(target, f"🔍 {nick}: Investigating '{query}'")
+                self._start_investigation(nick, target, query)
                 
     def _handle_private_investigation(self, nick: str, message: str):
         """Handle private message investigations."""
         logger.info(f"🔒 Private investigation request from {nick}: '{message}'")
         
-        if not self.osint_agent:
-            self.bot.privmsg(nick, "❌ OSINT agent not initialized")
+        if self.agent_unavailable:
+            self.output.send(nick, "❌ OSINT agent not initialized")
             return
             
-        self.bot.privmsg(nick, f"🔍 Investigating privately: '{message}'")
-        investigation_thread = threading.Thread(
-            target=self._run_investigation_thread,
-            args=(nick, nick, message),
-            daemon=True
-        )
-        investigation_thread.start()
+        self.output.send(nick, f"🔍 Investigating privately: '{message}'")
+        self._start_investigation(nick, nick, message)
+        
+    def _start_investigation(self, nick: str, target: str, query: str, playbook: Optional[str] = None):
+        """Queue an investigation with the fair-share scheduler."""
+        try:
+            request, position = self.scheduler.submit(nick, target, query, playbook)
+        except SchedulerError as e:
+            self.output.send(target, f"⏳ {nick}: Request rejected, {e}. Use !status or !cancel.")
+            return
+        if position:
+            self.output.send(target, f"⏳ {nick}: Investigation #{request.id} queued (position {position})")
         
-    def _run_investigation_thread(self, nick: str, target: str, query: str):
-        """Thread wrapper for running async investigation."""
+    async def _run_scheduled(self, request: InvestigationRequest):
+        """Scheduler entry point, runs on the worker loop."""
         try:
-            # Run the async investigation in this thread
-            result = asyncio.run(self._run_investigation(nick, target, query))
+            # Requests made while the agent is still loading wait for it here
+            await self.agent_loader.wait()
+            await self._run_investigation(request.nick, request.target, request.query, request.playbook)
+        except asyncio.CancelledError:
+            logger.info(f"🛑 Investigation #{request.id} for {request.nick} cancelled")
+            raise
         except Exception as e:
-            logger.error(f"❌ Investigation thread error: {e}", exc_info=True)
-            self.bot.privmsg(target, f"❌ {nick}: Investigation failed due to system error")
+            logger.error(f"❌ Investigation task error: {e}", exc_info=True)
+            self._reply(request.target, f"❌ {request.nick}: Investigation failed due to system error")
+            
+    async def _relay_outbox(self):
+        """Frontend role: post progress and results published by the workers."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                messages = await loop.run_in_executor(None, self.broker.take_outbox)
+            except Exception as e:
+                logger.error(f"❌ Reading the broker outbox failed: {e}")
+                messages = []
+            for message in messages:
+                if message.kind == 'result':
+                    self._send_investigation_result(message.target, message.nick, message.text)
+                else:
+                    self.output.send(message.target, message.text)
+            if not messages:
+                await asyncio.sleep(BROKER_POLL_INTERVAL)
+            
+    def _reply(self, target: str, message: str):
+        """Queue a message from any thread; the output queue sends it on the IRC loop."""
+        self.output.send(target, message)
         
-    async def _run_investigation(self, nick: str, target: str, query: str):
-        """Run OSINT investigation asynchronously."""
+    async def _run_investigation(self, nick: str, target: str, query: str, playbook: Optional[str] = None):
+        """Run OSINT investigation (or playbook) asynchronously."""
+        # Throttled tool/reasoning updates while the agent works
+        progress = ProgressReporter(lambda text: self._reply(target, text), nick)
         try:
             logger.info(f"🚀 Starting investigation for {nick}: {query}")
             
@@ -184,9 +318,13 @@ Example: !investigate username darkweb_trader"""
             user_id = f"{nick}!{target}"
             
             # Run the investigation
-            result = await self.osint_agent.investigate(query, user_id)
+            progress.start()
+            if playbook:
+                result = await self.osint_agent.run_playbook(playbook, query, user_id, progress=progress)
+            else:
+                result = await self.osint_agent.investigate(query, user_id, progress=progress)
             
-            # Send result back synchronously (threading safe)
+            # Queue the result for rate-limited delivery on the IRC loop
             self._send_investigation_result(target, nick, result)
             
             logger.info(f"✅ Investigation completed for {nick}")
@@ -194,25 +332,11 @@ Example: !investigate username darkweb_trader"""
         except Exception as e:
             error_msg = f"Investigation failed: {str(e)}"
             logger.error(f"❌ {error_msg}", exc_info=True)
-            self.bot.privmsg(target, f"❌ {nick}: {error_msg}")
+            self._reply(target, f"❌ {nick}: {error_msg}")
+            
+        finally:
+            progress.stop()
             
     def _send_investigation_result(self, target: str, nick: str, result: str):
-        """Send investigation result synchronously."""
-        full_message = f"{nick}: {result}"
-        
-        # Split long messages to avoid IRC limits
-        max_length = 400
-        lines = full_message.split('\n')
-        current_msg = ""
-        
-        for line in lines:
-            if len(current_msg + line + '\n') > max_length:
-                if current_msg:
-                    self.bot.privmsg(target, current_msg.strip())
-                    time.sleep(1.0)  # Rate limiting
-                current_msg = line
-            else:
-                current_msg += line + '\n' if current_msg else line
-                
-        if current_msg:
-            self.bot.privmsg(target, current_msg.strip())
\ No newline at end of file
+        """Queue the investigation result as one bulk block (long results go to a paste file)."""
+        self.output.send_result(target, nick, result)
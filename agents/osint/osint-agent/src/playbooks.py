@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Declarative investigation playbooks.
+
+Routine requests ("investigate domain X") always need the same tool calls, so
+instead of letting the model plan them one LLM round trip at a time, a
+playbook lists them as a DAG of steps. PlaybookRunner starts every step as
+soon as the steps it depends on have finished, so independent lookups run in
+parallel, and the collected evidence is analyzed with a single LLM call at
+the end. Tool calls go through the same hooks as agent tool calls (journal,
+compaction, concurrency limits).
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from progress import ProgressReporter
+from tool_hooks import call_with_hooks
+
+logger = logging.getLogger(__name__)
+
+IPV4_PATTERN = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+
+# Values a step can fan out over, extracted from an earlier step's output
+EXTRACTORS: Dict[str, Callable[[str], List[str]]] = {
+    "ipv4": lambda text: list(dict.fromkeys(IPV4_PATTERN.findall(text))),
+}
+
+
+@dataclass
+class Step:
+    """One tool call of a playbook; string args may use {target} and {item}."""
+
+    id: str
+    tool: str
+    args: Dict[str, Any]
+    after: List[str] = field(default_factory=list)
+    # (step id, extractor name): run once per extracted value, as {item}
+    foreach: Optional[tuple] = None
+    max_items: int = 5
+
+
+@dataclass
+class Playbook:
+    name: str
+    description: str
+    target_pattern: str
+    steps: List[Step]
+    focus: str
+
+    def validate_target(self, target: str) -> bool:
+        return re.fullmatch(self.target_pattern, target) is not None
+
+
+@dataclass
+class StepResult:
+    step: Step
+    call: str
+    output: str
+    duration: float
+
+
+def _dns(record_type: str) -> Step:
+    return Step(f"dns_{record_type.lower()}", "dns_lookup", {"domain": "{target}", "record_type": record_type})
+
+
+PLAYBOOKS: Dict[str, Playbook] = {
+    playbook.name: playbook for playbook in (
+        Playbook(
+            name="domain",
+            description="DNS (all record types), WHOIS, HTTP headers, then GeoIP, reverse DNS and ports of the A records",
+            target_pattern=r"(?i)[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?)+",
+            steps=[
+                _dns("A"), _dns("AAAA"), _dns("MX"), _dns("TXT"), _dns("NS"), _dns("SOA"),
+                Step("whois", "whois_lookup", {"domain": "{target}"}),
+                Step("headers", "http_headers", {"url": "{target}"}),
+                Step("geoip", "geoip_lookup", {"ip_address": "{item}"}, ["dns_a"], ("dns_a", "ipv4")),
+                Step("rdns", "reverse_dns_lookup", {"ip_address": "{item}"}, ["dns_a"], ("dns_a", "ipv4")),
+                Step("ports", "port_scan_basic", {"host": "{item}"}, ["dns_a"], ("dns_a", "ipv4"), max_items=2),
+            ],
+            focus="hosting and ownership, mail and DNS setup, exposed services and anything suspicious",
+        ),
+        Playbook(
+            name="ip",
+            description="Reverse DNS, GeoIP, WHOIS, HTTP headers and a port scan of an IPv4 address",
+            target_pattern=r"(?:\d{1,3}\.){3}\d{1,3}",
+            steps=[
+                Step("rdns", "reverse_dns_lookup", {"ip_address": "{target}"}),
+                Step("geoip", "geoip_lookup", {"ip_address": "{target}"}),
+                Step("whois", "whois_lookup", {"domain": "{target}"}),
+                Step("headers", "http_headers", {"url": "{target}"}),
+                Step("ports", "port_scan_basic", {"host": "{target}"}),
+            ],
+            focus="who operates the address, where it is hosted and which services it exposes",
+        ),
+        Playbook(
+            name="username",
+            description="Maigret search across the top sites, then changes since the previous scan",
+            target_pattern=r"[A-Za-z0-9_.-]{2,64}",
+            steps=[
+                Step("maigret", "maigret_search", {"username": "{target}"}),
+                Step("diff", "maigret_scan_diff", {"username": "{target}"}, ["maigret"]),
+            ],
+            focus="confirmed profiles, likely identity links between them and notable changes",
+        ),
+    )
+}
+
+
+def _render(value: Any, target: str, item: Optional[str]) -> Any:
+    if isinstance(value, str):
+        return value.replace("{target}", target).replace("{item}", item or "")
+    return value
+
+
+class PlaybookRunner:
+    """Executes a playbook's steps with maximal parallelism."""
+
+    def __init__(
+        self,
+        tools: Dict[str, Callable[..., Awaitable[Any]]],
+        progress: Optional[ProgressReporter] = None
+    ):
+        self.tools = tools
+        self.progress = progress
+
+    async def run(self, playbook: Playbook, target: str) -> List[StepResult]:
+        """
+        Run every step of a playbook against a target.
+
+        Returns:
+            Step results in playbook order (fan-out results in extraction order)
+        """
+        unknown = [step.tool for step in playbook.steps if step.tool not in self.tools]
+        if unknown:
+            raise ValueError(f"playbook {playbook.name} uses unknown tools: {', '.join(unknown)}")
+
+        tasks: Dict[str, asyncio.Task] = {}
+        for step in playbook.steps:
+            deps = [tasks[dep] for dep in step.after]
+            tasks[step.id] = asyncio.ensure_future(self._run_step(step, target, deps))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return [result for step_results in results for result in step_results]
+
+    async def _run_step(self, step: Step, target: str, deps: List[asyncio.Task]) -> List[StepResult]:
+        outputs = await asyncio.gather(*deps)
+        if step.foreach:
+            source, extractor = step.foreach
+            source_text = "\n".join(r.output for r in outputs[step.after.index(source)])
+            items = EXTRACTORS[extractor](source_text)[:step.max_items]
+            if not items:
+                return []
+            return list(await asyncio.gather(*(self._call(step, target, item) for item in items)))
+        return [await self._call(step, target, None)]
+
+    async def _call(self, step: Step, target: str, item: Optional[str]) -> StepResult:
+        arguments = {name: _render(value, target, item) for name, value in step.args.items()}
+        call = f"{step.tool}({', '.join(str(v) for v in arguments.values())})"
+        if self.progress:
+            self.progress.tool_started(call)
+        started = time.monotonic()
+        try:
+            output = await call_with_hooks(step.tool, self.tools[step.tool], arguments)
+        except Exception as e:
+            logger.error(f"Playbook step {call} failed: {e}")
+            output = f"Error: {e}"
+        if self.progress:
+            self.progress.tool_finished(call)
+        return StepResult(step, call, str(output), time.monotonic() - started)
+
+
+def format_evidence(results: List[StepResult]) -> str:
+    """Collected step outputs as one document for the final analysis."""
+    return "\n\n".join(
+        f"### {result.call} ({result.duration:.1f}s)\n{result.output.strip()}" for result in results
+    )
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Throttled progress updates for running investigations.
+
+The agent reports tool-call starts/finishes, reasoning steps and streamed
+Maigret hits as they happen. ProgressReporter coalesces them and posts at
+most one status line per IRC_PROGRESS_INTERVAL seconds, plus a heartbeat
+every IRC_PROGRESS_HEARTBEAT seconds while nothing changes, so a stuck
+investigation is visible in the channel. IRC_PROGRESS_INTERVAL=0 turns
+progress updates off.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+IRC_PROGRESS_INTERVAL = float(os.getenv('IRC_PROGRESS_INTERVAL', '15'))
+IRC_PROGRESS_HEARTBEAT = float(os.getenv('IRC_PROGRESS_HEARTBEAT', '60'))
+
+
+def _elapsed(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 60}m{seconds % 60:02d}s" if seconds >= 60 else f"{seconds}s"
+
+
+class ProgressReporter:
+    """Collects progress events of one investigation and posts throttled summaries."""
+
+    def __init__(
+        self,
+        send: Callable[[str], None],
+        nick: str,
+        interval: float = IRC_PROGRESS_INTERVAL,
+        heartbeat: float = IRC_PROGRESS_HEARTBEAT
+    ):
+        self.send = send
+        self.nick = nick
+        # An interval of 0 disables progress posts
+        self.interval = interval
+        self.heartbeat = max(interval, heartbeat)
+        self.started = time.monotonic()
+        self.last_post = self.started
+        self.current: Optional[str] = None
+        self.current_since = self.started
+        self.completed_tools = 0
+        self._pending: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, event: str):
+        """Record a progress event (called on the investigation's loop)."""
+        self._pending.append(event)
+
+    def tool_started(self, description: str):
+        self.current = description
+        self.current_since = time.monotonic()
+
+    def tool_finished(self, description: str):
+        self.completed_tools += 1
+        if self.current == description:
+            self.current = None
+        self.update(f"✔ {description}")
+
+    def start(self):
+        if self.interval > 0:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def _status(self) -> str:
+        now = time.monotonic()
+        parts = [f"⏳ {self.nick}: [{_elapsed(now - self.started)}]"]
+        if self.current:
+            parts.append(f"running {self.current} ({_elapsed(now - self.current_since)})")
+        parts.append(f"{self.completed_tools} tool calls done")
+        return " · ".join(parts)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            if self._pending:
+                events, self._pending = self._pending, []
+                # Keep the line short: the latest few events, and a count of the rest
+                shown = events[-3:]
+                more = f" (+{len(events) - len(shown)} more)" if len(events) > len(shown) else ""
+                self.send(f"{self._status()} | {' | '.join(shown)}{more}")
+                self.last_post = now
+            elif now - self.last_post >= self.heartbeat:
+                self.send(f"{self._status()} | still working")
+                self.last_post = now
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Fair-share scheduler for OSINT investigations.
+
+Every nick gets its own FIFO queue. When a slot on the worker loop frees up,
+the next investigation is taken from the nick with the lowest virtual time,
+and each dispatch advances that nick's virtual time by ``1 / weight``, where
+the weight comes from the channel the request was made in
+(SCHED_CHANNEL_WEIGHTS). A nick that floods the bot therefore only delays its
+own requests, while everyone else keeps getting slots in turn. Per-nick limits
+cap how many investigations a nick can have running and queued.
+"""
+
+import concurrent.futures
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from worker_loop import WorkerLoop
+
+logger = logging.getLogger(__name__)
+
+SCHED_MAX_RUNNING_PER_USER = int(os.getenv('SCHED_MAX_RUNNING_PER_USER', '1'))
+SCHED_MAX_QUEUED_PER_USER = int(os.getenv('SCHED_MAX_QUEUED_PER_USER', '5'))
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    """Parse '#ops=3,#osint=1' into {'#ops': 3.0, '#osint': 1.0}."""
+    weights = {}
+    for item in value.split(','):
+        if '=' in item:
+            channel, weight = item.split('=', 1)
+            try:
+                weights[channel.strip().lower()] = max(0.1, float(weight))
+            except ValueError:
+                logger.warning(f"Ignoring invalid channel weight: {item}")
+    return weights
+
+
+SCHED_CHANNEL_WEIGHTS = _parse_weights(os.getenv('SCHED_CHANNEL_WEIGHTS', ''))
+
+
+@dataclass
+class InvestigationRequest:
+    """One investigation waiting in or running through the scheduler."""
+
+    id: int
+    nick: str
+    target: str
+    query: str
+    # Run this predefined playbook against the query instead of a free-form investigation
+    playbook: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    future: Optional[concurrent.futures.Future] = None
+
+    def describe(self) -> str:
+        if self.started_at:
+            state = f"running {time.time() - self.started_at:.0f}s"
+        else:
+            state = f"queued {time.time() - self.submitted_at:.0f}s"
+        label = f"playbook {self.playbook} {self.query}" if self.playbook else self.query
+        return f"#{self.id} [{state}] {label[:60]}"
+
+
+@dataclass
+class _UserQueue:
+    queue: Deque[InvestigationRequest] = field(default_factory=deque)
+    running: Dict[int, InvestigationRequest] = field(default_factory=dict)
+    vtime: float = 0.0
+
+
+class SchedulerError(Exception):
+    """Raised when a request is rejected by a scheduler limit."""
+
+
+class InvestigationScheduler:
+    """Weighted fair queue in front of the shared worker loop."""
+
+    def __init__(
+        self,
+        worker: WorkerLoop,
+        runner: Callable[[InvestigationRequest], Awaitable],
+        max_running_per_user: int = SCHED_MAX_RUNNING_PER_USER,
+        max_queued_per_user: int = SCHED_MAX_QUEUED_PER_USER,
+        channel_weights: Optional[Dict[str, float]] = None
+    ):
+        self.worker = worker
+        self.runner = runner
+        self.max_running = worker.max_concurrent
+        self.max_running_per_user = max(1, max_running_per_user)
+        self.max_queued_per_user = max(1, max_queued_per_user)
+        self.channel_weights = SCHED_CHANNEL_WEIGHTS if channel_weights is None else channel_weights
+        self._users: Dict[str, _UserQueue] = {}
+        self._ids = itertools.count(1)
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def _weight(self, target: str) -> float:
+        return self.channel_weights.get(target.lower(), 1.0)
+
+    def _user(self, nick: str) -> _UserQueue:
+        user = self._users.setdefault(nick.lower(), _UserQueue())
+        if not user.queue and not user.running:
+            # New or idle users rejoin at the current minimum so they can't bank credit
+            active = [u.vtime for u in self._users.values() if u.queue or u.running]
+            if active:
+                user.vtime = max(user.vtime, min(active))
+        return user
+
+    def submit(self, nick: str, target: str, query: str, playbook: Optional[str] = None) -> tuple:
+        """
+        Queue an investigation (or a playbook run against ``query``).
+
+        Returns:
+            (request, position) where position is 0 if it started immediately
+
+        Raises:
+            SchedulerError: If the nick already has too many queued requests
+        """
+        with self._lock:
+            user = self._user(nick)
+            if len(user.queue) >= self.max_queued_per_user:
+                raise SchedulerError(
+                    f"you already have {len(user.running)} running and {len(user.queue)} queued investigations"
+                )
+            request = InvestigationRequest(next(self._ids), nick, target, query, playbook)
+            user.queue.append(request)
+            started = self._dispatch()
+            position = 0 if request.started_at else self._position(request)
+        self._watch(started)
+        logger.info(f"📋 Scheduled investigation #{request.id} for {nick} (position {position})")
+        return request, position
+
+    def _position(self, request: InvestigationRequest) -> int:
+        """Place in line, simulating the fair-share order of the queued requests."""
+        vtimes = {key: user.vtime for key, user in self._users.items()}
+        queues = {key: list(user.queue) for key, user in self._users.items() if user.queue}
+        position = 0
+        while queues:
+            key = min(queues, key=lambda k: (vtimes[k], queues[k][0].submitted_at))
+            next_request = queues[key].pop(0)
+            position += 1
+            if next_request is request:
+                return position
+            vtimes[key] += 1.0 / self._weight(next_request.target)
+            if not queues[key]:
+                del queues[key]
+        return position
+
+    def _next_user(self) -> Optional[_UserQueue]:
+        eligible = [
+            user for user in self._users.values()
+            if user.queue and len(user.running) < self.max_running_per_user
+        ]
+        if not eligible:
+            return None
+        return min(eligible, key=lambda u: (u.vtime, u.queue[0].submitted_at))
+
+    def _dispatch(self) -> List[InvestigationRequest]:
+        # Caller holds the lock and passes the started requests to _watch once released
+        started = []
+        while self._running < self.max_running:
+            user = self._next_user()
+            if user is None:
+                break
+            request = user.queue.popleft()
+            user.running[request.id] = request
+            user.vtime += 1.0 / self._weight(request.target)
+            self._running += 1
+            request.started_at = time.time()
+            request.future = self.worker.submit(self.runner(request))
+            started.append(request)
+        return started
+
+    def _watch(self, started: List[InvestigationRequest]):
+        # Outside the lock: a future that is already done runs _finished right away
+        for request in started:
+            request.future.add_done_callback(lambda _, r=request: self._finished(r))
+
+    def _finished(self, request: InvestigationRequest):
+        with self._lock:
+            user = self._users.get(request.nick.lower())
+            if user and user.running.pop(request.id, None):
+                self._running -= 1
+            started = self._dispatch()
+        self._watch(started)
+
+    def cancel(self, nick: str, request_id: Optional[int] = None) -> List[InvestigationRequest]:
+        """
+        Cancel a nick's investigations: one by ID, or all of them.
+
+        Running investigations are cancelled on the worker loop, which
+        propagates into the in-flight tool call (subprocesses are killed).
+
+        Returns:
+            The cancelled requests
+        """
+        cancelled = []
+        with self._lock:
+            user = self._users.get(nick.lower())
+            if not user:
+                return cancelled
+            for request in list(user.queue):
+                if request_id is None or request.id == request_id:
+                    user.queue.remove(request)
+                    cancelled.append(request)
+            for request in list(user.running.values()):
+                if request_id is None or request.id == request_id:
+                    cancelled.append(request)
+        for request in cancelled:
+            if request.future:
+                request.future.cancel()
+        if cancelled:
+            logger.info(f"🛑 Cancelled investigations {[r.id for r in cancelled]} for {nick}")
+        return cancelled
+
+    def status(self, nick: str) -> tuple:
+        """
+        Returns:
+            (requests of this nick, total running, total queued)
+        """
+        with self._lock:
+            user = self._users.get(nick.lower())
+            mine = (list(user.running.values()) + list(user.queue)) if user else []
+            queued = sum(len(u.queue) for u in self._users.values())
+            return mine, self._running, queued
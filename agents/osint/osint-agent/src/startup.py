@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Startup phase timing and background agent loading.
+
+The IRC side of the bot (irc3, the plugin, the output queue) imports in a
+fraction of a second, while the Agno/OpenAI stack and the tool modules take
+much longer. AgentLoader builds the OSINTAgent on a background thread so the
+bot connects, joins its channels and answers !help right away; investigations
+submitted in the meantime wait for the agent instead of failing. Each startup
+phase is timed from process start and logged once the bot is responsive.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROCESS_START = time.monotonic()
+
+
+class StartupTimer:
+    """Records how long each named startup phase took."""
+
+    def __init__(self):
+        self.phases: "OrderedDict[str, float]" = OrderedDict()
+        self.milestones: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = time.monotonic() - started
+
+    def milestone(self, name: str) -> float:
+        """Record (once) the time since process start at which a milestone was reached."""
+        with self._lock:
+            if name not in self.milestones:
+                self.milestones[name] = time.monotonic() - PROCESS_START
+                logger.info(f"⏱️ Startup: {name} after {self.milestones[name]:.2f}s ({self.describe_phases()})")
+            return self.milestones[name]
+
+    def describe_phases(self) -> str:
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+
+
+startup = StartupTimer()
+
+
+class AgentLoader:
+    """Builds the agent on a background thread and hands it out once ready."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="agent-loader", daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        try:
+            with startup.phase("agent"):
+                agent = self.factory()
+            self.future.set_result(agent)
+            startup.milestone("agent ready")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize OSINT agent: {e}", exc_info=True)
+            self.future.set_exception(e)
+
+    @property
+    def agent(self) -> Optional[Any]:
+        """The agent if it finished loading, else None."""
+        if self.future.done() and not self.future.exception():
+            return self.future.result()
+        return None
+
+    @property
+    def failed(self) -> bool:
+        return self.future.done() and self.future.exception() is not None
+
+    async def wait(self) -> Any:
+        """Wait (on any event loop) until the agent is ready; raises if loading failed."""
+        return await asyncio.wrap_future(self.future)
@@ -0,0 +1,141 @@
+"""
+Agno tool hooks wrapped around every OSINT tool call.
+
+Each hook receives the tool name, the next callable in the chain and the
+call arguments, and must return the (possibly transformed) tool result.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from typing import Any, Callable, Dict
+
+from tools.evidence_store import compact_output
+from tools.journal import current_journal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOOL_CONCURRENCY = int(os.getenv('TOOL_CONCURRENCY', '4'))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv('TOOL_TIMEOUT', '120'))
+
+# Parallel calls allowed per tool (e.g. ip-api.com rate-limits GeoIP lookups)
+TOOL_CONCURRENCY = {
+    "dns_lookup": 8,
+    "geoip_lookup": 2,
+    "port_scan_basic": 2,
+    "whois_lookup": 2,
+}
+
+# Seconds before a tool call is abandoned; 0 for tools that enforce their own timeout
+TOOL_TIMEOUTS = {
+    "dns_lookup": 30,
+    "reverse_dns_lookup": 30,
+    "geoip_lookup": 30,
+    "http_headers": 60,
+    "whois_lookup": 60,
+    "shell_execute": 0,
+    "install_tool": 0,
+    "maigret_search": 0,
+    "maigret_batch_search": 0,
+}
+
+# Per-loop semaphores: asyncio primitives must not be shared across event loops
+_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def tool_concurrency(tool_name: str) -> int:
+    """Concurrency limit for a tool; override with TOOL_CONCURRENCY_<TOOL_NAME>."""
+    default = TOOL_CONCURRENCY.get(tool_name, DEFAULT_TOOL_CONCURRENCY)
+    return max(1, int(os.getenv(f"TOOL_CONCURRENCY_{tool_name.upper()}", default)))
+
+
+def tool_timeout(tool_name: str) -> float:
+    """Timeout for a tool; override with TOOL_TIMEOUT_<TOOL_NAME> (0 disables)."""
+    default = TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+    return float(os.getenv(f"TOOL_TIMEOUT_{tool_name.upper()}", default))
+
+
+def _semaphore(tool_name: str) -> asyncio.Semaphore:
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if tool_name not in per_loop:
+        per_loop[tool_name] = asyncio.Semaphore(tool_concurrency(tool_name))
+    return per_loop[tool_name]
+
+
+async def journal_hook(function_name: str, function_call: Callable, arguments: Dict[str, Any]) -> Any:
+    """Log every tool result to the current investigation's evidence journal."""
+    started = time.monotonic()
+    result = await function_call(**arguments)
+    journal = current_journal.get()
+    if journal:
+        try:
+            journal.log_tool_result(function_name, arguments, result, time.monotonic() - started)
+        except Exception as e:
+            logger.error(f"Failed to journal result of {function_name}: {e}")
+    return result
+
+
+async def compaction_hook(function_name: str, function_call: Callable, arguments: Dict[str, Any]) -> Any:
+    """
+    Keep large tool outputs out of the LLM context: outputs over the tool's
+    budget are stored as evidence and replaced by a structured summary the
+    agent can drill into with fetch_evidence.
+    """
+    result = await function_call(**arguments)
+    try:
+        return compact_output(function_name, result)
+    except Exception as e:
+        logger.error(f"Failed to compact output of {function_name}: {e}")
+        return result
+
+
+async def concurrency_hook(function_name: str, function_call: Callable, arguments: Dict[str, Any]) -> Any:
+    """
+    Limit how many calls of a tool run at once and abandon calls that exceed
+    the tool's timeout. Agno runs the tool calls of one model turn in parallel,
+    so a domain triage takes as long as its slowest tool; a timed-out call
+    returns an error string instead of failing the other calls of the turn.
+    """
+    queued = time.monotonic()
+    async with _semaphore(function_name):
+        started = time.monotonic()
+        timeout = tool_timeout(function_name)
+        try:
+            if timeout > 0:
+                result = await asyncio.wait_for(function_call(**arguments), timeout)
+            else:
+                result = await function_call(**arguments)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ {function_name} timed out after {timeout:g}s")
+            result = f"Error: {function_name} timed out after {timeout:g} seconds"
+    finished = time.monotonic()
+    logger.info(
+        f"⏱️ {function_name} took {finished - started:.2f}s"
+        f" (waited {started - queued:.2f}s for a slot)"
+    )
+    return result
+
+
+# Outermost hook first; the journal sits inside compaction so it records full
+# outputs, and outside the concurrency limits so durations include queueing
+TOOL_HOOKS = [
+    compaction_hook,
+    journal_hook,
+    concurrency_hook,
+]
+
+
+async def call_with_hooks(function_name: str, function: Callable, arguments: Dict[str, Any]) -> Any:
+    """Call a tool entrypoint directly (outside an Agno run) through TOOL_HOOKS."""
+    call = function
+    for hook in reversed(TOOL_HOOKS):
+        call = _bind_hook(hook, function_name, call)
+    return await call(**arguments)
+
+
+def _bind_hook(hook: Callable, function_name: str, inner: Callable) -> Callable:
+    async def call(**arguments):
+        return await hook(function_name, inner, arguments)
+    return call
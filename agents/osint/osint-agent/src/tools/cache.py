@@ -0,0 +1,250 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("OSINT_CACHE_PATH", "/workspace/.osint_cache.sqlite")
+CACHE_ENABLED = os.getenv("OSINT_CACHE_ENABLED", "true").lower() == "true"
+# Entries older than this are deleted when the process first opens the cache
+CACHE_MAX_AGE = int(os.getenv("OSINT_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+# Status of the cached tool call running in this context; failed lookups are never cached
+_call_status: ContextVar[Optional[dict]] = ContextVar("tool_call_status", default=None)
+
+
+def report_failure(reason: str, timed_out: bool = False):
+    """Mark the current tool call as failed so its result is not cached."""
+    status = _call_status.get()
+    if status is not None:
+        status["failed"] = reason
+        status["timed_out"] = status.get("timed_out", False) or timed_out
+
+
+@contextmanager
+def failure_scope():
+    """
+    Collect report_failure() calls made inside the block.
+
+    Yields the status dict: "failed" holds the last reason and "timed_out"
+    whether any failure was a timeout. Failures inside a nested scope are
+    passed on to the enclosing one when it ends.
+    """
+    status = {}
+    token = _call_status.set(status)
+    try:
+        yield status
+    finally:
+        _call_status.reset(token)
+        if status.get("failed"):
+            report_failure(status["failed"], status.get("timed_out", False))
+
+
+_initialized = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the shared cache database; the first open creates the schema and purges old entries."""
+    global _initialized
+    os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(CACHE_PATH, timeout=10)
+    if not _initialized:
+        _initialized = True
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tool_cache (
+                key TEXT PRIMARY KEY,
+                tool TEXT NOT NULL,
+                arguments TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        if CACHE_MAX_AGE > 0:
+            with conn:
+                deleted = _purge(conn, CACHE_MAX_AGE)
+            if deleted:
+                logger.info(f"Purged {deleted} cache entries older than {CACHE_MAX_AGE}s")
+    return conn
+
+
+def _purge(conn: sqlite3.Connection, max_age: int) -> int:
+    cursor = conn.execute("DELETE FROM tool_cache WHERE created_at < ?", (time.time() - max_age,))
+    return cursor.rowcount
+
+
+def _normalize(value: Any, case_insensitive: bool) -> Any:
+    """Normalize an argument value so equivalent calls share a cache entry."""
+    if isinstance(value, str):
+        value = value.strip()
+        return value.lower() if case_insensitive else value
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize(v, case_insensitive) for v in value]
+        return sorted(items, key=str) if isinstance(value, set) else items
+    if isinstance(value, dict):
+        return {k: _normalize(v, case_insensitive) for k, v in sorted(value.items())}
+    return value
+
+
+def _is_cacheable(result: Any, status: dict) -> bool:
+    """Only cache non-empty string results of calls that didn't report a failure."""
+    return isinstance(result, str) and bool(result) and not status.get("failed")
+
+
+def _format_age(seconds: float) -> str:
+    """Render a cache age like '42s', '17m' or '3h 5m'."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+
+
+def _document_force_refresh(doc: Optional[str]) -> str:
+    """Add the force_refresh argument to a Google-style docstring."""
+    doc = doc or ""
+    entry = "        force_refresh: Ignore any cached result and run the lookup again\n"
+    marker = "\n    Returns:"
+    if marker in doc:
+        head, tail = doc.split(marker, 1)
+        return f"{head.rstrip()}\n{entry}{marker}{tail}"
+    return doc + "\n    Args:\n" + entry
+
+
+def get_cached(key: str, ttl: int) -> Optional[tuple]:
+    """
+    Look up a cache entry.
+
+    Args:
+        key: Cache key
+        ttl: Maximum age in seconds
+
+    Returns:
+        (result, age_seconds) tuple, or None on a miss
+    """
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                "SELECT result, created_at FROM tool_cache WHERE key = ?", (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Cache lookup failed: {e}")
+        return None
+
+    if not row:
+        return None
+    age = time.time() - row[1]
+    if age > ttl:
+        return None
+    return row[0], age
+
+
+def put_cached(key: str, tool_name: str, arguments: str, result: str):
+    """Store a tool result in the cache."""
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tool_cache (key, tool, arguments, result, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, tool_name, arguments, result, time.time()),
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Cache store failed: {e}")
+
+
+def purge_expired(max_age: int = CACHE_MAX_AGE) -> int:
+    """
+    Delete cache entries older than max_age seconds.
+
+    Returns:
+        Number of deleted entries
+    """
+    conn = _connect()
+    try:
+        with conn:
+            return _purge(conn, max_age)
+    finally:
+        conn.close()
+
+
+def cached_tool(ttl: int, case_insensitive: bool = False) -> Callable:
+    """
+    Cache the results of an async OSINT tool across investigations and sessions.
+
+    Apply below ``@tool`` so Agno sees the extra ``force_refresh`` argument.
+    Results are keyed by tool name and normalized arguments and stored in a
+    SQLite database shared by every session. Cache hits are prefixed with a
+    note telling the agent how old the result is. Calls that report_failure()
+    (failed commands, timeouts, lookup errors) are not cached.
+
+    Args:
+        ttl: Default time-to-live in seconds; override per tool with
+            OSINT_CACHE_TTL_<TOOL_NAME> (e.g. OSINT_CACHE_TTL_WHOIS_LOOKUP=3600)
+        case_insensitive: Lower-case string arguments before keying (domains, IPs)
+
+    Returns:
+        Decorator wrapping the tool function
+    """
+    def decorator(func: Callable) -> Callable:
+        tool_name = func.__name__
+        tool_ttl = int(os.getenv(f"OSINT_CACHE_TTL_{tool_name.upper()}", ttl))
+        sig = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, force_refresh: bool = False, **kwargs):
+            if not CACHE_ENABLED or tool_ttl <= 0:
+                return await func(*args, **kwargs)
+
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = json.dumps(
+                _normalize(dict(bound.arguments), case_insensitive), sort_keys=True, default=str
+            )
+            key = hashlib.sha256(f"{tool_name}:{arguments}".encode()).hexdigest()
+
+            if not force_refresh:
+                hit = get_cached(key, tool_ttl)
+                if hit:
+                    result, age = hit
+                    logger.info(f"Cache hit for {tool_name} ({_format_age(age)} old)")
+                    return (
+                        f"[CACHED RESULT - {_format_age(age)} old; "
+                        f"call with force_refresh=True for fresh data]\n{result}"
+                    )
+
+            with failure_scope() as status:
+                result = await func(*args, **kwargs)
+            if _is_cacheable(result, status):
+                put_cached(key, tool_name, arguments, result)
+            else:
+                logger.info(f"Not caching {tool_name} result: {status.get('failed', 'empty result')}")
+            return result
+
+        params = list(sig.parameters.values())
+        params.append(
+            inspect.Parameter("force_refresh", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=bool)
+        )
+        wrapper.__signature__ = sig.replace(parameters=params)
+        wrapper.__annotations__ = {**func.__annotations__, "force_refresh": bool}
+        wrapper.__doc__ = _document_force_refresh(func.__doc__)
+        return wrapper
+
+    return decorator
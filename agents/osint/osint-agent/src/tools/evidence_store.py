@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+EVIDENCE_DIR = os.getenv("EVIDENCE_DIR", "/workspace/evidence")
+DEFAULT_OUTPUT_BUDGET = int(os.getenv("TOOL_OUTPUT_BUDGET", "4000"))
+
+# Characters of tool output that go into the LLM context before compaction
+TOOL_OUTPUT_BUDGETS = {
+    "shell_execute": 6000,
+    "shell_poll": 4000,
+    "http_headers": 3000,
+    "read_maigret_report": 6000,
+    "maigret_search": 6000,
+    "maigret_batch_search": 8000,
+    "whois_lookup": 4000,
+}
+
+# Tools whose output is never compacted: fetch_evidence is the way to read stored
+# evidence, and the paginated readers already cap each page at FILE_READ_MAX_BYTES
+# and return a cursor, which a summary would hide
+UNCOMPACTED_TOOLS = {"fetch_evidence", "read_file", "search_file", "job_output"}
+
+HEAD_LINES = 25
+TAIL_LINES = 10
+URL_PATTERN = re.compile(r"https?://[^\s\"'<>]+")
+IP_PATTERN = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+EMAIL_PATTERN = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+EVIDENCE_ID = re.compile(r"^[0-9a-f]{16}$")
+
+
+def output_budget(tool_name: str) -> int:
+    """Context budget for a tool; override with TOOL_OUTPUT_BUDGET_<TOOL_NAME>."""
+    default = TOOL_OUTPUT_BUDGETS.get(tool_name, DEFAULT_OUTPUT_BUDGET)
+    return int(os.getenv(f"TOOL_OUTPUT_BUDGET_{tool_name.upper()}", default))
+
+
+def _path(evidence_id: str) -> str:
+    return os.path.join(EVIDENCE_DIR, evidence_id[:2], f"{evidence_id}.txt")
+
+
+def put_evidence(text: str) -> str:
+    """
+    Store a full tool output, content-addressed.
+
+    Returns:
+        Evidence ID (first 16 hex chars of the SHA-256)
+    """
+    evidence_id = hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()[:16]
+    path = _path(evidence_id)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    return evidence_id
+
+
+def evidence_path(evidence_id: str) -> Optional[str]:
+    """Path of a stored output, or None for unknown or malformed IDs."""
+    if not EVIDENCE_ID.match(evidence_id or ""):
+        return None
+    path = _path(evidence_id)
+    return path if os.path.exists(path) else None
+
+
+def _top(values, limit: int = 8) -> str:
+    counts = Counter(values)
+    return ", ".join(value for value, _ in counts.most_common(limit))
+
+
+def _describe_json(text: str) -> Optional[str]:
+    """One-line shape of a JSON document, if the output is JSON."""
+    stripped = text.strip()
+    if not stripped or stripped[0] not in "[{":
+        return None
+    try:
+        data = json.loads(stripped)
+    except ValueError:
+        return None
+    if isinstance(data, dict):
+        keys = list(data.keys())
+        more = f" (+{len(keys) - 20} more)" if len(keys) > 20 else ""
+        return f"JSON object with {len(keys)} keys: {', '.join(map(str, keys[:20]))}{more}"
+    if isinstance(data, list):
+        return f"JSON array with {len(data)} items"
+    return None
+
+
+def summarize_output(text: str, evidence_id: str, budget: int) -> str:
+    """
+    Build a structured summary of a large output that fits the budget:
+    size, detected structure, extracted indicators, head and tail lines,
+    and how to fetch the rest.
+    """
+    lines = text.splitlines()
+    header = [
+        f"[COMPACTED OUTPUT - {len(text)} chars, {len(lines)} lines; full output stored as "
+        f"evidence_id='{evidence_id}'. Use fetch_evidence(evidence_id='{evidence_id}', "
+        f"pattern=...) or offset=... for details]"
+    ]
+    shape = _describe_json(text)
+    if shape:
+        header.append(f"Structure: {shape}")
+    for label, pattern in (("URLs", URL_PATTERN), ("IPs", IP_PATTERN), ("Emails", EMAIL_PATTERN)):
+        found = pattern.findall(text)
+        if found:
+            header.append(f"{label} ({len(set(found))} unique): {_top(found)}")
+
+    head_text = "\n".join(header) + "\n--- first lines ---\n"
+    tail_marker = "\n--- ... {omitted} lines omitted ... ---\n--- last lines ---\n"
+    remaining = max(0, budget - len(head_text) - len(tail_marker) - 20)
+
+    head = []
+    used = 0
+    for line in lines[:HEAD_LINES]:
+        line = line[:300]
+        if used + len(line) + 1 > remaining * 2 // 3:
+            break
+        head.append(line)
+        used += len(line) + 1
+
+    tail = []
+    for line in reversed(lines[max(len(head), len(lines) - TAIL_LINES):]):
+        line = line[:300]
+        if used + len(line) + 1 > remaining:
+            break
+        tail.insert(0, line)
+        used += len(line) + 1
+
+    omitted = len(lines) - len(head) - len(tail)
+    summary = head_text + "\n".join(head)
+    if tail:
+        summary += tail_marker.format(omitted=omitted) + "\n".join(tail)
+    return summary
+
+
+def compact_output(tool_name: str, result: str) -> str:
+    """
+    Replace a tool output that exceeds its budget with a structured summary,
+    keeping the full text in the evidence store. Small outputs pass through.
+    """
+    if tool_name in UNCOMPACTED_TOOLS or not isinstance(result, str):
+        return result
+    budget = output_budget(tool_name)
+    if budget <= 0 or len(result) <= budget:
+        return result
+    try:
+        evidence_id = put_evidence(result)
+    except OSError as e:
+        logger.error(f"Could not store evidence for {tool_name}, passing output through: {e}")
+        return result
+    logger.info(f"Compacted {tool_name} output from {len(result)} chars (evidence {evidence_id})")
+    return summarize_output(result, evidence_id, budget)
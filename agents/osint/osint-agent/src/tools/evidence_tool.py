@@ -0,0 +1,70 @@
+import logging
+import re
+from agno.tools import tool
+from typing import Optional
+from .evidence_store import evidence_path
+from .file_tool import READ_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+@tool
+async def fetch_evidence(
+    evidence_id: str,
+    offset: int = 0,
+    max_bytes: int = READ_MAX_BYTES,
+    pattern: Optional[str] = None
+) -> str:
+    """
+    Read the full output of an earlier tool call that was compacted to save
+    context. Either page through it by offset or grep it with a pattern.
+
+    Args:
+        evidence_id: ID from a [COMPACTED OUTPUT ...] summary
+        offset: Character offset to start reading from
+        max_bytes: Maximum characters to return (capped at FILE_READ_MAX_BYTES)
+        pattern: Optional regular expression; returns matching lines with line numbers instead
+
+    Returns:
+        The requested part of the stored output
+    """
+    try:
+        max_bytes = max(1, min(max_bytes, READ_MAX_BYTES))
+        path = evidence_path(evidence_id)
+        if path is None:
+            return f"Unknown evidence ID: {evidence_id}"
+
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+
+        if pattern:
+            regex = re.compile(pattern, re.IGNORECASE)
+            matches = []
+            used = 0
+            total = 0
+            for number, line in enumerate(text.splitlines(), 1):
+                if regex.search(line):
+                    total += 1
+                    entry = f"{number}: {line}"
+                    if used + len(entry) < max_bytes:
+                        matches.append(entry)
+                        used += len(entry) + 1
+            if not matches:
+                return f"No lines matching '{pattern}' in evidence {evidence_id}"
+            more = f"\n[{total - len(matches)} more matching lines not shown]" if total > len(matches) else ""
+            return f"{total} lines matching '{pattern}' in evidence {evidence_id}:\n" + "\n".join(matches) + more
+
+        offset = max(0, offset)
+        chunk = text[offset:offset + max_bytes]
+        end = offset + len(chunk)
+        header = f"Evidence {evidence_id} (chars {offset}-{end} of {len(text)})"
+        if end < len(text):
+            header += f" - continue with offset={end}"
+        return f"{header}:\n{chunk}"
+
+    except re.error as e:
+        return f"Invalid pattern '{pattern}': {str(e)}"
+    except Exception as e:
+        error_msg = f"Error fetching evidence {evidence_id}: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
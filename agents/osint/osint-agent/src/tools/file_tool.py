@@ -1,38 +1,206 @@
 import aiofiles
+import asyncio
+import fnmatch
+import mmap
 import os
-import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
 from agno.tools import tool
-from typing import Optional
+from .journal import build_report, current_journal, get_journal, list_journals, new_investigation_id
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Hard cap on data returned by a single read/search call
+READ_MAX_BYTES = int(os.getenv("FILE_READ_MAX_BYTES", "32768"))
+READ_BLOCK_SIZE = 1024 * 1024
+SEARCH_LINE_MAX = 500
+
 @tool
-async def read_file(file_path: str, encoding: str = "utf-8") -> str:
+async def read_file(
+    file_path: str,
+    encoding: str = "utf-8",
+    offset: int = 0,
+    max_bytes: int = READ_MAX_BYTES,
+    start_line: Optional[int] = None,
+    num_lines: Optional[int] = None,
+    tail_lines: Optional[int] = None
+) -> str:
     """
-    Read contents of a file.
+    Read part of a file. Output is capped; when more data remains the result
+    ends with the offset to pass in the next call, so large files can be paged.
     
     Args:
         file_path: Path to the file to read
         encoding: File encoding (default: utf-8)
+        offset: Byte offset to start reading from (continuation cursor)
+        max_bytes: Maximum bytes to return (capped at FILE_READ_MAX_BYTES)
+        start_line: 1-based line number to start from (head when 1)
+        num_lines: Number of lines to return when reading by line
+        tail_lines: Return only the last N lines of the file
         
     Returns:
-        File contents as string
+        Requested file contents with size and continuation information
     """
     try:
         if not os.path.exists(file_path):
             return f"File not found: {file_path}"
             
-        async with aiofiles.open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-            content = await f.read()
+        size = os.path.getsize(file_path)
+        max_bytes = max(1, min(max_bytes, READ_MAX_BYTES))
+        
+        if tail_lines:
+            data, start = await asyncio.to_thread(_read_tail, file_path, tail_lines, max_bytes)
+            end = size
+        else:
+            async with aiofiles.open(file_path, 'rb') as f:
+                if start_line:
+                    offset = await _line_offset(f, start_line)
+                await f.seek(offset)
+                data = await f.read(max_bytes)
+            start = offset
+            
+            if num_lines:
+                lines = data.split(b'\n')
+                if len(lines) > num_lines:
+                    data = b'\n'.join(lines[:num_lines]) + b'\n'
+            elif start + len(data) < size and b'\n' in data:
+                # Stop at a line boundary so the next page starts cleanly
+                data = data[:data.rfind(b'\n') + 1]
+            end = start + len(data)
             
-        return f"File: {file_path}\nSize: {len(content)} characters\nContent:\n{content}"
+        content = data.decode(encoding, errors='ignore')
+        result = f"File: {file_path}\nSize: {size} bytes\nShowing bytes {start}-{end}\nContent:\n{content}"
+        if end < size:
+            result += f"\n[Truncated - {size - end} bytes remaining; call read_file with offset={end} to continue]"
+        return result
         
     except Exception as e:
         error_msg = f"Error reading file {file_path}: {str(e)}"
         logger.error(error_msg)
         return error_msg
 
+async def _line_offset(f, line_number: int) -> int:
+    """Return the byte offset where a 1-based line starts, scanning in blocks."""
+    offset = 0
+    remaining = line_number - 1
+    while remaining > 0:
+        block = await f.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        count = block.count(b'\n')
+        if count < remaining:
+            remaining -= count
+            offset += len(block)
+            continue
+        position = -1
+        for _ in range(remaining):
+            position = block.index(b'\n', position + 1)
+        return offset + position + 1
+    return offset
+
+def _read_tail(file_path: str, lines: int, max_bytes: int) -> tuple:
+    """Read the last N lines (at most max_bytes) by scanning backwards in blocks."""
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= lines and len(data) < max_bytes:
+            step = min(READ_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    stripped = data.rstrip(b'\n')
+    # The joined tail is a suffix of the data read, so its offset follows directly
+    tail = b'\n'.join(stripped.split(b'\n')[-lines:])[-max_bytes:]
+    return tail, position + len(stripped) - len(tail)
+
+@tool
+async def search_file(
+    file_path: str,
+    pattern: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    max_matches: int = 50,
+    offset: int = 0
+) -> str:
+    """
+    Search a file for a substring or regular expression without loading it
+    into memory. Returns matching lines with line numbers and byte offsets.
+    
+    Args:
+        file_path: Path to the file to search
+        pattern: Substring or regular expression to find
+        regex: Treat pattern as a regular expression
+        ignore_case: Case-insensitive matching
+        max_matches: Maximum matching lines to return
+        offset: Byte offset to resume searching from (continuation cursor)
+        
+    Returns:
+        Matching lines with offsets and a continuation cursor if more may exist
+    """
+    try:
+        if not os.path.exists(file_path):
+            return f"File not found: {file_path}"
+            
+        return await asyncio.to_thread(
+            _search_mmap, file_path, pattern, regex, ignore_case, max(1, max_matches), offset
+        )
+        
+    except Exception as e:
+        error_msg = f"Error searching file {file_path}: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+def _count_newlines(mm: mmap.mmap, start: int, end: int) -> int:
+    """Count newlines in mm[start:end] one block at a time, so memory stays bounded."""
+    count = 0
+    for block_start in range(start, end, READ_BLOCK_SIZE):
+        count += mm[block_start:min(block_start + READ_BLOCK_SIZE, end)].count(b'\n')
+    return count
+
+def _search_mmap(file_path: str, pattern: str, regex: bool, ignore_case: bool, max_matches: int, offset: int) -> str:
+    """Memory-mapped line search used by search_file."""
+    size = os.path.getsize(file_path)
+    header = f"Search for {pattern!r} in {file_path} ({size} bytes) from offset {offset}:\n"
+    if size == 0 or offset >= size:
+        return header + "No matches\n"
+        
+    expression = pattern.encode() if regex else re.escape(pattern.encode())
+    compiled = re.compile(expression, re.IGNORECASE if ignore_case else 0)
+    
+    matches = []
+    output_bytes = 0
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        line_number = _count_newlines(mm, 0, offset) + 1
+        counted_to = offset
+        position = offset
+        while len(matches) < max_matches and output_bytes < READ_MAX_BYTES:
+            match = compiled.search(mm, position)
+            if not match:
+                position = size
+                break
+            line_start = mm.rfind(b'\n', 0, match.start()) + 1
+            line_end = mm.find(b'\n', match.end())
+            line_end = size if line_end == -1 else line_end
+            line_number += _count_newlines(mm, counted_to, line_start)
+            counted_to = line_start
+            line = mm[line_start:min(line_end, line_start + SEARCH_LINE_MAX)].decode('utf-8', errors='ignore')
+            matches.append(f"  line {line_number} @ offset {line_start}: {line}")
+            output_bytes += len(line)
+            position = line_end + 1
+            
+    if not matches:
+        return header + "No matches\n"
+    result = header + "\n".join(matches) + "\n"
+    if position < size:
+        result += f"[More matches may follow; call search_file with offset={position} to continue]"
+    return result
+
 @tool
 async def write_file(file_path: str, content: str, encoding: str = "utf-8") -> str:
     """
@@ -88,34 +256,87 @@ async def append_to_file(file_path: str, content: str, encoding: str = "utf-8")
         return error_msg
 
 @tool
-async def list_files(directory: str = "/workspace", pattern: str = "*") -> str:
+async def list_files(
+    directory: str = "/workspace",
+    pattern: str = "*",
+    recursive: bool = False,
+    extensions: Optional[List[str]] = None,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    modified_within_hours: Optional[float] = None,
+    sort_by: str = "name",
+    descending: bool = False,
+    limit: int = 100,
+    offset: int = 0,
+    use_index: bool = True
+) -> str:
     """
-    List files in a directory with optional pattern matching.
+    List files in a directory with pattern, size, age and extension filters.
+    Results are sorted and paginated; directory metadata is cached so repeated
+    listings of large trees only rescan directories that changed.
     
     Args:
         directory: Directory to list files from
-        pattern: File pattern to match (e.g., "*.json", "report_*")
+        pattern: File name pattern to match (e.g., "*.json", "report_*")
+        recursive: Include files in subdirectories
+        extensions: Only include these extensions (e.g., [".json", ".txt"])
+        min_size: Minimum file size in bytes
+        max_size: Maximum file size in bytes
+        modified_within_hours: Only files modified within this many hours
+        sort_by: Sort key: name, size or mtime
+        descending: Reverse the sort order
+        limit: Maximum number of files to return
+        offset: Number of matching files to skip (pagination cursor)
+        use_index: Reuse cached file names for unchanged directories (sizes and times are always fresh)
         
     Returns:
-        List of files matching the pattern
+        List of files matching the filters
     """
     try:
-        import glob
-        
-        if not os.path.exists(directory):
+        if not os.path.isdir(directory):
             return f"Directory not found: {directory}"
             
-        search_pattern = os.path.join(directory, pattern)
-        files = glob.glob(search_pattern)
+        if sort_by not in ("name", "size", "mtime"):
+            return f"Invalid sort_by '{sort_by}' (use name, size or mtime)"
+            
+        suffixes = tuple(
+            ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in extensions or []
+        )
+        newer_than = time.time() - modified_within_hours * 3600 if modified_within_hours else None
+        
+        def matches(name: str, size: int, mtime: float) -> bool:
+            if not fnmatch.fnmatch(name, pattern):
+                return False
+            if suffixes and not name.lower().endswith(suffixes):
+                return False
+            if min_size is not None and size < min_size:
+                return False
+            if max_size is not None and size > max_size:
+                return False
+            return newer_than is None or mtime >= newer_than
+        
+        def collect() -> list:
+            return [
+                entry for entry in _scan_files(directory, recursive, use_index)
+                if matches(os.path.basename(entry[0]), entry[1], entry[2])
+            ]
+        
+        files = await asyncio.to_thread(collect)
         
         if not files:
             return f"No files found matching pattern '{pattern}' in {directory}"
             
-        result = f"Files in {directory} matching '{pattern}':\n"
-        for file_path in sorted(files):
-            stat = os.stat(file_path)
-            size = stat.st_size
-            result += f"  {os.path.basename(file_path)} ({size} bytes)\n"
+        key_index = {"name": 0, "size": 1, "mtime": 2}[sort_by]
+        files.sort(key=lambda entry: entry[key_index], reverse=descending)
+        page = files[offset:offset + max(1, limit)]
+        
+        result = f"Files in {directory} matching '{pattern}' ({len(files)} total, showing {offset + 1}-{offset + len(page)}):\n"
+        for path, size, mtime in page:
+            modified = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M')
+            result += f"  {path} ({size} bytes, {modified})\n"
+            
+        if offset + len(page) < len(files):
+            result += f"[{len(files) - offset - len(page)} more; call list_files with offset={offset + len(page)} to continue]\n"
             
         return result
         
@@ -124,6 +345,72 @@ async def list_files(directory: str = "/workspace", pattern: str = "*") -> str:
         logger.error(error_msg)
         return error_msg
 
+# Directory name index, least recently used first: path -> (directory mtime_ns, [(name, is_dir)]).
+# Only names are cached: files changed in place (growing logs, journals) don't
+# change the directory mtime, so sizes and mtimes are always stat'ed fresh.
+# list_files runs in to_thread workers, so every access holds _dir_index_lock.
+_dir_index: "OrderedDict[str, tuple]" = OrderedDict()
+_dir_index_lock = threading.Lock()
+DIR_INDEX_MAX_DIRS = int(os.getenv("FILE_DIR_INDEX_MAX_DIRS", "1024"))
+
+def _read_directory(path: str, use_index: bool) -> list:
+    """List one directory as (name, is_dir, size, mtime), reusing cached names if it is unchanged."""
+    dir_mtime = os.stat(path).st_mtime_ns
+    with _dir_index_lock:
+        cached = _dir_index.get(path)
+        if use_index and cached and cached[0] == dir_mtime:
+            _dir_index.move_to_end(path)
+        else:
+            cached = None
+    if cached:
+        names = cached[1]
+    else:
+        names = []
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        names.append((entry.name, True))
+                    elif entry.is_file():
+                        names.append((entry.name, False))
+                except OSError:
+                    continue
+        with _dir_index_lock:
+            _dir_index[path] = (dir_mtime, names)
+            _dir_index.move_to_end(path)
+            while len(_dir_index) > DIR_INDEX_MAX_DIRS:
+                _dir_index.popitem(last=False)
+    
+    entries = []
+    for name, is_dir in names:
+        if is_dir:
+            entries.append((name, True, 0, 0.0))
+            continue
+        try:
+            stat = os.stat(os.path.join(path, name))
+        except OSError:
+            continue
+        entries.append((name, False, stat.st_size, stat.st_mtime))
+    return entries
+
+def _scan_files(directory: str, recursive: bool, use_index: bool):
+    """Yield (relative_path, size, mtime) for files under directory."""
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = _read_directory(current, use_index)
+        except OSError as e:
+            logger.warning(f"Skipping unreadable directory {current}: {e}")
+            continue
+        for name, is_dir, size, mtime in entries:
+            full_path = os.path.join(current, name)
+            if is_dir:
+                if recursive:
+                    pending.append(full_path)
+                continue
+            yield os.path.relpath(full_path, directory), size, mtime
+
 @tool
 async def create_investigation_report(
     target: str, 
@@ -132,7 +419,8 @@ async def create_investigation_report(
     timestamp: Optional[str] = None
 ) -> str:
     """
-    Create a structured investigation report.
+    Record investigation findings in the evidence journal and build a report
+    from the journal, including every logged tool result with its hash.
     
     Args:
         target: Investigation target (username, domain, IP, etc.)
@@ -144,30 +432,52 @@ async def create_investigation_report(
         Path to created report
     """
     try:
-        from datetime import datetime
-        
         if not timestamp:
             timestamp = datetime.utcnow().isoformat()
             
-        report = {
-            "investigation": {
-                "target": target,
-                "timestamp": timestamp,
-                "tools_used": tools_used,
-                "findings": findings
-            }
-        }
-        
-        # Sanitize target for filename
-        safe_target = "".join(c for c in target if c.isalnum() or c in "._-")
-        report_path = f"/workspace/investigation_{safe_target}_{timestamp[:10]}.json"
-        
-        async with aiofiles.open(report_path, 'w') as f:
-            await f.write(json.dumps(report, indent=2))
-            
-        return f"Investigation report created: {report_path}"
+        journal = current_journal.get() or get_journal(new_investigation_id(target))
+        journal.append(
+            "report",
+            target=target,
+            findings=findings,
+            tools_used=tools_used,
+            report_timestamp=timestamp
+        )
+        journal.flush()
+        
+        report_path = await asyncio.to_thread(build_report, journal.investigation_id)
+        return f"Investigation report created: {report_path} (journal: {journal.investigation_id})"
         
     except Exception as e:
         error_msg = f"Error creating investigation report: {str(e)}"
         logger.error(error_msg)
-        return error_msg
\ No newline at end of file
+        return error_msg
+
+@tool
+async def export_investigation_report(investigation_id: Optional[str] = None) -> str:
+    """
+    Rebuild the report of an investigation by streaming its evidence journal.
+    
+    Args:
+        investigation_id: Journal to export (default: the current investigation)
+        
+    Returns:
+        Path to the rebuilt report, or the known investigation IDs
+    """
+    try:
+        if not investigation_id:
+            journal = current_journal.get()
+            if not journal:
+                return "No active investigation. Known journals: " + ", ".join(list_journals()[-20:])
+            investigation_id = journal.investigation_id
+            
+        if investigation_id not in list_journals():
+            return f"Journal not found: {investigation_id}. Known journals: " + ", ".join(list_journals()[-20:])
+            
+        report_path = await asyncio.to_thread(build_report, investigation_id)
+        return f"Investigation report rebuilt: {report_path}"
+        
+    except Exception as e:
+        error_msg = f"Error exporting investigation report: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tarfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .shell_tool import run_shell
+
+logger = logging.getLogger(__name__)
+
+INSTALL_REGISTRY_PATH = os.getenv("INSTALL_REGISTRY_PATH", "/workspace/.install_registry.json")
+TOOL_BUNDLE_DIR = os.getenv("TOOL_BUNDLE_DIR", "/workspace/tool_bundles")
+TOOL_INSTALL_PREFIX = os.getenv("TOOL_INSTALL_PREFIX", "/usr/local")
+APT_UPDATE_TTL = int(os.getenv("APT_UPDATE_TTL", str(6 * 3600)))
+INSTALL_TIMEOUT = 600
+
+# tool name -> (method, package, binary)
+KNOWN_TOOLS: Dict[str, Tuple[str, str, str]] = {
+    'theharvester': ('apt', 'theharvester', 'theHarvester'),
+    'nmap': ('apt', 'nmap', 'nmap'),
+    'masscan': ('apt', 'masscan', 'masscan'),
+    'subfinder': ('go', 'github.com/projectdiscovery/subfinder/v2/cmd/subfinder@latest', 'subfinder'),
+    'amass': ('go', 'github.com/OWASP/Amass/v3/...@master', 'amass'),
+    'nuclei': ('go', 'github.com/projectdiscovery/nuclei/v2/cmd/nuclei@latest', 'nuclei'),
+    'shodan': ('pip', 'shodan', 'shodan'),
+    'censys': ('pip', 'censys', 'censys'),
+}
+
+
+class InstallRegistry:
+    """
+    Record of installed OSINT tools (method, version, path) and of the last
+    ``apt-get update``, persisted as JSON so it survives restarts.
+    """
+
+    def __init__(self, path: str = INSTALL_REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {"tools": {}, "apt_updated_at": 0}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._data.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable install registry {path}: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, tool_name: str) -> Optional[dict]:
+        """Registry entry for a tool, or None if unknown or its binary is gone."""
+        with self._lock:
+            entry = self._data["tools"].get(tool_name)
+        if entry and entry.get("path") and not os.path.exists(entry["path"]):
+            return None
+        return entry
+
+    def record(self, tool_name: str, method: str, package: str, version: Optional[str], path: Optional[str]):
+        with self._lock:
+            self._data["tools"][tool_name] = {
+                "method": method,
+                "package": package,
+                "version": version,
+                "path": path,
+                "installed_at": time.time(),
+            }
+            self._save()
+
+    def apt_index_fresh(self) -> bool:
+        with self._lock:
+            return time.time() - self._data.get("apt_updated_at", 0) < APT_UPDATE_TTL
+
+    def mark_apt_updated(self):
+        with self._lock:
+            self._data["apt_updated_at"] = time.time()
+            self._save()
+
+
+_registry: Optional[InstallRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_install_registry() -> InstallRegistry:
+    """Get the process-wide install registry, loading it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = InstallRegistry()
+        return _registry
+
+
+def find_binary(binary: str) -> Optional[str]:
+    """Locate a binary on PATH or in the Go bin directory."""
+    go_bin = os.path.join(os.getenv("GOPATH", os.path.expanduser("~/go")), "bin")
+    return shutil.which(binary) or shutil.which(binary, path=go_bin)
+
+
+def _succeeded(result: str) -> bool:
+    return "Return Code: 0\n" in result
+
+
+async def _command_output(command: str) -> Optional[str]:
+    """Output of a quick command, or None if it failed."""
+    result = await run_shell(command, timeout=60)
+    if not _succeeded(result):
+        return None
+    return result.split("Output:\n", 1)[-1].strip()
+
+
+# Parallel tool calls would otherwise all see a stale index and fight over the apt lock
+_apt_update_lock = asyncio.Lock()
+
+
+async def _apt_update(registry: InstallRegistry) -> Optional[str]:
+    """Run apt-get update unless it already ran within APT_UPDATE_TTL."""
+    if registry.apt_index_fresh():
+        return None
+    async with _apt_update_lock:
+        # Another call may have updated the index while this one waited
+        if registry.apt_index_fresh():
+            return None
+        result = await run_shell("apt-get update", timeout=INSTALL_TIMEOUT)
+        if _succeeded(result):
+            registry.mark_apt_updated()
+            return None
+        return result
+
+
+async def _detect_version(method: str, package: str) -> Optional[str]:
+    if method == "apt":
+        return await _command_output(f"dpkg-query -W -f='${{Version}}' {package}")
+    if method == "pip":
+        output = await _command_output(f"pip3 show {package}")
+        for line in (output or "").splitlines():
+            if line.startswith("Version:"):
+                return line.split(":", 1)[1].strip()
+        return None
+    if method == "go":
+        return package.rsplit("@", 1)[-1] if "@" in package else None
+    return None
+
+
+def _bundle_path(tool_name: str) -> Optional[str]:
+    for extension in (".tar.gz", ".tgz", ".tar"):
+        path = os.path.join(TOOL_BUNDLE_DIR, f"{tool_name}{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _extract_bundle(bundle: str):
+    """Unpack a prebuilt bundle (laid out as bin/, lib/, ...) into TOOL_INSTALL_PREFIX."""
+    prefix = os.path.realpath(TOOL_INSTALL_PREFIX)
+    with tarfile.open(bundle) as archive:
+        for member in archive.getmembers():
+            targets = [os.path.join(prefix, member.name)]
+            if member.issym() or member.islnk():
+                base = prefix if member.islnk() else os.path.dirname(targets[0])
+                targets.append(os.path.join(base, member.linkname))
+            for target in targets:
+                # "./" entries resolve to the prefix itself, which is fine
+                if os.path.commonpath([prefix, os.path.realpath(target)]) != prefix:
+                    raise ValueError(f"Refusing bundle member outside {prefix}: {member.name}")
+        archive.extractall(prefix)
+
+
+async def _install_with(method: str, package: str, registry: InstallRegistry) -> str:
+    if method == "apt":
+        update_error = await _apt_update(registry)
+        if update_error:
+            return update_error
+        return await run_shell(f"DEBIAN_FRONTEND=noninteractive apt-get install -y {package}", timeout=INSTALL_TIMEOUT)
+    if method == "go":
+        return await run_shell(f"go install -v {package}", timeout=INSTALL_TIMEOUT)
+    return await run_shell(f"pip3 install {package}", timeout=INSTALL_TIMEOUT)
+
+
+async def _probe_sources(tool_name: str, registry: InstallRegistry) -> Optional[str]:
+    """Check pip and apt for a package concurrently; pip wins when both have it."""
+    async def apt_available() -> bool:
+        await _apt_update(registry)
+        return await _command_output(f"apt-cache show {tool_name}") is not None
+
+    async def pip_available() -> bool:
+        return await _command_output(f"pip3 index versions {tool_name}") is not None
+
+    on_pip, on_apt = await asyncio.gather(pip_available(), apt_available())
+    if on_pip:
+        return "pip"
+    if on_apt:
+        return "apt"
+    return None
+
+
+async def install_package(tool_name: str, install_command: Optional[str] = None, force: bool = False) -> str:
+    """
+    Install a tool unless the registry or PATH shows it is already available.
+
+    Order: registry hit, binary already on PATH, prebuilt bundle from
+    TOOL_BUNDLE_DIR, custom command, known install method, then whichever of
+    pip or apt has the package.
+
+    Returns:
+        Installation result
+    """
+    registry = get_install_registry()
+    key = tool_name.lower()
+    method, package, binary = KNOWN_TOOLS.get(key, (None, tool_name, tool_name))
+
+    if not force:
+        entry = registry.get(key)
+        if entry:
+            return (
+                f"{tool_name} already installed via {entry['method']} "
+                f"(version {entry.get('version') or 'unknown'}, path {entry.get('path') or 'unknown'})"
+            )
+        path = find_binary(binary)
+        if path and not install_command:
+            registry.record(key, "preinstalled", binary, None, path)
+            return f"{tool_name} already available at {path}"
+
+    bundle = _bundle_path(key)
+    if bundle and not install_command:
+        try:
+            await asyncio.to_thread(_extract_bundle, bundle)
+            path = find_binary(binary)
+            if path:
+                registry.record(key, "bundle", bundle, None, path)
+                return f"Installed {tool_name} from bundle {bundle} ({path})"
+            logger.warning(f"Bundle {bundle} did not provide {binary}, falling back to package install")
+        except Exception as e:
+            logger.warning(f"Could not install bundle {bundle}: {e}")
+
+    if install_command:
+        result = await run_shell(install_command, timeout=INSTALL_TIMEOUT)
+        if _succeeded(result):
+            registry.record(key, "custom", install_command, None, find_binary(binary))
+        return result
+
+    if method is None:
+        method = await _probe_sources(tool_name, registry)
+        if method is None:
+            return f"Could not install {tool_name}. Try providing a custom install command."
+
+    result = await _install_with(method, package, registry)
+    if _succeeded(result):
+        path = find_binary(binary)
+        registry.record(key, method, package, await _detect_version(method, package), path)
+    return result
@@ -0,0 +1,276 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import os
+import resource
+import secrets
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from .cache import failure_scope
+from .shell_tool import SHELL_LOG_DIR, ShellRun, get_background_loop
+
+logger = logging.getLogger(__name__)
+
+JOB_STATE_DIR = os.getenv("JOB_STATE_DIR", "/workspace/jobs")
+JOB_MAX_CONCURRENT = int(os.getenv("JOB_MAX_CONCURRENT", "4"))
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "3600"))
+JOB_CPU_SECONDS = int(os.getenv("JOB_CPU_SECONDS", "3600"))
+JOB_MEMORY_MB = int(os.getenv("JOB_MEMORY_MB", "4096"))
+
+JOB_KINDS = ("shell", "maigret")
+FINAL_STATES = ("finished", "failed", "timeout", "cancelled", "interrupted")
+
+# Worker processes share JOB_STATE_DIR: each job records the process that runs it
+JOB_OWNER = f"{socket.gethostname()}-{os.getpid()}"
+# Per-process tag in job IDs so workers starting jobs in the same second don't collide
+_ID_TAG = secrets.token_hex(2)
+
+
+def _owner_gone(owner: Optional[str]) -> bool:
+    """Whether a job's owner is this process or a dead one on this host (jobs without an owner count as gone)."""
+    if not owner or owner == JOB_OWNER:
+        return True
+    host, _, pid = owner.rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        # Another host's worker; it handles its own jobs
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+class Job:
+    """A long-running command tracked by the job manager and persisted to disk."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, target: str, timeout: int, working_dir: Optional[str] = None):
+        self.id = f"job-{int(time.time())}-{_ID_TAG}-{next(self._ids)}"
+        self.owner = JOB_OWNER
+        self.kind = kind
+        self.target = target
+        self.timeout = timeout
+        self.working_dir = working_dir
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.returncode: Optional[int] = None
+        self.error: Optional[str] = None
+        self.log_path = os.path.join(SHELL_LOG_DIR, f"{self.id}.log")
+        self.future: Optional[Future] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "owner": self.owner,
+            "kind": self.kind,
+            "target": self.target,
+            "timeout": self.timeout,
+            "working_dir": self.working_dir,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "returncode": self.returncode,
+            "error": self.error,
+            "log_path": self.log_path,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        job = cls.__new__(cls)
+        job.future = None
+        job.owner = None
+        for key, value in data.items():
+            setattr(job, key, value)
+        return job
+
+    def save(self):
+        """Persist job state atomically so it survives bot restarts."""
+        os.makedirs(JOB_STATE_DIR, exist_ok=True)
+        path = os.path.join(JOB_STATE_DIR, f"{self.id}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def summary(self) -> str:
+        if self.started_at and not self.finished_at:
+            elapsed = f", running {time.time() - self.started_at:.0f}s"
+        elif self.started_at and self.finished_at:
+            elapsed = f", took {self.finished_at - self.started_at:.0f}s"
+        else:
+            elapsed = ""
+        code = f", return code {self.returncode}" if self.returncode is not None else ""
+        error = f", error: {self.error}" if self.error else ""
+        return f"{self.id} [{self.kind}] {self.status}{elapsed}{code}{error}: {self.target}"
+
+
+class JobManager:
+    """
+    Runs long OSINT commands in the background with bounded concurrency.
+
+    Jobs execute on the shared background loop from shell_tool, so they keep
+    running after the agent turn that started them ends. At most
+    JOB_MAX_CONCURRENT jobs run at once; the rest wait in FIFO order. Shell
+    jobs get CPU-time and address-space limits (JOB_CPU_SECONDS,
+    JOB_MEMORY_MB; 0 disables a limit). Job state is stored as JSON in
+    JOB_STATE_DIR; jobs that were running when the process died are reported
+    as interrupted on the next start. Jobs of other live worker processes
+    sharing the directory are left to them.
+    """
+
+    def __init__(self, max_concurrent: int = JOB_MAX_CONCURRENT):
+        self.jobs: Dict[str, Job] = {}
+        self._loop = get_background_loop()
+        self._semaphore = asyncio.run_coroutine_threadsafe(
+            self._make_semaphore(max(1, max_concurrent)), self._loop
+        ).result()
+        self._load()
+
+    @staticmethod
+    async def _make_semaphore(value: int) -> asyncio.Semaphore:
+        # Created on the background loop that will use it
+        return asyncio.Semaphore(value)
+
+    def _load(self):
+        if not os.path.isdir(JOB_STATE_DIR):
+            return
+        for name in os.listdir(JOB_STATE_DIR):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(JOB_STATE_DIR, name)) as f:
+                    job = Job.from_dict(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable job state {name}: {e}")
+                continue
+            if not _owner_gone(job.owner):
+                continue
+            if job.status not in FINAL_STATES:
+                job.status = "interrupted"
+                job.error = "bot restarted while the job was active"
+            job.owner = JOB_OWNER
+            job.save()
+            self.jobs[job.id] = job
+
+    @staticmethod
+    def _rlimits() -> dict:
+        limits = {}
+        if JOB_CPU_SECONDS > 0:
+            limits[resource.RLIMIT_CPU] = (JOB_CPU_SECONDS, JOB_CPU_SECONDS)
+        if JOB_MEMORY_MB > 0:
+            memory = JOB_MEMORY_MB * 1024 * 1024
+            limits[resource.RLIMIT_AS] = (memory, memory)
+        return limits
+
+    def _set_status(self, job: Job, status: str, **fields):
+        job.status = status
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.save()
+
+    async def _run_shell(self, job: Job):
+        run = ShellRun(job.target, job.timeout, job.working_dir, rlimits=self._rlimits(), log_path=job.log_path)
+        await run.execute()
+        if run.timed_out:
+            self._set_status(job, "timeout", returncode=run.returncode)
+        else:
+            self._set_status(job, "finished" if run.returncode == 0 else "failed", returncode=run.returncode)
+
+    async def _run_maigret(self, job: Job):
+        from .maigret_tool import maigret_search
+        # Maigret runs in its own container pool, so only the timeout applies here
+        with failure_scope() as status:
+            result = await asyncio.wait_for(maigret_search.entrypoint(username=job.target), timeout=job.timeout)
+        with open(job.log_path, "a", encoding="utf-8") as f:
+            f.write(result)
+        if status.get("timed_out"):
+            self._set_status(job, "timeout")
+        elif status.get("failed"):
+            self._set_status(job, "failed", error=status["failed"])
+        else:
+            self._set_status(job, "finished")
+
+    async def _execute(self, job: Job):
+        async with self._semaphore:
+            if job.status == "cancelled":
+                return
+            self._set_status(job, "running", started_at=time.time())
+            logger.info(f"Starting job {job.summary()}")
+            try:
+                if job.kind == "maigret":
+                    await self._run_maigret(job)
+                else:
+                    await self._run_shell(job)
+            except asyncio.CancelledError:
+                self._set_status(job, "cancelled")
+                raise
+            except asyncio.TimeoutError:
+                self._set_status(job, "timeout")
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                self._set_status(job, "failed", error=str(e))
+            finally:
+                job.finished_at = time.time()
+                job.save()
+
+    def start(self, kind: str, target: str, timeout: int = JOB_TIMEOUT, working_dir: Optional[str] = None) -> Job:
+        """Queue a job and return immediately."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}' (expected one of {', '.join(JOB_KINDS)})")
+        job = Job(kind, target, timeout, working_dir)
+        os.makedirs(os.path.dirname(job.log_path), exist_ok=True)
+        open(job.log_path, "ab").close()
+        job.save()
+        self.jobs[job.id] = job
+        # Fresh context: the job outlives the agent turn, so it must not inherit
+        # that turn's journal or progress reporter
+        job.future = contextvars.Context().run(
+            asyncio.run_coroutine_threadsafe, self._execute(job), self._loop
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return sorted(self.jobs.values(), key=lambda job: job.created_at)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; running commands are killed."""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINAL_STATES:
+            return job
+        if job.status == "queued":
+            self._set_status(job, "cancelled", finished_at=time.time())
+        if job.future:
+            job.future.cancel()
+        return job
+
+    def running_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "running")
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Get the process-wide job manager, creating it on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
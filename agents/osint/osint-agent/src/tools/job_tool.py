@@ -0,0 +1,131 @@
+import os
+import logging
+from agno.tools import tool
+from typing import Optional
+from .file_tool import READ_MAX_BYTES
+from .job_manager import FINAL_STATES, JOB_TIMEOUT, get_job_manager
+
+logger = logging.getLogger(__name__)
+
+
+@tool
+async def start_job(
+    command: str,
+    kind: str = "shell",
+    timeout: int = JOB_TIMEOUT,
+    working_dir: Optional[str] = None
+) -> str:
+    """
+    Start a slow scan as a background job and return immediately. Use this for
+    long-running tools (nmap, amass, full Maigret searches) so several can run
+    in parallel while you keep investigating; collect results with job_status
+    and job_output.
+
+    Args:
+        command: Shell command to run, or the username to search for when kind is "maigret"
+        kind: "shell" for a shell command, "maigret" for a Maigret username search
+        timeout: Maximum run time in seconds (default 3600)
+        working_dir: Working directory for shell jobs
+
+    Returns:
+        Job ID and how to follow up on it
+    """
+    try:
+        job = get_job_manager().start(kind, command, timeout, working_dir)
+        logger.info(f"Queued job {job.summary()}")
+        return (
+            f"Started job {job.id} ({kind}): {command}\n"
+            f"Check progress with job_status(job_id='{job.id}') and read results with job_output."
+        )
+    except Exception as e:
+        error_msg = f"Error starting job: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+@tool
+async def job_status(job_id: Optional[str] = None) -> str:
+    """
+    Show the status of a background job, or of all jobs.
+
+    Args:
+        job_id: Job to show; omit to list every job
+
+    Returns:
+        Job status summary
+    """
+    manager = get_job_manager()
+    if job_id:
+        job = manager.get(job_id)
+        if job is None:
+            return f"Error: Unknown job '{job_id}'"
+        size = os.path.getsize(job.log_path) if os.path.exists(job.log_path) else 0
+        return f"{job.summary()}\nOutput: {size} bytes (log: {job.log_path})"
+
+    jobs = manager.list()
+    if not jobs:
+        return "No background jobs"
+    lines = [f"Jobs ({manager.running_count()} running):"]
+    lines.extend(job.summary() for job in jobs)
+    return "\n".join(lines)
+
+
+@tool
+async def job_output(job_id: str, offset: int = 0, max_bytes: int = READ_MAX_BYTES) -> str:
+    """
+    Read the output of a background job, which may still be running.
+
+    Args:
+        job_id: Job to read
+        offset: Byte offset to start reading at; negative values read from the end
+        max_bytes: Maximum bytes to return (capped at FILE_READ_MAX_BYTES)
+
+    Returns:
+        Job output chunk, with the offset to continue from
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return f"Error: Unknown job '{job_id}'"
+    if not os.path.exists(job.log_path):
+        return f"Job {job_id} has no output yet ({job.status})"
+
+    try:
+        max_bytes = max(1, min(max_bytes, READ_MAX_BYTES))
+        size = os.path.getsize(job.log_path)
+        start = max(0, size + offset) if offset < 0 else min(offset, size)
+        with open(job.log_path, "rb") as f:
+            f.seek(start)
+            data = f.read(max_bytes)
+        end = start + len(data)
+        header = f"Job {job.summary()}\nOutput bytes {start}-{end} of {size}:\n"
+        footer = ""
+        if end < size:
+            footer = f"\n[More output: call job_output with job_id='{job_id}', offset={end}]"
+        elif job.status in ("queued", "running"):
+            footer = f"\n[Job still running: call job_output again with offset={end} for new output]"
+        return header + data.decode("utf-8", errors="ignore") + footer
+    except Exception as e:
+        error_msg = f"Error reading output of job {job_id}: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+@tool
+async def cancel_job(job_id: str) -> str:
+    """
+    Cancel a queued or running background job.
+
+    Args:
+        job_id: Job to cancel
+
+    Returns:
+        Cancellation result
+    """
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        return f"Error: Unknown job '{job_id}'"
+    if job.status in FINAL_STATES:
+        return f"Job already ended: {job.summary()}"
+    manager.cancel(job_id)
+    return f"Cancelled job {job.id}: {job.target}"
@@ -0,0 +1,228 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "/workspace/journal")
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "2.0"))
+JOURNAL_BATCH_SIZE = int(os.getenv("JOURNAL_BATCH_SIZE", "50"))
+JOURNAL_MAX_BYTES = int(os.getenv("JOURNAL_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Journal of the investigation running in the current task, set by OSINTAgent
+current_journal: ContextVar[Optional["EvidenceJournal"]] = ContextVar("current_journal", default=None)
+
+
+def safe_name(value: str) -> str:
+    """Turn an arbitrary identifier into a safe file name component."""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", value)[:100]
+
+
+class EvidenceJournal:
+    """
+    Append-only, line-delimited JSON evidence log for one investigation.
+
+    Records are buffered in memory and written in batches, either when the
+    batch is full or by the background flusher every JOURNAL_FLUSH_INTERVAL
+    seconds; each flush is fsynced. When the active file grows beyond
+    JOURNAL_MAX_BYTES it is rotated to a numbered, gzip-compressed segment.
+    """
+
+    def __init__(self, investigation_id: str):
+        self.investigation_id = investigation_id
+        self.path = os.path.join(JOURNAL_DIR, f"{investigation_id}.jsonl")
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._seq = 0
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+
+    def append(self, record_type: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Buffer a record for writing.
+
+        Args:
+            record_type: Record kind (tool_result, report, note, ...)
+            **fields: Record payload
+
+        Returns:
+            The record as written, including timestamp and sequence number
+        """
+        with self._lock:
+            self._seq += 1
+            record = {
+                "ts": datetime.utcnow().isoformat(),
+                "seq": self._seq,
+                "investigation": self.investigation_id,
+                "type": record_type,
+                **fields,
+            }
+            self._buffer.append(json.dumps(record, default=str))
+            should_flush = len(self._buffer) >= JOURNAL_BATCH_SIZE
+        if should_flush:
+            self.flush()
+        return record
+
+    def log_tool_result(self, tool_name: str, arguments: Dict[str, Any], result: Any, duration: float):
+        """Record a tool call with the SHA-256 of its result."""
+        text = result if isinstance(result, str) else json.dumps(result, default=str)
+        self.append(
+            "tool_result",
+            tool=tool_name,
+            arguments=arguments,
+            duration=round(duration, 3),
+            sha256=hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest(),
+            result=text,
+        )
+
+    def flush(self):
+        """Write buffered records to disk and fsync."""
+        with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.getsize(self.path) >= JOURNAL_MAX_BYTES:
+                self._rotate()
+
+    def _rotate(self):
+        """Compress the active file into the next numbered segment."""
+        index = len(_segments(self.investigation_id)) + 1
+        segment = os.path.join(JOURNAL_DIR, f"{self.investigation_id}.{index:04d}.jsonl.gz")
+        with open(self.path, "rb") as source, gzip.open(segment, "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(self.path)
+        logger.info(f"Rotated evidence journal {self.investigation_id} to {segment}")
+
+
+def _segments(investigation_id: str) -> List[str]:
+    """Rotated, compressed segments of a journal in write order."""
+    prefix = f"{investigation_id}."
+    if not os.path.isdir(JOURNAL_DIR):
+        return []
+    return sorted(
+        os.path.join(JOURNAL_DIR, name)
+        for name in os.listdir(JOURNAL_DIR)
+        if name.startswith(prefix) and name.endswith(".jsonl.gz")
+    )
+
+
+def iter_records(investigation_id: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream every record of an investigation journal, oldest first.
+
+    Args:
+        investigation_id: Journal to read
+
+    Yields:
+        Decoded journal records
+    """
+    journal = _journals.get(investigation_id)
+    if journal:
+        journal.flush()
+    paths = _segments(investigation_id)
+    active = os.path.join(JOURNAL_DIR, f"{investigation_id}.jsonl")
+    if os.path.exists(active):
+        paths.append(active)
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def list_journals() -> List[str]:
+    """IDs of all investigations with a journal on disk."""
+    if not os.path.isdir(JOURNAL_DIR):
+        return []
+    return sorted({name.split(".")[0] for name in os.listdir(JOURNAL_DIR) if ".jsonl" in name})
+
+
+def build_report(investigation_id: str, output_dir: str = "/workspace/reports") -> str:
+    """
+    Render a Markdown report by streaming an investigation journal.
+
+    Args:
+        investigation_id: Journal to render
+        output_dir: Directory for the report file
+
+    Returns:
+        Path to the written report
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"{investigation_id}.md")
+    evidence_count = 0
+    with open(report_path, "w", encoding="utf-8") as out:
+        out.write(f"# Investigation {investigation_id}\n\n")
+        evidence = []
+        for record in iter_records(investigation_id):
+            if record["type"] == "report":
+                out.write(f"## Findings: {record.get('target')} ({record['ts']})\n\n")
+                out.write(f"Tools used: {', '.join(map(str, record.get('tools_used') or []))}\n\n")
+                out.write(f"{record.get('findings', '')}\n\n")
+            elif record["type"] == "tool_result":
+                evidence_count += 1
+                # Only the compact evidence line is kept; results stay in the journal
+                evidence.append(
+                    f"| {record['seq']} | {record['ts']} | {record['tool']} | "
+                    f"`{json.dumps(record.get('arguments'), default=str)}` | "
+                    f"{record.get('duration')}s | `{record['sha256'][:16]}` |\n"
+                )
+        out.write(f"## Evidence log ({evidence_count} tool results)\n\n")
+        out.write("| # | Time (UTC) | Tool | Arguments | Duration | SHA-256 |\n")
+        out.write("|---|---|---|---|---|---|\n")
+        out.writelines(evidence)
+    return report_path
+
+
+_journals: Dict[str, EvidenceJournal] = {}
+_journals_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+
+def _flush_loop():
+    while True:
+        time.sleep(JOURNAL_FLUSH_INTERVAL)
+        for journal in list(_journals.values()):
+            try:
+                journal.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush journal {journal.investigation_id}: {e}")
+
+
+def get_journal(investigation_id: str) -> EvidenceJournal:
+    """Get the journal for an investigation, starting the background flusher on first use."""
+    global _flusher
+    investigation_id = safe_name(investigation_id)
+    with _journals_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="journal-flusher", daemon=True)
+            _flusher.start()
+        if investigation_id not in _journals:
+            _journals[investigation_id] = EvidenceJournal(investigation_id)
+        return _journals[investigation_id]
+
+
+def close_journal(investigation_id: str):
+    """Flush a journal and stop tracking it (the file stays on disk)."""
+    with _journals_lock:
+        journal = _journals.pop(investigation_id, None)
+    if journal:
+        journal.flush()
+
+
+def new_investigation_id(session_id: str) -> str:
+    """Build a unique investigation ID from a session ID and the current time."""
+    return safe_name(f"{session_id}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}")
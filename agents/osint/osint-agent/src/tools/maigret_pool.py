@@ -0,0 +1,250 @@
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import uuid
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAIGRET_IMAGE = os.getenv("MAIGRET_IMAGE", "soxoj/maigret:latest")
+MAIGRET_CONTAINER = os.getenv("MAIGRET_CONTAINER", "osint-maigret-worker")
+MAIGRET_WORKERS = int(os.getenv("MAIGRET_WORKERS", "2"))
+MAIGRET_JOB_TIMEOUT = int(os.getenv("MAIGRET_JOB_TIMEOUT", "900"))
+
+# Every bot process execs into the same container; tag PID files so their job IDs don't clash
+_PROCESS_TAG = uuid.uuid4().hex[:8]
+
+
+class MaigretJob:
+    """A single Maigret invocation waiting in the pool queue."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, args: List[str], timeout: int, on_line: Optional[Callable[[str], bool]] = None):
+        self.id = next(self._ids)
+        self.args = args
+        self.timeout = timeout
+        self.on_line = on_line
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled = False
+
+    @property
+    def pid_file(self) -> str:
+        return f"/tmp/maigret_job_{_PROCESS_TAG}_{self.id}.pid"
+
+
+class MaigretPool:
+    """
+    Long-lived Maigret worker pool.
+
+    Keeps one warm Maigret container running (``sleep infinity``) and runs
+    searches inside it with ``exec``, so repeated searches skip container
+    creation and image startup. Jobs go through a queue consumed by a
+    configurable number of workers, which bounds concurrent searches.
+    The container is shared by all bot processes and left running when
+    they exit.
+
+    The pool owns a private event loop on a daemon thread so it can be shared
+    by callers running on any loop.
+    """
+
+    def __init__(self, workers: int = MAIGRET_WORKERS):
+        self.runtime = os.getenv("CONTAINER_RUNTIME", "docker")
+        self.workers = max(1, workers)
+        self._loop = asyncio.new_event_loop()
+        self._queue: Optional[asyncio.Queue] = None
+        self._container_lock: Optional[asyncio.Lock] = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="maigret-pool", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._container_lock = asyncio.Lock()
+        for index in range(self.workers):
+            self._loop.create_task(self._worker(index))
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _exec(self, *cmd: str, timeout: int = 60) -> tuple:
+        """Run a container runtime command and return (returncode, output)."""
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return -1, f"Timed out after {timeout}s: {' '.join(cmd)}"
+        return process.returncode, stdout.decode('utf-8', errors='ignore')
+
+    async def _container_state(self) -> Optional[bool]:
+        """Whether the warm container is running, or None if it doesn't exist."""
+        code, output = await self._exec(
+            self.runtime, "inspect", "-f", "{{.State.Running}}", MAIGRET_CONTAINER
+        )
+        if code != 0:
+            return None
+        return output.strip() == "true"
+
+    async def _ensure_container(self):
+        """
+        Start the warm Maigret container unless it is already running.
+
+        Other bot processes may be using or starting the same container, so a
+        running container is never removed and losing a start race is fine.
+        """
+        async with self._container_lock:
+            state = await self._container_state()
+            if state:
+                return
+
+            logger.info(f"Starting warm Maigret container {MAIGRET_CONTAINER}")
+            if state is False:
+                code, _ = await self._exec(self.runtime, "start", MAIGRET_CONTAINER)
+                if code == 0 or await self._container_state():
+                    return
+                # Stopped and unable to start; replace it unless someone else just did
+                await self._exec(self.runtime, "rm", MAIGRET_CONTAINER)
+            code, output = await self._exec(
+                self.runtime, "run", "-d",
+                "--name", MAIGRET_CONTAINER,
+                "-v", "/workspace:/app/reports",
+                "--entrypoint", "sleep",
+                MAIGRET_IMAGE,
+                "infinity",
+                timeout=600
+            )
+            if code != 0 and not await self._container_state():
+                raise RuntimeError(f"Could not start Maigret container: {output.strip()}")
+
+    async def _kill_job(self, job: MaigretJob):
+        """Kill a job's Maigret process inside the container."""
+        await self._exec(
+            self.runtime, "exec", MAIGRET_CONTAINER,
+            "sh", "-c", f"[ -f {job.pid_file} ] && kill $(cat {job.pid_file}); rm -f {job.pid_file}"
+        )
+
+    async def _terminate(self, job: MaigretJob, process: asyncio.subprocess.Process):
+        """Stop a running job both inside the container and locally."""
+        await self._kill_job(job)
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
+    async def _run_job(self, job: MaigretJob) -> str:
+        await self._ensure_container()
+
+        # Record the in-container PID so timeouts and cancellations can kill
+        # the search instead of leaving it running inside the warm container
+        cmd = [
+            self.runtime, "exec", MAIGRET_CONTAINER,
+            "sh", "-c", f'echo $$ > {job.pid_file} && exec maigret "$@"', "maigret",
+            *job.args
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        lines: List[str] = []
+        stopped_early = False
+
+        async def read_output():
+            nonlocal stopped_early
+            async for raw in process.stdout:
+                line = raw.decode('utf-8', errors='ignore')
+                lines.append(line)
+                if job.on_line and job.on_line(line.rstrip('\n')):
+                    stopped_early = True
+                    return
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(read_output(), timeout=job.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await self._terminate(job, process)
+            raise
+
+        if stopped_early:
+            logger.info(f"Maigret job {job.id} stopped early on caller request")
+            await self._terminate(job, process)
+        return "".join(lines)
+
+    async def _worker(self, index: int):
+        while True:
+            job: MaigretJob = await self._queue.get()
+            try:
+                if job.cancelled:
+                    continue
+                logger.info(f"Maigret worker {index} running job {job.id}: {' '.join(job.args)}")
+                job.task = asyncio.ensure_future(self._run_job(job))
+                try:
+                    job.future.set_result(await job.task)
+                except asyncio.TimeoutError:
+                    job.future.set_exception(
+                        TimeoutError(f"Maigret job timed out after {job.timeout} seconds")
+                    )
+                except asyncio.CancelledError:
+                    if not job.future.done():
+                        job.future.cancel()
+                except Exception as e:
+                    job.future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _submit(self, args: List[str], timeout: int, on_line: Optional[Callable[[str], bool]]) -> str:
+        job = MaigretJob(args, timeout, on_line)
+        await self._queue.put(job)
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            job.cancelled = True
+            if job.task:
+                job.task.cancel()
+            raise
+
+    async def run(
+        self,
+        args: List[str],
+        timeout: int = MAIGRET_JOB_TIMEOUT,
+        on_line: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Queue a Maigret run and wait for its output.
+
+        Args:
+            args: Maigret command line arguments (without the ``maigret`` binary)
+            timeout: Maximum run time in seconds
+            on_line: Called from the pool thread with every output line as it
+                arrives; returning True stops the run early
+
+        Returns:
+            Combined stdout/stderr of the Maigret run (up to the stop point)
+        """
+        future = asyncio.run_coroutine_threadsafe(self._submit(args, timeout, on_line), self._loop)
+        return await asyncio.wrap_future(future)
+
+
+_pool: Optional[MaigretPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_maigret_pool() -> MaigretPool:
+    """Get the process-wide Maigret worker pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = MaigretPool()
+        return _pool
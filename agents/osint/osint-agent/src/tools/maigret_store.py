@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = os.getenv("MAIGRET_STORE_PATH", "/workspace/maigret.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    complete INTEGER NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    site TEXT NOT NULL,
+    status TEXT NOT NULL,
+    url TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scans_username_time ON scans(username, scanned_at);
+CREATE INDEX IF NOT EXISTS idx_profiles_scan ON profiles(scan_id, status);
+CREATE INDEX IF NOT EXISTS idx_profiles_username_site ON profiles(username, site);
+CREATE INDEX IF NOT EXISTS idx_profiles_site ON profiles(site, status);
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the Maigret results store, creating the schema on first use."""
+    os.makedirs(os.path.dirname(STORE_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(STORE_PATH, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _normalize_entry(info: dict) -> tuple:
+    """
+    Extract (status, url, metadata) from a Maigret report entry.
+
+    Handles both the flat ``{"status": "Claimed", "url": ...}`` layout and
+    Maigret's simple JSON report where status is a nested object.
+    """
+    status = info.get("status", "Unknown")
+    metadata = info.get("metadata") or info.get("ids_data")
+    url = info.get("url") or info.get("url_user")
+    if isinstance(status, dict):
+        url = url or status.get("url")
+        metadata = metadata or status.get("ids")
+        status = status.get("status", "Unknown")
+    return str(status), url, json.dumps(metadata) if metadata else None
+
+
+def record_scan(
+    username: str,
+    profiles: Dict[str, tuple],
+    complete: bool = True,
+    source: Optional[str] = None
+) -> int:
+    """
+    Store the results of one Maigret scan.
+
+    Args:
+        username: Username that was scanned
+        profiles: {site: (status, url, metadata_json)} for every checked site
+        complete: False for scans that were stopped early or timed out
+        source: Where the results came from (report path, "stream", ...)
+
+    Returns:
+        ID of the new scan
+    """
+    conn = _connect()
+    try:
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO scans (username, scanned_at, complete, source) VALUES (?, ?, ?, ?)",
+                (username, time.time(), int(complete), source),
+            )
+            scan_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO profiles (scan_id, username, site, status, url, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (scan_id, username, site, status, url, metadata)
+                    for site, (status, url, metadata) in profiles.items()
+                ],
+            )
+        logger.info(f"Stored Maigret scan {scan_id} for {username} ({len(profiles)} sites)")
+        return scan_id
+    finally:
+        conn.close()
+
+
+def record_hits(username: str, hits: Dict[str, str], complete: bool = True) -> int:
+    """Store streamed {site: url} hits as a scan of claimed profiles."""
+    return record_scan(
+        username,
+        {site: ("Claimed", url, None) for site, url in hits.items()},
+        complete=complete,
+        source="stream",
+    )
+
+
+def ingest_report(username: str, report_path: str) -> Optional[int]:
+    """
+    Ingest a Maigret JSON report into the store unless it was already ingested.
+
+    Args:
+        username: Username the report belongs to
+        report_path: Path to the JSON report
+
+    Returns:
+        Scan ID, or None if the report was already stored
+    """
+    source = f"{report_path}@{os.path.getmtime(report_path):.0f}"
+    conn = _connect()
+    try:
+        if conn.execute("SELECT 1 FROM scans WHERE source = ?", (source,)).fetchone():
+            return None
+    finally:
+        conn.close()
+
+    with open(report_path, "r") as f:
+        data = json.load(f)
+    entries = data.get(username, data)
+    profiles = {
+        site: _normalize_entry(info)
+        for site, info in entries.items()
+        if isinstance(info, dict)
+    }
+    return record_scan(username, profiles, complete=True, source=source)
+
+
+def _latest_scans(conn: sqlite3.Connection, username: str, limit: int, complete_only: bool) -> List[tuple]:
+    query = "SELECT id, scanned_at FROM scans WHERE username = ?"
+    if complete_only:
+        query += " AND complete = 1"
+    query += " ORDER BY scanned_at DESC, id DESC LIMIT ?"
+    return conn.execute(query, (username, limit)).fetchall()
+
+
+def claimed_profiles(username: str) -> Optional[dict]:
+    """
+    Get the claimed profiles from the latest scan of a username.
+
+    Returns:
+        {"scanned_at": ts, "profiles": [(site, url, metadata_json), ...]} or None
+    """
+    conn = _connect()
+    try:
+        scans = _latest_scans(conn, username, 1, complete_only=False)
+        if not scans:
+            return None
+        scan_id, scanned_at = scans[0]
+        rows = conn.execute(
+            "SELECT site, url, metadata FROM profiles WHERE scan_id = ? AND status = 'Claimed' ORDER BY site",
+            (scan_id,),
+        ).fetchall()
+        return {"scanned_at": scanned_at, "profiles": rows}
+    finally:
+        conn.close()
+
+
+def scan_diff(username: str) -> Optional[dict]:
+    """
+    Compare claimed sites between the two most recent complete scans.
+
+    Returns:
+        {"previous": ts, "latest": ts, "added": {site: url}, "removed": {site: url}} or None
+    """
+    conn = _connect()
+    try:
+        scans = _latest_scans(conn, username, 2, complete_only=True)
+        if len(scans) < 2:
+            return None
+
+        def claimed(scan_id: int) -> Dict[str, str]:
+            return dict(conn.execute(
+                "SELECT site, url FROM profiles WHERE scan_id = ? AND status = 'Claimed'", (scan_id,)
+            ).fetchall())
+
+        latest, previous = claimed(scans[0][0]), claimed(scans[1][0])
+        return {
+            "previous": scans[1][1],
+            "latest": scans[0][1],
+            "added": {site: url for site, url in latest.items() if site not in previous},
+            "removed": {site: url for site, url in previous.items() if site not in latest},
+        }
+    finally:
+        conn.close()
+
+
+def username_overlap(usernames: List[str]) -> Dict[str, List[str]]:
+    """
+    Find sites claimed by more than one of the given usernames (latest scan each).
+
+    Returns:
+        {site: [usernames...]} for sites shared by at least two usernames
+    """
+    conn = _connect()
+    try:
+        scan_ids = []
+        for username in usernames:
+            scans = _latest_scans(conn, username, 1, complete_only=False)
+            if scans:
+                scan_ids.append(scans[0][0])
+        if not scan_ids:
+            return {}
+
+        placeholders = ",".join("?" * len(scan_ids))
+        rows = conn.execute(
+            f"SELECT site, GROUP_CONCAT(username) FROM profiles "
+            f"WHERE scan_id IN ({placeholders}) AND status = 'Claimed' "
+            f"GROUP BY site HAVING COUNT(DISTINCT username) > 1 ORDER BY site",
+            scan_ids,
+        ).fetchall()
+        return {site: sorted(set(names.split(","))) for site, names in rows}
+    finally:
+        conn.close()
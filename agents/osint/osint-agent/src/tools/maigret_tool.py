@@ -1,41 +1,84 @@
 import asyncio
-import json
-import subprocess
 from agno.tools import tool
-from typing import Optional, List
+from .cache import cached_tool, report_failure
+from .maigret_pool import get_maigret_pool
+from . import maigret_store
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Optional, List
 import logging
 import os
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
+# Optional callback receiving "username @ site: url" messages as profiles are found
+maigret_progress: ContextVar[Optional[Callable[[str], None]]] = ContextVar("maigret_progress", default=None)
+
+# Maigret prints every claimed profile as "[+] Site: https://..."
+CLAIMED_LINE = re.compile(r"^\[\+\]\s+(.+?):\s+(\S+)")
+# ...after announcing each username as "[*] Checking username jdoe on:"
+CHECKING_LINE = re.compile(r"^\[\*\]\s+Checking username\s+(\S+)")
+
+def parse_claimed_line(line: str) -> Optional[tuple]:
+    """Parse a Maigret output line into (site, url) if it reports a claimed profile."""
+    match = CLAIMED_LINE.match(line.strip())
+    return (match.group(1), match.group(2)) if match else None
+
+def format_claimed_profiles(found: List[tuple]) -> str:
+    """Format streamed (site, url) hits as a short listing."""
+    if not found:
+        return "Claimed profiles: none found\n"
+    listing = f"Claimed profiles ({len(found)}):\n"
+    for site, url in found:
+        listing += f"  ✓ {site}: {url}\n"
+    return listing
+
 @tool
+@cached_tool(ttl=24 * 3600)
 async def maigret_search(
     username: str, 
     format: str = "json",
     use_all_sites: bool = False,
-    tags: Optional[List[str]] = None
+    tags: Optional[List[str]] = None,
+    max_hits: Optional[int] = None
 ) -> str:
     """
     Search for a username across social networks and platforms using Maigret.
+    Claimed profiles are collected while the scan is running; set max_hits to
+    stop as soon as enough profiles are confirmed instead of waiting for all sites.
     
     Args:
         username: Username to search for
         format: Output format (json, html, pdf, txt, csv, xmind)
         use_all_sites: Use all available sites instead of top 500
         tags: Filter sites by tags (e.g. ["photo", "dating", "us"])
+        max_hits: Stop the scan early once this many claimed profiles are found
         
     Returns:
         Search results and report location
     """
+    loop = asyncio.get_running_loop()
+    listener = maigret_progress.get()
+    found: List[tuple] = []
+    
+    def on_line(line: str) -> bool:
+        # Called from the Maigret pool thread for every output line
+        hit = parse_claimed_line(line)
+        if not hit:
+            return False
+        found.append(hit)
+        logger.info(f"Maigret hit for {username}: {hit[0]} {hit[1]}")
+        if listener:
+            loop.call_soon_threadsafe(listener, f"{username} @ {hit[0]}: {hit[1]}")
+        return bool(max_hits) and len(found) >= max_hits
+    
     try:
         logger.info(f"Starting Maigret username search for: {username}")
         
-        # Build container command for maigret (works with both Docker and Podman)
-        runtime = os.getenv("CONTAINER_RUNTIME", "docker")
-        docker_cmd = [
-            runtime, "run", "--rm", 
-            "-v", "/workspace:/app/reports",
-            "soxoj/maigret:latest",
+        # Run inside the warm Maigret worker pool (works with both Docker and Podman)
+        maigret_args = [
             username,
             f"--{format}",
             "--no-color",
@@ -44,49 +87,175 @@ async def maigret_search(
         ]
         
         if use_all_sites:
-            docker_cmd.append("-a")
+            maigret_args.append("-a")
             
         if tags:
-            docker_cmd.extend(["--tags", ",".join(tags)])
+            maigret_args.extend(["--tags", ",".join(tags)])
         
-        # Execute the command
-        process = await asyncio.create_subprocess_exec(
-            *docker_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT
-        )
-        
-        stdout, _ = await process.communicate()
-        output = stdout.decode('utf-8', errors='ignore')
+        started = time.time()
+        output = await get_maigret_pool().run(maigret_args, on_line=on_line)
+        stopped_early = bool(max_hits) and len(found) >= max_hits
         
-        # Check for generated report file
+        # Check for a report written by this run (not written when the scan is stopped early)
         report_path = f"/workspace/report_{username}.{format}"
-        report_exists = os.path.exists(report_path)
+        report_exists = (
+            os.path.exists(report_path)
+            and os.path.getmtime(report_path) >= started - 1
+            and not stopped_early
+        )
         
-        result = f"Maigret search completed for username: {username}\n"
+        if stopped_early:
+            result = f"Maigret search stopped early for username: {username} after {len(found)} claimed profiles\n"
+        else:
+            result = f"Maigret search completed for username: {username}\n"
         result += f"Format: {format}\n"
         result += f"Report file: {'Generated' if report_exists else 'Not found'} at {report_path}\n"
+        result += format_claimed_profiles(found)
         result += f"Output:\n{output}"
         
-        # If JSON format, try to parse and summarize findings
-        if format == "json" and report_exists:
-            try:
-                with open(report_path, 'r') as f:
-                    data = json.load(f)
-                    if username in data:
-                        profiles_found = len(data[username])
-                        result += f"\n\nSUMMARY: Found {profiles_found} potential profiles for '{username}'"
-            except Exception as e:
-                logger.warning(f"Could not parse JSON report: {e}")
+        # Index the full report (or the streamed hits) in the Maigret results store
+        try:
+            if format == "json" and report_exists:
+                maigret_store.ingest_report(username, report_path)
+            else:
+                maigret_store.record_hits(username, dict(found), complete=not stopped_early)
+            stored = maigret_store.claimed_profiles(username)
+            if stored:
+                result += f"\n\nSUMMARY: Found {len(stored['profiles'])} claimed profiles for '{username}'"
+        except Exception as e:
+            logger.warning(f"Could not store Maigret results: {e}")
         
         return result
         
+    except TimeoutError as e:
+        # Keep whatever was found before the deadline
+        logger.warning(f"Maigret search for {username} timed out with {len(found)} hits")
+        try:
+            maigret_store.record_hits(username, dict(found), complete=False)
+        except Exception as store_error:
+            logger.warning(f"Could not store Maigret results: {store_error}")
+        report_failure(f"timed out: {e}", timed_out=True)
+        return f"Maigret search timed out for username: {username} ({e})\n" + format_claimed_profiles(found)
     except Exception as e:
         error_msg = f"Error running Maigret search: {str(e)}"
         logger.error(error_msg)
+        report_failure(str(e))
         return error_msg
 
 @tool
+@cached_tool(ttl=24 * 3600)
+async def maigret_batch_search(
+    usernames: List[str],
+    use_all_sites: bool = False,
+    tags: Optional[List[str]] = None,
+    max_connections: int = 100
+) -> str:
+    """
+    Search several username variants in a single Maigret run and return a
+    username x site matrix of claimed profiles. Much faster than calling
+    maigret_search once per variant.
+    
+    Args:
+        usernames: Usernames to search for (e.g. ["jdoe", "john.doe", "jdoe99"])
+        use_all_sites: Use all available sites instead of top 500
+        tags: Filter sites by tags (e.g. ["photo", "dating", "us"])
+        max_connections: Maximum concurrent HTTP connections shared by the run
+        
+    Returns:
+        Per-username claimed profiles and a consolidated site matrix
+    """
+    usernames = list(dict.fromkeys(u.strip() for u in usernames if u.strip()))
+    if not usernames:
+        return "No usernames provided for batch search"
+    
+    loop = asyncio.get_running_loop()
+    listener = maigret_progress.get()
+    hits: dict = {username: {} for username in usernames}
+    current = {"username": usernames[0]}
+    
+    def on_line(line: str) -> bool:
+        # Maigret announces each username before checking its sites
+        match = CHECKING_LINE.match(line.strip())
+        if match and match.group(1) in hits:
+            current["username"] = match.group(1)
+            return False
+        hit = parse_claimed_line(line)
+        if hit:
+            hits[current["username"]][hit[0]] = hit[1]
+            if listener:
+                loop.call_soon_threadsafe(listener, f"{current['username']} @ {hit[0]}: {hit[1]}")
+        return False
+    
+    try:
+        logger.info(f"Starting Maigret batch search for {len(usernames)} usernames")
+        
+        # One Maigret process loads the site database once and checks every username
+        maigret_args = [
+            *usernames,
+            "--json", "simple",
+            "--no-color",
+            "--no-progressbar",
+            "-n", str(max_connections)
+        ]
+        
+        if use_all_sites:
+            maigret_args.append("-a")
+            
+        if tags:
+            maigret_args.extend(["--tags", ",".join(tags)])
+        
+        await get_maigret_pool().run(maigret_args, on_line=on_line)
+        result = f"Maigret batch search completed for {len(usernames)} usernames\n\n"
+        complete = True
+        
+    except TimeoutError as e:
+        logger.warning(f"Maigret batch search timed out: {e}")
+        result = f"Maigret batch search timed out ({e}); partial results:\n\n"
+        complete = False
+        report_failure(f"timed out: {e}", timed_out=True)
+    except Exception as e:
+        error_msg = f"Error running Maigret batch search: {str(e)}"
+        logger.error(error_msg)
+        report_failure(str(e))
+        return error_msg
+    
+    try:
+        for username, sites in hits.items():
+            maigret_store.record_hits(username, sites, complete=complete)
+    except Exception as e:
+        logger.warning(f"Could not store Maigret results: {e}")
+    
+    return result + format_hit_matrix(hits)
+
+def format_hit_matrix(hits: dict) -> str:
+    """
+    Format {username: {site: url}} as per-username listings plus a site matrix.
+    
+    Args:
+        hits: Claimed profile URLs keyed by username and site
+        
+    Returns:
+        Formatted listing and matrix (✓ = claimed, · = not found)
+    """
+    output = ""
+    for username, sites in hits.items():
+        output += f"{username}: {len(sites)} claimed profiles\n"
+        for site, url in sorted(sites.items()):
+            output += f"  ✓ {site}: {url}\n"
+    
+    all_sites = sorted({site for sites in hits.values() for site in sites})
+    if not all_sites:
+        return output
+    
+    width = max(len(site) for site in all_sites)
+    output += f"\nSITE MATRIX ({' | '.join(hits)}):\n"
+    for site in all_sites:
+        row = " ".join("✓" if site in sites else "·" for sites in hits.values())
+        output += f"  {site.ljust(width)}  {row}\n"
+    return output
+
+@tool
+@cached_tool(ttl=24 * 3600)
 async def maigret_parse_url(url: str, format: str = "json") -> str:
     """
     Parse a URL to extract information and search for associated usernames using Maigret.
@@ -101,12 +270,8 @@ async def maigret_parse_url(url: str, format: str = "json") -> str:
     try:
         logger.info(f"Starting Maigret URL parsing for: {url}")
         
-        # Build container command for maigret URL parsing (works with both Docker and Podman)
-        runtime = os.getenv("CONTAINER_RUNTIME", "docker")
-        docker_cmd = [
-            runtime, "run", "--rm",
-            "-v", "/workspace:/app/reports", 
-            "soxoj/maigret:latest",
+        # Run inside the warm Maigret worker pool (works with both Docker and Podman)
+        maigret_args = [
             "--parse", url,
             f"--{format}",
             "--no-color",
@@ -115,15 +280,7 @@ async def maigret_parse_url(url: str, format: str = "json") -> str:
             "-n", "200"
         ]
         
-        # Execute the command
-        process = await asyncio.create_subprocess_exec(
-            *docker_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT
-        )
-        
-        stdout, _ = await process.communicate()
-        output = stdout.decode('utf-8', errors='ignore')
+        output = await get_maigret_pool().run(maigret_args)
         
         result = f"Maigret URL analysis completed for: {url}\n"
         result += f"Format: {format}\n"
@@ -134,43 +291,47 @@ async def maigret_parse_url(url: str, format: str = "json") -> str:
     except Exception as e:
         error_msg = f"Error running Maigret URL parsing: {str(e)}"
         logger.error(error_msg)
+        report_failure(str(e))
         return error_msg
 
 @tool 
 async def read_maigret_report(username: str, format: str = "json") -> str:
     """
-    Read and analyze a Maigret report file.
+    Read the claimed profiles for a username from the Maigret results store.
+    A JSON report on disk is indexed into the store first if it is new.
     
     Args:
         username: Username that was searched
         format: Report format to read
         
     Returns:
-        Report contents or analysis
+        Claimed profiles from the latest scan, or report contents for non-JSON formats
     """
     try:
         report_path = f"/workspace/report_{username}.{format}"
         
-        if not os.path.exists(report_path):
-            return f"Report file not found: {report_path}"
-            
         if format == "json":
-            with open(report_path, 'r') as f:
-                data = json.load(f)
+            if os.path.exists(report_path):
+                maigret_store.ingest_report(username, report_path)
                 
-            if username in data:
-                profiles = data[username]
-                analysis = f"MAIGRET REPORT ANALYSIS for '{username}':\n"
-                analysis += f"Total profiles found: {len(profiles)}\n\n"
+            stored = maigret_store.claimed_profiles(username)
+            if not stored:
+                return f"No Maigret results stored for '{username}' and no report at {report_path}"
                 
-                for site, info in profiles.items():
-                    if info.get('status') == 'Claimed':
-                        analysis += f"✓ {site}: {info.get('url', 'N/A')}\n"
-                        if 'metadata' in info and info['metadata']:
-                            analysis += f"  Metadata: {info['metadata']}\n"
-                
-                return analysis
+            scanned = datetime.fromtimestamp(stored['scanned_at']).strftime('%Y-%m-%d %H:%M')
+            analysis = f"MAIGRET REPORT ANALYSIS for '{username}' (scan of {scanned}):\n"
+            analysis += f"Claimed profiles: {len(stored['profiles'])}\n\n"
+            
+            for site, url, metadata in stored['profiles']:
+                analysis += f"✓ {site}: {url or 'N/A'}\n"
+                if metadata:
+                    analysis += f"  Metadata: {metadata}\n"
+            
+            return analysis
         else:
+            if not os.path.exists(report_path):
+                return f"Report file not found: {report_path}"
+                
             # For non-JSON formats, return file contents
             with open(report_path, 'r', encoding='utf-8', errors='ignore') as f:
                 return f"Report contents ({format}):\n{f.read()}"
@@ -178,4 +339,65 @@ async def read_maigret_report(username: str, format: str = "json") -> str:
     except Exception as e:
         error_msg = f"Error reading Maigret report: {str(e)}"
         logger.error(error_msg)
-        return error_msg
\ No newline at end of file
+        return error_msg
+
+@tool
+async def maigret_scan_diff(username: str) -> str:
+    """
+    Show which profiles appeared or disappeared for a username between its
+    two most recent complete Maigret scans.
+    
+    Args:
+        username: Username to compare scans for
+        
+    Returns:
+        Added and removed claimed profiles
+    """
+    try:
+        diff = maigret_store.scan_diff(username)
+        if not diff:
+            return f"Need at least two complete Maigret scans of '{username}' to compute a diff"
+            
+        previous = datetime.fromtimestamp(diff['previous']).strftime('%Y-%m-%d %H:%M')
+        latest = datetime.fromtimestamp(diff['latest']).strftime('%Y-%m-%d %H:%M')
+        result = f"Maigret changes for '{username}' ({previous} → {latest}):\n"
+        
+        if not diff['added'] and not diff['removed']:
+            return result + "No changes in claimed profiles\n"
+        for site, url in sorted(diff['added'].items()):
+            result += f"  + {site}: {url}\n"
+        for site, url in sorted(diff['removed'].items()):
+            result += f"  - {site}: {url}\n"
+        return result
+        
+    except Exception as e:
+        error_msg = f"Error computing Maigret diff for {username}: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+@tool
+async def maigret_username_overlap(usernames: List[str]) -> str:
+    """
+    Find sites where several of the given usernames have claimed profiles,
+    using the latest stored Maigret scan of each username.
+    
+    Args:
+        usernames: Usernames to cross-reference
+        
+    Returns:
+        Sites shared by two or more usernames
+    """
+    try:
+        overlap = maigret_store.username_overlap(usernames)
+        if not overlap:
+            return f"No shared sites found between: {', '.join(usernames)}"
+            
+        result = f"Sites shared by multiple usernames ({len(overlap)}):\n"
+        for site, names in overlap.items():
+            result += f"  {site}: {', '.join(names)}\n"
+        return result
+        
+    except Exception as e:
+        error_msg = f"Error computing username overlap: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
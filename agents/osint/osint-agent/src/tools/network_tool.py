@@ -1,16 +1,18 @@
-import socket
-import dns.resolver
-import dns.reversename
-import requests
 import asyncio
 from agno.tools import tool
+from .cache import cached_tool, report_failure
 from typing import Optional, List
 import logging
 import json
+import os
 
 logger = logging.getLogger(__name__)
 
+PORT_SCAN_CONCURRENCY = int(os.getenv("PORT_SCAN_CONCURRENCY", "100"))
+PORT_SCAN_TIMEOUT = float(os.getenv("PORT_SCAN_TIMEOUT", "2"))
+
 @tool
+@cached_tool(ttl=3600, case_insensitive=True)
 async def dns_lookup(domain: str, record_type: str = "A") -> str:
     """
     Perform DNS lookups for various record types.
@@ -22,11 +24,14 @@ async def dns_lookup(domain: str, record_type: str = "A") -> str:
     Returns:
         DNS lookup results
     """
+    # dnspython and requests are imported on first use to keep startup fast
+    import dns.resolver
     try:
         resolver = dns.resolver.Resolver()
         resolver.timeout = 10
         
-        answers = resolver.resolve(domain, record_type)
+        # dnspython blocks; resolve in a thread so parallel tool calls keep running
+        answers = await asyncio.to_thread(resolver.resolve, domain, record_type)
         
         result = f"DNS Lookup for {domain} ({record_type}):\n"
         for answer in answers:
@@ -37,13 +42,16 @@ async def dns_lookup(domain: str, record_type: str = "A") -> str:
     except dns.resolver.NXDOMAIN:
         return f"Domain not found: {domain}"
     except dns.resolver.Timeout:
+        report_failure("timeout", timed_out=True)
         return f"DNS lookup timeout for: {domain}"
     except Exception as e:
         error_msg = f"DNS lookup error for {domain}: {str(e)}"
         logger.error(error_msg)
+        report_failure(str(e))
         return error_msg
 
-@tool 
+@tool
+@cached_tool(ttl=3600, case_insensitive=True)
 async def reverse_dns_lookup(ip_address: str) -> str:
     """
     Perform reverse DNS lookup for an IP address.
@@ -54,12 +62,14 @@ async def reverse_dns_lookup(ip_address: str) -> str:
     Returns:
         Reverse DNS results
     """
+    import dns.resolver
+    import dns.reversename
     try:
         reverse_name = dns.reversename.from_address(ip_address)
         resolver = dns.resolver.Resolver()
         resolver.timeout = 10
         
-        answers = resolver.resolve(reverse_name, "PTR")
+        answers = await asyncio.to_thread(resolver.resolve, reverse_name, "PTR")
         
         result = f"Reverse DNS for {ip_address}:\n"
         for answer in answers:
@@ -70,9 +80,11 @@ async def reverse_dns_lookup(ip_address: str) -> str:
     except Exception as e:
         error_msg = f"Reverse DNS lookup error for {ip_address}: {str(e)}"
         logger.error(error_msg)
+        report_failure(str(e))
         return error_msg
 
 @tool
+@cached_tool(ttl=24 * 3600, case_insensitive=True)
 async def whois_lookup(domain: str) -> str:
     """
     Perform WHOIS lookup using shell command (more reliable than Python libraries).
@@ -83,13 +95,14 @@ async def whois_lookup(domain: str) -> str:
     Returns:
         WHOIS information
     """
-    from .shell_tool import shell_execute
-    return await shell_execute(f"whois {domain}")
+    from .shell_tool import run_shell
+    return await run_shell(f"whois {domain}")
 
 @tool
+@cached_tool(ttl=900, case_insensitive=True)
 async def port_scan_basic(host: str, ports: Optional[List[int]] = None) -> str:
     """
-    Basic port scanning using Python sockets.
+    Basic TCP connect port scanning (ports are probed concurrently).
     
     Args:
         host: Target host or IP address
@@ -103,21 +116,24 @@ async def port_scan_basic(host: str, ports: Optional[List[int]] = None) -> str:
             # Common ports
             ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 8080, 8443]
             
-        open_ports = []
-        
-        for port in ports:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(2)
-                result = sock.connect_ex((host, port))
-                sock.close()
-                
-                if result == 0:
-                    open_ports.append(port)
-                    
-            except Exception:
-                continue
-                
+        # Probe all ports concurrently instead of one 2s connect after another
+        semaphore = asyncio.Semaphore(PORT_SCAN_CONCURRENCY)
+
+        async def probe(port: int) -> bool:
+            async with semaphore:
+                try:
+                    _, writer = await asyncio.wait_for(
+                        asyncio.open_connection(host, port), PORT_SCAN_TIMEOUT
+                    )
+                    writer.close()
+                    return True
+                except (asyncio.TimeoutError, OSError):
+                    return False
+
+        ports = list(dict.fromkeys(ports))
+        probes = await asyncio.gather(*(probe(port) for port in ports))
+        open_ports = [port for port, is_open in zip(ports, probes) if is_open]
+
         result = f"Port scan results for {host}:\n"
         if open_ports:
             result += f"Open ports: {', '.join(map(str, open_ports))}\n"
@@ -129,9 +145,11 @@ async def port_scan_basic(host: str, ports: Optional[List[int]] = None) -> str:
     except Exception as e:
         error_msg = f"Port scan error for {host}: {str(e)}"
         logger.error(error_msg)
+        report_failure(str(e))
         return error_msg
 
 @tool
+@cached_tool(ttl=900)
 async def http_headers(url: str, timeout: int = 10) -> str:
     """
     Retrieve HTTP headers and basic information from a URL.
@@ -143,6 +161,7 @@ async def http_headers(url: str, timeout: int = 10) -> str:
     Returns:
         HTTP headers and response information
     """
+    import requests
     try:
         if not url.startswith(('http://', 'https://')):
             url = 'http://' + url
@@ -151,7 +170,9 @@ async def http_headers(url: str, timeout: int = 10) -> str:
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        response = await asyncio.to_thread(
+            requests.head, url, headers=headers, timeout=timeout, allow_redirects=True
+        )
         
         result = f"HTTP Analysis for {url}:\n"
         result += f"Status Code: {response.status_code}\n"
@@ -164,15 +185,19 @@ async def http_headers(url: str, timeout: int = 10) -> str:
         return result
         
     except requests.exceptions.Timeout:
+        report_failure("timeout", timed_out=True)
         return f"Request timeout for: {url}"
     except requests.exceptions.ConnectionError:
+        report_failure("connection error")
         return f"Connection error for: {url}"
     except Exception as e:
         error_msg = f"HTTP analysis error for {url}: {str(e)}"
         logger.error(error_msg)
+        report_failure(str(e))
         return error_msg
 
 @tool
+@cached_tool(ttl=24 * 3600, case_insensitive=True)
 async def geoip_lookup(ip_address: str) -> str:
     """
     Perform GeoIP lookup using a free API service.
@@ -183,11 +208,12 @@ async def geoip_lookup(ip_address: str) -> str:
     Returns:
         Geographic information for the IP
     """
+    import requests
     try:
         # Using ip-api.com free service (no API key required)
         url = f"http://ip-api.com/json/{ip_address}"
         
-        response = requests.get(url, timeout=10)
+        response = await asyncio.to_thread(requests.get, url, timeout=10)
         data = response.json()
         
         if data.get('status') == 'success':
@@ -200,9 +226,11 @@ async def geoip_lookup(ip_address: str) -> str:
             result += f"  Coordinates: {data.get('lat', 'Unknown')}, {data.get('lon', 'Unknown')}\n"
             return result
         else:
+            report_failure(data.get('message', 'lookup failed'))
             return f"GeoIP lookup failed for {ip_address}: {data.get('message', 'Unknown error')}"
             
     except Exception as e:
         error_msg = f"GeoIP lookup error for {ip_address}: {str(e)}"
         logger.error(error_msg)
+        report_failure(str(e))
         return error_msg
\ No newline at end of file
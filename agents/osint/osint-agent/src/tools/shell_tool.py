@@ -1,93 +1,357 @@
 import subprocess
 import asyncio
+import itertools
+import os
+import resource
+import shutil
+import signal
+import threading
+import time
 from agno.tools import tool
-from typing import Optional
+from .cache import report_failure
+from typing import Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+SHELL_OUTPUT_MAX_BYTES = int(os.getenv("SHELL_OUTPUT_MAX_BYTES", "65536"))
+SHELL_LOG_DIR = os.getenv("SHELL_LOG_DIR", "/workspace/shell_logs")
+# Finished background runs (and their output buffers) are dropped after this many seconds
+SHELL_RUN_RETENTION = int(os.getenv("SHELL_RUN_RETENTION", "3600"))
+READ_CHUNK_SIZE = 4096
+
+# prlimit(1) options for the resource limits a ShellRun can apply
+PRLIMIT = shutil.which("prlimit")
+PRLIMIT_OPTIONS = {
+    resource.RLIMIT_CPU: "cpu",
+    resource.RLIMIT_AS: "as",
+    resource.RLIMIT_FSIZE: "fsize",
+    resource.RLIMIT_NOFILE: "nofile",
+    resource.RLIMIT_NPROC: "nproc",
+}
+
+
+class OutputCapture:
+    """
+    Incremental command output capture.
+
+    Keeps only the most recent ``max_bytes`` of output in memory (a ring
+    buffer) while appending everything to a log file on disk, so long-running
+    tools can't exhaust memory and nothing is lost when the buffer wraps.
+    """
+
+    def __init__(self, log_path: str, max_bytes: int = SHELL_OUTPUT_MAX_BYTES):
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        self._log = open(log_path, "ab")
+
+    def write(self, chunk: bytes):
+        with self._lock:
+            self.total_bytes += len(chunk)
+            self._buffer += chunk
+            if len(self._buffer) > self.max_bytes:
+                del self._buffer[:len(self._buffer) - self.max_bytes]
+            self._log.write(chunk)
+            self._log.flush()
+
+    def tail(self, max_bytes: Optional[int] = None) -> str:
+        """Most recent output, decoded (at most max_bytes)."""
+        with self._lock:
+            data = bytes(self._buffer if max_bytes is None else self._buffer[-max_bytes:])
+        return data.decode('utf-8', errors='ignore')
+
+    @property
+    def dropped_bytes(self) -> int:
+        """Bytes that only survive in the log file."""
+        return self.total_bytes - len(self._buffer)
+
+    def close(self):
+        with self._lock:
+            if not self._log.closed:
+                self._log.close()
+
+
+class ShellRun:
+    """A shell command with streamed, capped output and a pollable handle."""
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        command: str,
+        timeout: int = 300,
+        working_dir: Optional[str] = None,
+        rlimits: Optional[Dict[int, Tuple[int, int]]] = None,
+        log_path: Optional[str] = None
+    ):
+        self.handle = f"sh-{int(time.time())}-{next(self._ids)}"
+        self.command = command
+        self.timeout = timeout
+        self.working_dir = working_dir
+        self.rlimits = rlimits or {}
+        self.capture = OutputCapture(log_path or os.path.join(SHELL_LOG_DIR, f"{self.handle}.log"))
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.returncode: Optional[int] = None
+        self.timed_out = False
+
+    def _prlimit_command(self) -> Optional[list]:
+        """The command wrapped in prlimit(1), which sets the limits before the shell starts."""
+        if not PRLIMIT or any(limit not in PRLIMIT_OPTIONS for limit in self.rlimits):
+            return None
+        options = [f"--{PRLIMIT_OPTIONS[limit]}={soft}:{hard}" for limit, (soft, hard) in self.rlimits.items()]
+        return [PRLIMIT, *options, "--", "/bin/sh", "-c", self.command]
+
+    def _apply_rlimits(self):
+        # Fallback without prlimit(1): limit the shell right after it started.
+        # (preexec_fn would do it before exec, but can deadlock in a threaded process.)
+        for limit, value in self.rlimits.items():
+            try:
+                resource.prlimit(self.process.pid, limit, value)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not apply resource limit {limit} to [{self.handle}]: {e}")
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    async def execute(self) -> "ShellRun":
+        """Run the command to completion or timeout, streaming its output."""
+        logger.info(f"Executing command [{self.handle}]: {self.command}")
+        self.started_at = time.time()
+        try:
+            # Own process group so a timeout also kills children of the shell
+            limited = self._prlimit_command() if self.rlimits else None
+            if limited:
+                self.process = await asyncio.create_subprocess_exec(
+                    *limited,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    cwd=self.working_dir,
+                    start_new_session=True
+                )
+            else:
+                self.process = await asyncio.create_subprocess_shell(
+                    self.command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    cwd=self.working_dir,
+                    start_new_session=True
+                )
+                if self.rlimits:
+                    self._apply_rlimits()
+            try:
+                await asyncio.wait_for(self._pump(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.timed_out = True
+                await self.kill()
+            except asyncio.CancelledError:
+                await self.kill()
+                raise
+            self.returncode = self.process.returncode
+        finally:
+            self.finished_at = time.time()
+            self.capture.close()
+        return self
+
+    async def _pump(self):
+        while True:
+            chunk = await self.process.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            self.capture.write(chunk)
+        await self.process.wait()
+
+    async def kill(self):
+        """Kill the command and everything it started."""
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await self.process.wait()
+
+    def _output_section(self, tail_bytes: Optional[int] = None) -> str:
+        output = self.capture.tail(tail_bytes)
+        omitted = self.capture.total_bytes - len(output.encode('utf-8'))
+        if omitted > 0:
+            return f"[{omitted} earlier bytes omitted; full log: {self.capture.log_path}]\n{output}"
+        return output
+
+    def format_result(self) -> str:
+        """Render the finished command the way shell_execute reports it."""
+        if self.timed_out:
+            return (
+                f"Command timed out after {self.timeout} seconds: {self.command}\n"
+                f"Partial output:\n{self._output_section()}"
+            )
+        if self.returncode != 0:
+            logger.warning(f"Command failed with return code {self.returncode}")
+        return f"Command: {self.command}\nReturn Code: {self.returncode}\nOutput:\n{self._output_section()}"
+
+    def format_status(self, tail_bytes: int = 4096) -> str:
+        """Render progress of a (possibly still running) command."""
+        if self.running:
+            state = f"running for {time.time() - self.started_at:.0f}s"
+        elif self.started_at is None:
+            state = "starting"
+        elif self.timed_out:
+            state = f"timed out after {self.timeout}s"
+        else:
+            state = f"finished with return code {self.returncode} in {self.finished_at - self.started_at:.0f}s"
+        return (
+            f"Handle: {self.handle}\nCommand: {self.command}\nStatus: {state}\n"
+            f"Output so far: {self.capture.total_bytes} bytes (log: {self.capture.log_path})\n"
+            f"Latest output:\n{self._output_section(tail_bytes)}"
+        )
+
+
+_runs: Dict[str, ShellRun] = {}
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread, so background runs outlive the agent turn that started them."""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="shell-background", daemon=True).start()
+        return _background_loop
+
+
+async def run_shell(command: str, timeout: int = 300, working_dir: Optional[str] = None) -> str:
+    """
+    Run a shell command and return its formatted result.
+
+    Plain coroutine for other tools to call (Agno ``@tool`` functions are not
+    directly callable).
+    """
+    try:
+        run = ShellRun(command, timeout, working_dir)
+        await run.execute()
+        if run.timed_out:
+            report_failure(f"timed out after {timeout}s", timed_out=True)
+        elif run.returncode != 0:
+            report_failure(f"exit code {run.returncode}")
+        return run.format_result()
+    except Exception as e:
+        error_msg = f"Error executing command '{command}': {str(e)}"
+        logger.error(error_msg)
+        report_failure(str(e))
+        return error_msg
+
+
+def _evict_finished():
+    """Forget background runs that finished more than SHELL_RUN_RETENTION seconds ago."""
+    cutoff = time.time() - SHELL_RUN_RETENTION
+    for handle, run in list(_runs.items()):
+        if run.finished_at is not None and run.finished_at < cutoff:
+            _runs.pop(handle, None)
+
+
+def start_background(command: str, timeout: int = 300, working_dir: Optional[str] = None) -> ShellRun:
+    """Start a shell command on the background loop and register its handle."""
+    _evict_finished()
+    run = ShellRun(command, timeout, working_dir)
+    _runs[run.handle] = run
+    asyncio.run_coroutine_threadsafe(run.execute(), get_background_loop())
+    return run
+
+
+def get_run(handle: str) -> Optional[ShellRun]:
+    _evict_finished()
+    return _runs.get(handle)
+
+
 @tool
-async def shell_execute(command: str, timeout: int = 300, working_dir: Optional[str] = None) -> str:
+async def shell_execute(
+    command: str,
+    timeout: int = 300,
+    working_dir: Optional[str] = None,
+    background: bool = False
+) -> str:
     """
     Execute any shell command with unrestricted access. Use this for running OSINT tools,
     installing new tools, network reconnaissance, file operations, etc.
-    
+
+    Output is streamed: only the last part is kept in the result and the full
+    log is written to /workspace/shell_logs/. On timeout the partial output is
+    returned. Use background=True for long scans (nmap, amass) and check on
+    them with shell_poll.
+
     Args:
         command: The command to execute
         timeout: Command timeout in seconds (default 300)
         working_dir: Working directory for command execution
-        
+        background: Return a handle immediately instead of waiting for the command
+
     Returns:
-        Command output as string
+        Command output as string, or the handle of a background command
     """
+    if not background:
+        return await run_shell(command, timeout, working_dir)
+
     try:
-        logger.info(f"Executing command: {command}")
-        
-        # Use asyncio subprocess for non-blocking execution
-        process = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-            cwd=working_dir
+        run = start_background(command, timeout, working_dir)
+        return (
+            f"Started background command {run.handle}: {command}\n"
+            f"Full log: {run.capture.log_path}\n"
+            f"Call shell_poll with handle='{run.handle}' to check progress."
         )
-        
-        # Wait for completion with timeout
-        try:
-            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
-            output = stdout.decode('utf-8', errors='ignore')
-            
-            if process.returncode != 0:
-                logger.warning(f"Command failed with return code {process.returncode}")
-                
-            return f"Command: {command}\nReturn Code: {process.returncode}\nOutput:\n{output}"
-            
-        except asyncio.TimeoutError:
-            process.kill()
-            await process.wait()
-            return f"Command timed out after {timeout} seconds: {command}"
-            
     except Exception as e:
-        error_msg = f"Error executing command '{command}': {str(e)}"
+        error_msg = f"Error starting command '{command}': {str(e)}"
         logger.error(error_msg)
         return error_msg
 
+
 @tool
-async def install_tool(tool_name: str, install_command: Optional[str] = None) -> str:
+async def shell_poll(handle: str, tail_bytes: int = 4096) -> str:
+    """
+    Check progress of a background shell command.
+
+    Args:
+        handle: Handle returned by shell_execute(background=True)
+        tail_bytes: How much of the latest output to include (default 4096)
+
+    Returns:
+        Status, output size and latest output of the command
+    """
+    run = get_run(handle)
+    if run is None:
+        log_path = os.path.join(SHELL_LOG_DIR, f"{handle}.log")
+        if os.path.exists(log_path):
+            return f"Shell handle '{handle}' finished over {SHELL_RUN_RETENTION}s ago; full output is in {log_path}"
+        return f"Error: Unknown shell handle '{handle}'"
+    return run.format_status(tail_bytes)
+
+
+@tool
+async def install_tool(tool_name: str, install_command: Optional[str] = None, force: bool = False) -> str:
     """
     Install OSINT tools using package managers or direct installation.
-    
+    Tools that are already installed (per the install registry or PATH) are
+    not reinstalled; prebuilt bundles in /workspace/tool_bundles are used when available.
+
     Args:
         tool_name: Name of the tool to install
         install_command: Custom install command, if not provided will try common methods
-        
+        force: Reinstall even if the tool is already installed
+
     Returns:
         Installation result
     """
-    if install_command:
-        return await shell_execute(install_command)
-    
-    # Try common installation methods
-    common_installs = {
-        'theharvester': 'apt-get update && apt-get install -y theharvester',
-        'nmap': 'apt-get update && apt-get install -y nmap',
-        'masscan': 'apt-get update && apt-get install -y masscan', 
-        'subfinder': 'go install -v github.com/projectdiscovery/subfinder/v2/cmd/subfinder@latest',
-        'amass': 'go install -v github.com/OWASP/Amass/v3/...@master',
-        'nuclei': 'go install -v github.com/projectdiscovery/nuclei/v2/cmd/nuclei@latest',
-        'shodan': 'pip3 install shodan',
-        'censys': 'pip3 install censys',
-    }
-    
-    if tool_name.lower() in common_installs:
-        return await shell_execute(common_installs[tool_name.lower()])
-    else:
-        # Try pip, apt, and go install
-        pip_result = await shell_execute(f"pip3 install {tool_name}")
-        if "Successfully installed" in pip_result:
-            return pip_result
-            
-        apt_result = await shell_execute(f"apt-get update && apt-get install -y {tool_name}")
-        if "0 upgraded" in apt_result or "newly installed" in apt_result:
-            return apt_result
-            
-        return f"Could not install {tool_name}. Try providing a custom install command."
\ No newline at end of file
+    from .install_registry import install_package
+    try:
+        return await install_package(tool_name, install_command, force)
+    except Exception as e:
+        error_msg = f"Error installing {tool_name}: {str(e)}"
+        logger.error(error_msg)
+        return error_msg
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Investigation worker process (OSINT_ROLE=worker).
+
+Leases jobs from the broker, runs up to INVESTIGATION_MAX_CONCURRENT of them
+at once with a local OSINTAgent and publishes progress and results to the
+broker's outbox. While a job runs its lease is renewed every third of
+BROKER_LEASE_SECONDS; if the renewal fails because the job was cancelled from
+IRC (or the lease was lost), the investigation is cancelled here.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+
+from broker import BROKER_POLL_INTERVAL, BrokerJob, JobBroker, default_worker_id
+from progress import ProgressReporter
+from startup import startup
+from worker_loop import INVESTIGATION_MAX_CONCURRENT
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between lease attempts while the broker database keeps failing
+BROKER_ERROR_BACKOFF_MAX = 30.0
+
+
+class InvestigationWorker:
+    """Pulls jobs from the broker and runs them on this process's agent."""
+
+    def __init__(
+        self,
+        broker: JobBroker,
+        agent,
+        worker_id: str = None,
+        max_concurrent: int = INVESTIGATION_MAX_CONCURRENT
+    ):
+        self.broker = broker
+        self.agent = agent
+        self.worker_id = worker_id or default_worker_id()
+        self.max_concurrent = max(1, max_concurrent)
+        self._tasks = set()
+        self._publishes = set()
+
+    async def run(self):
+        logger.info(f"👷 Worker {self.worker_id} polling {self.broker.path} (max {self.max_concurrent} concurrent)")
+        backoff = 0.0
+        while True:
+            if len(self._tasks) >= self.max_concurrent:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                job = await asyncio.to_thread(self.broker.lease, self.worker_id)
+            except sqlite3.Error as e:
+                # e.g. "database is locked" while another process holds a long write
+                backoff = min(backoff * 2, BROKER_ERROR_BACKOFF_MAX) if backoff else BROKER_POLL_INTERVAL
+                logger.warning(f"Could not lease a job ({e}), retrying in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+                continue
+            backoff = 0.0
+            if job is None:
+                await asyncio.sleep(BROKER_POLL_INTERVAL)
+                continue
+            task = asyncio.ensure_future(self._process(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, job: BrokerJob):
+        retry = f" (attempt {job.attempts})" if job.attempts > 1 else ""
+        logger.info(f"🚀 Job #{job.id} for {job.nick}{retry}: {job.query}")
+        progress = ProgressReporter(lambda text: self._publish_progress(job, text), job.nick)
+        investigation = asyncio.ensure_future(self._investigate(job, progress))
+        keepalive = asyncio.ensure_future(self._keep_lease(job, investigation))
+        progress.start()
+        try:
+            result = await investigation
+            await asyncio.to_thread(self.broker.complete, job, self.worker_id, result)
+            logger.info(f"✅ Job #{job.id} for {job.nick} completed")
+        except asyncio.CancelledError:
+            logger.info(f"🛑 Job #{job.id} for {job.nick} cancelled")
+        except Exception as e:
+            logger.error(f"❌ Job #{job.id} failed: {e}", exc_info=True)
+            await asyncio.to_thread(
+                self.broker.complete, job, self.worker_id,
+                "❌ Investigation failed due to system error", 'failed'
+            )
+        finally:
+            keepalive.cancel()
+            progress.stop()
+
+    def _publish_progress(self, job: BrokerJob, text: str):
+        """ProgressReporter callback: write the line to the broker off the event loop."""
+        task = asyncio.ensure_future(asyncio.to_thread(self.broker.publish, job, text))
+        self._publishes.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Future):
+        self._publishes.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Could not publish progress: {task.exception()}")
+
+    async def _investigate(self, job: BrokerJob, progress: ProgressReporter) -> str:
+        if job.playbook:
+            return await self.agent.run_playbook(job.playbook, job.query, job.session_id, progress=progress)
+        return await self.agent.investigate(job.query, job.session_id, progress=progress)
+
+    async def _keep_lease(self, job: BrokerJob, investigation: asyncio.Future):
+        while not investigation.done():
+            await asyncio.sleep(self.broker.lease_seconds / 3)
+            try:
+                alive = await asyncio.to_thread(self.broker.heartbeat, job.id, self.worker_id)
+            except sqlite3.Error as e:
+                # Retry on the next beat; if the lease runs out meanwhile the broker requeues the job
+                logger.warning(f"Could not renew the lease of job #{job.id}: {e}")
+                continue
+            if not alive:
+                logger.warning(f"🛑 Job #{job.id} was cancelled or lost its lease, stopping it")
+                investigation.cancel()
+                return
+
+
+def run_worker():
+    """Entry point of a worker process: build the agent, then work the queue forever."""
+    with startup.phase("agent import"):
+        from agent import OSINTAgent
+    with startup.phase("agent"):
+        agent = OSINTAgent(
+            model_provider=os.getenv('LLM_PROVIDER', 'openai'),
+            model_name=os.getenv('LLM_MODEL', 'gpt-4')
+        )
+    startup.milestone("worker ready")
+    try:
+        asyncio.run(InvestigationWorker(JobBroker(), agent).run())
+    finally:
+        agent.close()
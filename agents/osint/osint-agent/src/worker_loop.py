@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Shared worker event loop for OSINT investigations.
+
+All investigations run as tasks on one long-lived asyncio loop in a dedicated
+thread, instead of a new thread and ``asyncio.run`` per request. Async
+clients, caches and connection pools created by the agent and its tools stay
+bound to this loop and are reused across investigations, and a semaphore
+bounds how many investigations run at once.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from typing import Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+INVESTIGATION_MAX_CONCURRENT = int(os.getenv('INVESTIGATION_MAX_CONCURRENT', '3'))
+
+
+class WorkerLoop:
+    """Dedicated event loop thread with bounded investigation concurrency."""
+
+    def __init__(self, max_concurrent: int = INVESTIGATION_MAX_CONCURRENT):
+        self.max_concurrent = max(1, max_concurrent)
+        self.loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="investigation-loop", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _bounded(self, coro: Awaitable):
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the worker loop from any thread.
+
+        Returns:
+            Future for the result; cancelling it cancels the task
+        """
+        return asyncio.run_coroutine_threadsafe(self._bounded(coro), self.loop)
+
+
+_worker: Optional[WorkerLoop] = None
+_worker_lock = threading.Lock()
+
+
+def get_worker_loop() -> WorkerLoop:
+    """Get the process-wide investigation loop, starting it on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = WorkerLoop()
+            logger.info(f"🔁 Investigation loop started (max {_worker.max_concurrent} concurrent)")
+        return _worker